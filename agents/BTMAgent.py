@@ -3,9 +3,9 @@ Beat The Mean (BTM) dueling bandit agent.
 Initially presented at https://www.cs.cornell.edu/people/tj/publications/yue_joachims_11a.pdf.
 """
 
-import random
 import numpy as np
-from numpy.core.numeric import Inf
+import heapq
+import bisect
 from .DBAgent import DBAgent
 
 class BTMAgent(DBAgent):
@@ -13,7 +13,7 @@ class BTMAgent(DBAgent):
     Implements a dueling bandit agent following the Beat the Mean policy.
     """
 
-    def __init__(self, n_arms, horizon, gamma=1):
+    def __init__(self, n_arms, horizon, gamma=1, rng=None):
         """
         Initializes BTM Agent. 
         
@@ -21,9 +21,10 @@ class BTMAgent(DBAgent):
             n_arms: number of arms
             horizon: indicates the time horizon for the algorithm to run. 
             gamma: represents transitivity relaxation.
+            rng: Seed or numpy Generator for every random decision of the agent.
         """
 
-        super(BTMAgent,self).__init__(n_arms)
+        super(BTMAgent,self).__init__(n_arms, rng)
         self.horizon = horizon
         self.gamma = gamma
 
@@ -31,21 +32,94 @@ class BTMAgent(DBAgent):
         # The more horizon, the more confidence in the selected winner.
         self.delta = 1/(2*n_arms*horizon)
 
-        # Current working set.
-        self.working_set = list(range(n_arms))
-
         # Represents win counter (Wb). Position i,j means i beats j.
-        self.wins = np.zeros((self.n_arms, self.n_arms))
+        self.wins = np.zeros((self.n_arms, self.n_arms), dtype=np.int32)
 
         # Represents comparison counter (Nb). Position i,j means i was compared to j.
-        self.comparisons = np.zeros((self.n_arms, self.n_arms))
+        self.comparisons = np.zeros((self.n_arms, self.n_arms), dtype=np.int32)
+
+        # Running row totals of wins and comparisons, i.e. against "the mean".
+        self.wins_per_arm = np.zeros(self.n_arms, dtype=np.int64)
+        self.comps_per_arm = np.zeros(self.n_arms, dtype=np.int64)
 
         # Represents probabilities of beating the mean bandit
-        self.probs = np.array([1/2] * self.n_arms)
+        self.probs = np.full(self.n_arms, 1/2)
+
+        self.reset_bookkeeping()
+
+    def reset_bookkeeping(self):
+        """
+        Resets the working set and the structures built on top of the counters.
+        """
+        # Current working set, as a mask and as the sorted array of its arms.
+        self.in_working_set = np.ones(self.n_arms, dtype=bool)
+        self.working_set = np.arange(self.n_arms)
 
         # Counter of steps
         self.steps = 0
 
+        # Least compared arms of the working set (sorted), and their number of comparisons.
+        self.update_least_compared()
+
+        # Heaps with the probabilities of the working set, to get the best and worst ones.
+        # Entries are (probability, arm, version), with the probability negated in the max heap.
+        # Entries whose version is not the current one of the arm are outdated.
+        self.prob_versions = np.zeros(self.n_arms, dtype=np.int64)
+        self.build_prob_heaps()
+
+    def update_least_compared(self):
+        """
+        Recomputes the least compared arms of the working set from scratch.
+        """
+        comps = self.comps_per_arm[self.working_set]
+        self.min_comps = comps.min()
+        self.least_compared = self.working_set[comps == self.min_comps].tolist()
+
+    def build_prob_heaps(self):
+        """
+        Rebuilds the heaps of probabilities from the current probabilities of the working set.
+        Arms never compared since the last removal (whose probability is not a number) are left out;
+        they are added back when they are compared.
+        """
+        arms = self.working_set[~np.isnan(self.probs[self.working_set])]
+        versions = self.prob_versions[arms]
+        self.worst_heap = list(zip(self.probs[arms].tolist(), arms.tolist(), versions.tolist()))
+        self.best_heap = [(-prob, arm, version) for prob, arm, version in self.worst_heap]
+        heapq.heapify(self.worst_heap)
+        heapq.heapify(self.best_heap)
+
+    def set_prob(self, arm, prob):
+        """
+        Updates the probability of an arm of the working set and its heap entries.
+
+        Args:
+            arm: arm of the working set.
+            prob: new probability of beating the mean bandit.
+        """
+        self.probs[arm] = prob
+        self.prob_versions[arm] += 1
+        version = int(self.prob_versions[arm])
+        heapq.heappush(self.worst_heap, (float(prob), int(arm), version))
+        heapq.heappush(self.best_heap, (-float(prob), int(arm), version))
+
+        # Outdated entries are only dropped when they reach the top, so compact every now and then.
+        if len(self.worst_heap) > 4 * self.n_arms:
+            self.build_prob_heaps()
+
+    def get_heap_top(self, heap):
+        """
+        Drops the outdated entries on top of a heap of probabilities.
+
+        Args:
+            heap: worst_heap or best_heap.
+
+        Returns:
+            the (possibly negated) probability on top.
+        """
+        while heap[0][2] != self.prob_versions[heap[0][1]] or not self.in_working_set[heap[0][1]]:
+            heapq.heappop(heap)
+        return heap[0][0]
+
     def reward(self, n_arm_1, n_arm_2, one_wins):
         """
         Updates the knowledge given the reward. Since it's a Dueling Bandit, the reward
@@ -63,11 +137,20 @@ class BTMAgent(DBAgent):
         # Update wins and comparisons of the chosen arm against "the mean".
         if one_wins:
             self.wins[n_arm_1][n_arm_2] += 1
+            self.wins_per_arm[n_arm_1] += 1
         self.comparisons[n_arm_1][n_arm_2] += 1
+        self.comps_per_arm[n_arm_1] += 1
+
+        if self.in_working_set[n_arm_1]:
+            self.set_prob(n_arm_1, self.wins_per_arm[n_arm_1] / self.comps_per_arm[n_arm_1])
 
-        wins_per_arm = np.sum(self.wins,axis=1)
-        comps_per_arm = np.sum(self.comparisons,axis=1)
-        self.probs[n_arm_1] = wins_per_arm[n_arm_1] / comps_per_arm[n_arm_1]
+            # The arm is no longer among the least compared ones.
+            if self.comps_per_arm[n_arm_1] == self.min_comps + 1:
+                self.least_compared.pop(bisect.bisect_left(self.least_compared, n_arm_1))
+                if not self.least_compared:
+                    self.update_least_compared()
+        else:
+            self.probs[n_arm_1] = self.wins_per_arm[n_arm_1] / self.comps_per_arm[n_arm_1]
 
         # Increase step counter
         self.steps += 1
@@ -75,38 +158,43 @@ class BTMAgent(DBAgent):
         # Now we check if updates to the working set are needed.
 
         # Get the minimum number of comparisons from within the working set
-        comp_min = np.min(comps_per_arm[self.working_set])
+        comp_min = self.min_comps
+        # While some arm has not been compared, the confidence interval (1) is wider than any
+        # gap between probabilities, so no arm can be removed.
+        if comp_min == 0:
+            return
         # Get confidence interval
-        conf = self.gamma**2 * np.sqrt((1/comp_min) * np.log(1/self.delta)) if comp_min != 0 else 1
+        conf = self.gamma**2 * np.sqrt((1/comp_min) * np.log(1/self.delta))
 
         if(self.gamma > 1):
             conf *= 3
 
-        worst_prob = np.min(self.probs[self.working_set])
-        best_prob = np.max(self.probs[self.working_set])
+        worst_prob = self.get_heap_top(self.worst_heap)
+        best_prob = -self.get_heap_top(self.best_heap)
 
         # Update working set removing the loser, if any
         if worst_prob + conf <= best_prob - conf:
-            
-            losers_all = np.flatnonzero(self.probs == worst_prob)
-            losers = losers_all[np.in1d(losers_all, self.working_set, assume_unique=True)] # Only Working Set
-            loser = np.random.choice(losers)
-
-            # Remove every comparison and win towards the loser (i.e, raise the mean)
-            self.wins[:,loser] = np.zeros(self.n_arms)
-            self.comparisons[:,loser] = np.zeros(self.n_arms)
-
-            self.working_set.remove(loser)
 
-            # Recompute the probabilities
-            for arm in range(self.n_arms):
-                if arm in self.working_set:
-                    wins_per_arm = np.sum(self.wins,axis=1)
-                    comps_per_arm = np.sum(self.comparisons,axis=1)
-                    self.probs[arm] = wins_per_arm[arm] / comps_per_arm[arm]
-                else:
-                    self.probs[arm] = 0
+            losers = self.working_set[self.probs[self.working_set] == worst_prob] # Only Working Set
+            loser = self.rng.choice(losers)
 
+            # Remove every comparison and win towards the loser (i.e, raise the mean)
+            self.wins_per_arm -= self.wins[:,loser]
+            self.comps_per_arm -= self.comparisons[:,loser]
+            self.wins[:,loser] = 0
+            self.comparisons[:,loser] = 0
+
+            self.in_working_set[loser] = False
+            self.working_set = np.flatnonzero(self.in_working_set)
+
+            # Recompute the probabilities. Arms whose only comparisons were against
+            # the loser get a probability that is not a number until compared again.
+            with np.errstate(invalid='ignore'):
+                self.probs[self.working_set] = self.wins_per_arm[self.working_set] / self.comps_per_arm[self.working_set]
+            self.probs[~self.in_working_set] = 0
+            self.prob_versions += 1
+            self.build_prob_heaps()
+            self.update_least_compared()
 
     def step(self):
         """
@@ -124,13 +212,9 @@ class BTMAgent(DBAgent):
         # Otherwise, we select the arms according to BTM
 
         # Get the less compared arm from working set, with random tie breaking
-        comps_per_arm = np.sum(self.comparisons,axis=1)
-        comps_min = np.min(comps_per_arm[self.working_set])
-        least_comps_all = np.flatnonzero(comps_per_arm == comps_min) # Might contain indices not in WS
-        least_comps = least_comps_all[np.in1d(least_comps_all, self.working_set, assume_unique=True)] # Ensure WS
-        arm1 = np.random.choice(least_comps)
+        arm1 = self.least_compared[self.rng.choice(len(self.least_compared))]
         # Choose another arm at random
-        arm2 = np.random.choice(self.working_set)
+        arm2 = self.working_set[self.rng.choice(len(self.working_set))]
 
         return arm1, arm2
         
@@ -140,11 +224,12 @@ class BTMAgent(DBAgent):
         """
 
         super().reset()
-        self.working_set = list(range(self.n_arms))
-        self.wins = np.zeros((self.n_arms, self.n_arms))
-        self.comparisons = np.zeros((self.n_arms, self.n_arms))
-        self.probs = np.array([1/2] * self.n_arms)
-        self.steps = 0
+        self.wins.fill(0)
+        self.comparisons.fill(0)
+        self.wins_per_arm.fill(0)
+        self.comps_per_arm.fill(0)
+        self.probs.fill(1/2)
+        self.reset_bookkeeping()
 
     def get_name(self):
         """
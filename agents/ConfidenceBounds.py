@@ -0,0 +1,309 @@
+"""
+Incremental confidence bounds for dueling bandit agents.
+"""
+
+import numpy as np
+import heapq
+import math
+
+# Conditions whose per-arm counts can be tracked (see ConfidenceBounds.get_count).
+COUNT_CONDITIONS = {
+    'upper': lambda upper, lower: upper >= 1/2, # Arms that may beat (or tie) each arm
+    'strict_upper': lambda upper, lower: upper > 1/2, # Arms that may be beaten by each arm
+    'lower': lambda upper, lower: lower >= 1/2, # Arms that each arm surely beats (or ties)
+    'strict_lower': lambda upper, lower: lower > 1/2, # Arms that each arm surely beats
+}
+
+class ConfidenceBounds():
+    """
+    Keeps the UCB-like confidence bounds of every pairwise win ratio, i.e.,
+    ratio(i,j) +- sqrt(alpha * log(t) / matches(i,j)), with bounds 1 +- sqrt(alpha)
+    for pairs never compared and 1/2 on the diagonal.
+
+    Win and match counts are updated in O(1) per duel. Bounds are only computed
+    for the rows or columns that are requested. Since log(t) is common to every
+    pair, each cell crosses 1/2 at a time that can be known in advance; these
+    crossings are kept in a heap, so that the per-arm counts of cells meeting a
+    condition (e.g. upper bound >= 1/2, i.e. Copeland upper counts) are kept
+    up to date without recomputing the whole matrix on every step.
+    """
+
+    def __init__(self, n_arms, alpha, counts=('upper',)):
+        """
+        Initializes the bounds.
+
+        Args:
+            n_arms: number of arms.
+            alpha: exploration rate, scaling the width of the bounds.
+            counts: names of the conditions whose per-arm counts are tracked
+                (keys of COUNT_CONDITIONS).
+        """
+        self.n_arms = n_arms
+        self.alpha = alpha
+        self.conditions = list(counts)
+
+        self.wins = np.zeros((n_arms, n_arms), dtype=np.int32) # In position (i,j), # of times i beat j.
+        self.matches = np.zeros((n_arms, n_arms), dtype=np.int32) # In position (i,j), # of duels between i and j.
+        self.status = {name: np.zeros((n_arms, n_arms), dtype=bool) for name in self.conditions}
+        self.versions = np.zeros((n_arms, n_arms), dtype=np.int32)
+        self.reset()
+
+    def reset(self):
+        """
+        Forgets every recorded duel. Arrays are reset in place.
+        """
+        self.wins.fill(0)
+        self.matches.fill(0)
+        self.time = 1
+        self.log_time = 0.0
+
+        # Status of every cell for each condition, and its count by rows.
+        # Pairs never compared have constant bounds.
+        width = math.sqrt(self.alpha * 1)
+        self.counts = {}
+        for name in self.conditions:
+            condition = COUNT_CONDITIONS[name]
+            status = self.status[name]
+            status.fill(condition(1 + width, 1 - width))
+            np.fill_diagonal(status, condition(1/2, 1/2))
+            self.counts[name] = np.count_nonzero(status, axis=1)
+
+        # Cells updated since the last call to set_time.
+        self.dirty = set()
+        # Heap of (time, version, i, j) with the time at which a cell should be checked again.
+        # Entries whose version is not the current one of the cell are outdated.
+        self.events = []
+        self.versions.fill(0)
+
+    def update(self, winner, loser):
+        """
+        Records the result of a duel.
+
+        Args:
+            winner: arm that won the duel.
+            loser: arm that lost the duel.
+        """
+        self.wins[winner, loser] += 1
+        self.matches[winner, loser] += 1
+        self.matches[loser, winner] += 1
+        if winner != loser:
+            self.versions[winner, loser] += 1
+            self.versions[loser, winner] += 1
+            self.dirty.add((winner, loser))
+            self.dirty.add((loser, winner))
+
+    def set_time(self, time):
+        """
+        Sets the time step used for the width of the bounds, refreshing the counts
+        of the cells updated since the last call and of the cells crossing 1/2.
+
+        Args:
+            time: current time step (>= 1).
+        """
+        self.time = time
+        self.log_time = float(np.log(time))
+
+        for i, j in self.dirty:
+            self.refresh(i, j)
+        self.dirty.clear()
+
+        while self.events and self.events[0][0] <= time:
+            _, version, i, j = heapq.heappop(self.events)
+            if version == self.versions[i, j]:
+                self.refresh(i, j)
+
+    def refresh(self, i, j):
+        """
+        Recomputes the status of a cell for each tracked condition and schedules
+        its next check.
+
+        Args:
+            i: row of the cell.
+            j: column of the cell.
+        """
+        matches = self.matches[i, j]
+        ratio = self.wins[i, j] / matches
+        width = math.sqrt(self.alpha * (self.log_time / matches))
+        upper = ratio + width
+        lower = ratio - width
+
+        for name in self.conditions:
+            status = COUNT_CONDITIONS[name](upper, lower)
+            if status != self.status[name][i, j]:
+                self.status[name][i, j] = status
+                self.counts[name][i] += 1 if status else -1
+
+        # Bounds move away from the ratio as time goes on, so the status only changes once
+        # the width reaches the distance from the ratio to 1/2.
+        distance = abs(ratio - 1/2)
+        if self.alpha <= 0 or (ratio < 1/2 and upper > 1/2) or (ratio > 1/2 and lower < 1/2) or (ratio == 1/2 and width > 0):
+            return
+        exponent = matches * distance**2 / self.alpha
+        if exponent > 700:
+            # Would take more than 1e300 steps
+            return
+        # Checked slightly earlier than the exact crossing to be safe against rounding,
+        # and then once per step until it happens.
+        heapq.heappush(self.events, (max(self.time + 1, int(math.exp(exponent) * (1 - 1e-9))), self.versions[i, j], i, j))
+
+    def compute_bounds(self, wins, matches, sign):
+        """
+        Computes the upper (sign = 1) or lower (sign = -1) bounds for arrays of counts.
+
+        Args:
+            wins: array of win counts.
+            matches: array of match counts.
+            sign: 1 for the upper bounds, -1 for the lower bounds.
+
+        Returns:
+            array with the bounds.
+        """
+        mask = (matches != 0) # This will prevent division by zero, setting 1 in those places instead.
+        widths = np.sqrt(self.alpha * np.where(mask, np.divide(self.log_time, matches, where=mask), 1))
+        return np.where(mask, np.divide(wins, matches, where=mask), 1) + sign * widths
+
+    def get_upper_row(self, arm):
+        """
+        Returns the upper bounds of the probabilities that the arm beats each arm.
+
+        Args:
+            arm: index of the arm.
+
+        Returns:
+            array with the upper bounds.
+        """
+        bounds = self.compute_bounds(self.wins[arm, :], self.matches[arm, :], 1)
+        bounds[arm] = 1/2
+        return bounds
+
+    def get_upper_column(self, arm):
+        """
+        Returns the upper bounds of the probabilities that each arm beats the arm.
+
+        Args:
+            arm: index of the arm.
+
+        Returns:
+            array with the upper bounds.
+        """
+        bounds = self.compute_bounds(self.wins[:, arm], self.matches[:, arm], 1)
+        bounds[arm] = 1/2
+        return bounds
+
+    def get_lower_column(self, arm):
+        """
+        Returns the lower bounds of the probabilities that each arm beats the arm.
+
+        Args:
+            arm: index of the arm.
+
+        Returns:
+            array with the lower bounds.
+        """
+        bounds = self.compute_bounds(self.wins[:, arm], self.matches[:, arm], -1)
+        bounds[arm] = 1/2
+        return bounds
+
+    def get_upper(self, i, j):
+        """
+        Returns the upper bound of the probability that i beats j.
+
+        Args:
+            i: first arm.
+            j: second arm.
+
+        Returns:
+            the upper bound.
+        """
+        return self.compute_bounds(self.wins[i, j:j+1], self.matches[i, j:j+1], 1)[0] if i != j else 1/2
+
+    def get_lower(self, i, j):
+        """
+        Returns the lower bound of the probability that i beats j.
+
+        Args:
+            i: first arm.
+            j: second arm.
+
+        Returns:
+            the lower bound.
+        """
+        return self.compute_bounds(self.wins[i, j:j+1], self.matches[i, j:j+1], -1)[0] if i != j else 1/2
+
+    def get_upper_cells(self, rows, columns):
+        """
+        Returns the upper bounds of a list of cells.
+
+        Args:
+            rows: array with the row (first arm) of each cell.
+            columns: array with the column (second arm) of each cell.
+
+        Returns:
+            array whose entry k is the upper bound of the probability that rows[k] beats columns[k].
+        """
+        bounds = self.compute_bounds(self.wins[rows, columns], self.matches[rows, columns], 1)
+        bounds[rows == columns] = 1/2
+        return bounds
+
+    def get_lower_cells(self, rows, columns):
+        """
+        Returns the lower bounds of a list of cells.
+
+        Args:
+            rows: array with the row (first arm) of each cell.
+            columns: array with the column (second arm) of each cell.
+
+        Returns:
+            array whose entry k is the lower bound of the probability that rows[k] beats columns[k].
+        """
+        bounds = self.compute_bounds(self.wins[rows, columns], self.matches[rows, columns], -1)
+        bounds[rows == columns] = 1/2
+        return bounds
+
+    def get_upper_bounds(self):
+        """
+        Returns the full matrix of upper bounds.
+
+        Returns:
+            matrix whose entry [i,j] is the upper bound of the probability that i beats j.
+        """
+        bounds = self.compute_bounds(self.wins, self.matches, 1)
+        np.fill_diagonal(bounds, 1/2)
+        return bounds
+
+    def get_lower_bounds(self):
+        """
+        Returns the full matrix of lower bounds.
+
+        Returns:
+            matrix whose entry [i,j] is the lower bound of the probability that i beats j.
+        """
+        bounds = self.compute_bounds(self.wins, self.matches, -1)
+        np.fill_diagonal(bounds, 1/2)
+        return bounds
+
+    def get_status(self, name):
+        """
+        Returns, for each cell (i,j), whether the bounds of the probability that
+        i beats j meet the condition.
+
+        Args:
+            name: name of a tracked condition (see COUNT_CONDITIONS).
+
+        Returns:
+            (n_arms, n_arms) boolean array. It must not be modified.
+        """
+        return self.status[name]
+
+    def get_count(self, name):
+        """
+        Returns, for each arm i, the number of arms j (i included) such that the
+        bounds of the probability that i beats j meet the condition.
+
+        Args:
+            name: name of a tracked condition (see COUNT_CONDITIONS).
+
+        Returns:
+            array with the count of each arm. It must not be modified.
+        """
+        return self.counts[name]
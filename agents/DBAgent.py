@@ -4,22 +4,91 @@ Overriding this class allows for custom agent implementations.
 """
 
 import numpy as np
-
-class DBAgent():
+from utils.RandomPool import RandomPool
+from utils.Configurable import Configurable
+from .DenseOutcomeStore import DenseOutcomeStore
+from .SparseOutcomeStore import SparseOutcomeStore
+from .memory import get_memory_footprint
+
+def random_argmax(values, rng):
+    """
+    Helper function to compute a row-wise argmax with random tie-breaking.
+
+    Args:
+        values: 2D array of values.
+        rng: numpy Generator used to break ties.
+
+    Returns:
+        for each row, the index of one of its maxima, chosen uniformly at random.
+    """
+    is_max = values == values.max(axis=1, keepdims=True)
+    return np.argmax(np.where(is_max, rng.random(values.shape), -1), axis=1)
+
+class DBAgent(Configurable):
     """Abstract class for DB Agent"""
 
-    def __init__(self, n_arms):
+    def __init__(self, n_arms, rng=None):
         """
         Initializes MABAgent object.
 
         Args:
             n_arms: Number of arms
-            optimism: starting value for rewards
+            rng: Seed or numpy Generator for every random decision of the agent.
         """
 
-        self.outcomes = np.zeros((n_arms, n_arms)) # In position (i,j), # of times i beat j.
+        self.outcome_store = DenseOutcomeStore(n_arms) # Recorded outcomes, see "outcomes"
         self.n_arms = n_arms
         self.is_dueling = True # Used when comparing DBs and MABs in the same simulation
+        self.rng = np.random.default_rng(rng)
+        self.pool = RandomPool(self.rng) # Scalar draws of hot loops, taken from self.rng
+        self.bounds = None # Optional ConfidenceBounds, kept up to date with every duel
+
+    def set_rng(self, rng):
+        """
+        Replaces the random generator of the agent, e.g. with an independent
+        stream for each repeat.
+
+        Args:
+            rng: Seed, SeedSequence or numpy Generator.
+        """
+        self.rng = np.random.default_rng(rng)
+        self.pool = RandomPool(self.rng)
+
+    @property
+    def outcomes(self):
+        """
+        Matrix with the recorded outcomes, in position (i,j), # of times i beat j.
+        With a sparse store it is materialized on every access, so agents reading
+        it on every step should declare themselves dense-only (see supports_sparse_outcomes).
+        """
+        return self.outcome_store.get_matrix()
+
+    def supports_sparse_outcomes(self):
+        """
+        Returns whether the agent works with a sparse outcome store, i.e. it only reads
+        the outcomes through get_ratio, get_comparison_count and get_total_comparison_count.
+        Override when it does not.
+
+        Returns:
+            True if the agent can use a sparse outcome store.
+        """
+        return True
+
+    def set_outcome_store(self, store):
+        """
+        Replaces the storage of the recorded outcomes, forgetting them.
+
+        Args:
+            store: 'dense', 'sparse' or an OutcomeStore object.
+        """
+        if store == 'dense':
+            store = DenseOutcomeStore(self.n_arms)
+        elif store == 'sparse':
+            store = SparseOutcomeStore(self.n_arms)
+
+        if not store.is_dense() and not self.supports_sparse_outcomes():
+            raise ValueError(f"Agent {self.get_name()} only supports dense outcome stores")
+        self.outcome_store = store
 
     def reward(self, n_arm_1, n_arm_2, one_wins):
         """
@@ -34,7 +103,9 @@ class DBAgent():
 
         if not one_wins:
             n_arm_1, n_arm_2 = n_arm_2, n_arm_1
-        self.outcomes[n_arm_1, n_arm_2] += 1
+        self.outcome_store.add(n_arm_1, n_arm_2)
+        if self.bounds is not None:
+            self.bounds.update(n_arm_1, n_arm_2)
 
     def step(self):
         """
@@ -51,7 +122,63 @@ class DBAgent():
         Fully resets the agent
         """
 
-        self.outcomes = np.zeros((self.n_arms, self.n_arms))
+        self.outcome_store.reset()
+        if self.bounds is not None:
+            self.bounds.reset()
+
+    def get_memory_footprint(self):
+        """
+        Estimates the memory held by the agent, including its sub-agents and buffers.
+
+        Returns:
+            estimated number of bytes.
+        """
+        return get_memory_footprint(self)
+
+    def supports_replicates(self):
+        """
+        Returns whether the agent implements the batched interface (reset_replicates,
+        step_replicates and reward_replicates). Override when implementing it.
+
+        Returns:
+            True if several independent repeats can be simulated at once.
+        """
+        return False
+
+    def reset_replicates(self, n_replicates):
+        """
+        Fully resets the agent for a batched run of n_replicates independent
+        repeats. State is kept with a leading replicate axis.
+
+        Args:
+            n_replicates: number of independent repeats.
+        """
+        self.n_replicates = n_replicates
+        self.replicate_indices = np.arange(n_replicates)
+        self.replicate_outcomes = np.zeros((n_replicates, self.n_arms, self.n_arms), dtype=np.int32) # In position (r,i,j), # of times i beat j on replicate r.
+
+    def reward_replicates(self, n_arms_1, n_arms_2, one_wins):
+        """
+        Batched version of "reward", updating the knowledge of every replicate.
+
+        Args:
+            n_arms_1: array with the first arm of the pulled pair on each replicate.
+            n_arms_2: array with the second arm of the pulled pair on each replicate.
+            one_wins: boolean array indicating whether the first arm won on each replicate.
+        """
+        winners = np.where(one_wins, n_arms_1, n_arms_2)
+        losers = np.where(one_wins, n_arms_2, n_arms_1)
+        self.replicate_outcomes[self.replicate_indices, winners, losers] += 1
+
+    def step_replicates(self):
+        """
+        Batched version of "step". Override to use custom policy.
+
+        Returns:
+            Pair of arrays (i,j) with the pair that the policy decided to pull on each replicate.
+        """
+        arms = np.zeros(self.n_replicates, dtype=int)
+        return arms, arms
 
     def get_ratio(self, n_arm_1, n_arm_2):
         """
@@ -67,8 +194,8 @@ class DBAgent():
             to 1/2 if no matches have been recorded.
         """
 
-        wins1 = self.outcomes[n_arm_1, n_arm_2]
-        wins2 = self.outcomes[n_arm_2, n_arm_1]
+        wins1 = self.outcome_store.get_wins(n_arm_1, n_arm_2)
+        wins2 = self.outcome_store.get_wins(n_arm_2, n_arm_1)
 
         if wins1 + wins2 > 0:
             return wins1 / (wins1 + wins2)
@@ -86,7 +213,7 @@ class DBAgent():
         Returns:
             number of matches recorded between n_arm_1 and n_arm_2 (independent of order).
         """
-        return self.outcomes[n_arm_1, n_arm_2] + self.outcomes[n_arm_2, n_arm_1]
+        return self.outcome_store.get_wins(n_arm_1, n_arm_2) + self.outcome_store.get_wins(n_arm_2, n_arm_1)
 
     def get_total_comparison_count(self):
         """
@@ -95,7 +222,7 @@ class DBAgent():
         Returns:
             total matches recorded.
         """
-        return np.sum(self.outcomes)
+        return self.outcome_store.get_total()
 
     def get_name(self):
         """
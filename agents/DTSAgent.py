@@ -4,11 +4,13 @@ First introduced in https://www.researchgate.net/publication/301648067_Double_Th
 """
 
 import numpy as np
-from .DBAgent import DBAgent
+from scipy.special import betainc
+from .DBAgent import DBAgent, random_argmax
+from .ConfidenceBounds import ConfidenceBounds
 
 class DTSAgent(DBAgent):
     
-    def __init__(self, n_arms, alpha=1, beta=1, gamma=1):
+    def __init__(self, n_arms, alpha=1, beta=1, gamma=1, rng=None):
         """
         Initializes Double Thompson Sampling agent. 
 
@@ -17,8 +19,9 @@ class DTSAgent(DBAgent):
             alpha: Starting alpha parameter for thompson sampling
             beta: Starting beta parameter for thompson sampling
             gamma: Size of the confidence interval for the starting UCB-like pruning phase.
+            rng: Seed or numpy Generator for every random decision of the agent.
         """
-        super(DTSAgent,self).__init__(n_arms)
+        super(DTSAgent,self).__init__(n_arms, rng)
 
         self.alpha = alpha
         self.beta = beta
@@ -27,6 +30,32 @@ class DTSAgent(DBAgent):
         # Time step
         self.time = 1
 
+        # Confidence bounds, with the count of arms each arm may beat
+        self.bounds = ConfidenceBounds(n_arms, gamma, counts=('strict_upper',))
+
+        # Buffers for the sampled scores and the sampled column of the first arm
+        self.scores = np.empty(n_arms)
+        self.thetas = np.empty(n_arms)
+
+        # In position (i,j) with i < j, probability that the sample of theta (i,j) is below 1/2,
+        # i.e. the regularized incomplete beta function at 1/2. Only changes when i and j are compared.
+        self.below_half = np.full((n_arms, n_arms), betainc(alpha, beta, 1/2))
+
+    def reward(self, n_arm_1, n_arm_2, one_wins):
+        """
+        (Override) Updates the knowledge given the reward, and the probability that
+        the sample of the pair is below 1/2.
+
+        Args:
+            n_arm_1: first arm of the pulled pair.
+            n_arm_2: second arm of the pulled pair.
+            one_wins: boolean indicating whether the first arm won.
+        """
+        super().reward(n_arm_1, n_arm_2, one_wins)
+        i, j = min(n_arm_1, n_arm_2), max(n_arm_1, n_arm_2)
+        if i != j:
+            self.below_half[i, j] = betainc(self.outcomes[i, j] + self.alpha, self.outcomes[j, i] + self.beta, 1/2)
+
     def step(self):
         """
         (Override) Returns the pair that should be matched, using DTS.
@@ -36,35 +65,98 @@ class DTSAgent(DBAgent):
         """
 
         # Confidence interval for each probability
-        total_matches = self.outcomes + np.transpose(self.outcomes)
-        mask = (total_matches != 0) # This will prevent division by zero, setting 1 in those places instead.
-        conf_interval_sizes = np.sqrt(self.gamma * np.where(mask, np.divide(np.log(self.time), total_matches, where=mask), 1))
-        upper_bounds = np.where(mask, np.divide(self.outcomes, total_matches, where=mask), 1) + conf_interval_sizes
-        lower_bounds = np.where(mask, np.divide(self.outcomes, total_matches, where=mask), 1) - conf_interval_sizes
-        np.fill_diagonal(upper_bounds, 1/2)
-        np.fill_diagonal(lower_bounds, 1/2)
+        self.bounds.set_time(self.time)
         
         # Copeland scores to discard losers
-        scores = np.count_nonzero(upper_bounds > 1/2, axis=1)
-        winners = (scores == scores.max())
+        scores = self.bounds.get_count('strict_upper')
+        winners = np.flatnonzero(scores == scores.max())
+
+        # Thompson sampling. Theta (i,j) is sampled above the diagonal and then 1 is added to it, while
+        # 1-theta(j,i) is used below, so arm i always beats arms j >= i, and beats arms j < i when theta(j,i) < 1/2.
+        # Hence only the samples above the diagonal in the columns of the winners are needed, and only
+        # whether they are below 1/2, which is drawn directly with its probability.
+        columns = np.repeat(winners, winners) # Column i has i samples above the diagonal
+        rows = np.arange(columns.size) - np.repeat(np.cumsum(winners) - winners, winners)
+        below_half = self.rng.random(columns.size) < self.below_half[rows, columns]
+
+        # Select overall winner by updating scores using the sampled probabilities
+        scores = self.scores
+        scores.fill(np.NINF)
+        scores[winners] = (self.n_arms - winners) + np.bincount(columns, weights=below_half, minlength=self.n_arms)[winners]
+        arm1 = self.rng.choice(np.flatnonzero(scores == scores.max()))
+
+        # Sample theta scores against arm1, only for the "uncertain" pairs.
+        uncertain = self.bounds.get_lower_column(arm1) <= 1/2
+        uncertain[arm1] = False
+        opponents = np.flatnonzero(uncertain)
+        uncertain_pairs = self.thetas
+        uncertain_pairs.fill(np.NINF)
+        uncertain_pairs[opponents] = self.rng.beta(self.outcomes[opponents, arm1] + self.alpha, self.outcomes[arm1, opponents] + self.beta)
+        uncertain_pairs[arm1] = 1/2
+
+        # Select competitor as follows: pick the best one from the "uncertain" pairs.
+        arm2 = self.rng.choice(np.flatnonzero(uncertain_pairs == uncertain_pairs.max()))
+
+        self.time += 1
+        return arm1, arm2
+
+    def supports_replicates(self):
+        """
+        (Override) DTS supports batched runs.
+        """
+        return True
+
+    def reset_replicates(self, n_replicates):
+        """
+        (Override) Fully resets the agent for a batched run.
+
+        Args:
+            n_replicates: number of independent repeats.
+        """
+        super().reset_replicates(n_replicates)
+        self.time = 1
 
-        # Thompson sampling
-        thetas = np.empty((self.n_arms, self.n_arms)) # Estimates for each probability
+    def step_replicates(self):
+        """
+        (Override) Batched version of "step", following the same policy on every replicate.
 
-        thetas = np.triu(np.random.beta(self.outcomes + self.alpha, np.transpose(self.outcomes) + self.beta), 1)
-        thetas = thetas + (1-np.transpose(thetas))
+        Returns:
+            Pair of arrays (i,j) with the pair that the policy decided to pull on each replicate.
+        """
+        indices = self.replicate_indices
+        outcomes = self.replicate_outcomes
+        transposed = np.transpose(outcomes, (0, 2, 1))
+        diagonal = np.arange(self.n_arms)
+
+        # Confidence interval for each probability
+        total_matches = outcomes + transposed
+        mask = (total_matches != 0)
+        conf_interval_sizes = np.sqrt(self.gamma * np.where(mask, np.divide(np.log(self.time), total_matches, where=mask), 1))
+        ratios = np.where(mask, np.divide(outcomes, total_matches, where=mask), 1)
+        upper_bounds = ratios + conf_interval_sizes
+        lower_bounds = ratios - conf_interval_sizes
+        upper_bounds[:, diagonal, diagonal] = 1/2
+        lower_bounds[:, diagonal, diagonal] = 1/2
+
+        # Copeland scores to discard losers
+        scores = np.count_nonzero(upper_bounds > 1/2, axis=2)
+        winners = (scores == scores.max(axis=1, keepdims=True))
+
+        # Thompson sampling (np.triu works on the last two axes)
+        thetas = np.triu(self.rng.beta(outcomes + self.alpha, transposed + self.beta), 1)
+        thetas = thetas + (1-np.transpose(thetas, (0, 2, 1)))
 
         # Select overall winner by updating scores using the sampled probabilities
-        scores = np.where(winners, np.count_nonzero(thetas > 1/2, axis=1), np.NINF)
-        arm1 = np.random.choice(np.flatnonzero(scores == scores.max()))
+        scores = np.where(winners, np.count_nonzero(thetas > 1/2, axis=2), np.NINF)
+        arm1 = random_argmax(scores, self.rng)
 
         # Update theta scores
-        thetas[:, arm1] = np.random.beta(self.outcomes[:,arm1] + self.alpha, self.outcomes[arm1,:] + self.beta)
-        thetas[arm1, arm1] = 1/2
+        thetas_arm1 = self.rng.beta(outcomes[indices, :, arm1] + self.alpha, outcomes[indices, arm1, :] + self.beta)
+        thetas_arm1[indices, arm1] = 1/2
 
         # Select competitor as follows: pick the best one from the "uncertain" pairs.
-        uncertain_pairs = np.where(lower_bounds[:, arm1] <= 1/2, thetas[:, arm1], np.NINF)
-        arm2 = np.random.choice(np.flatnonzero(uncertain_pairs == uncertain_pairs.max()))
+        uncertain_pairs = np.where(lower_bounds[indices, :, arm1] <= 1/2, thetas_arm1, np.NINF)
+        arm2 = random_argmax(uncertain_pairs, self.rng)
 
         self.time += 1
         return arm1, arm2
@@ -75,6 +167,13 @@ class DTSAgent(DBAgent):
         """
         super().reset()
         self.time = 1
+        self.below_half.fill(betainc(self.alpha, self.beta, 1/2))
+
+    def supports_sparse_outcomes(self):
+        """
+        (Override) DTS reads the outcome matrix directly on every step.
+        """
+        return False
 
     def get_name(self):
         """
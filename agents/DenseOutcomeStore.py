@@ -0,0 +1,71 @@
+"""
+Dense storage of pairwise outcomes, the default of dueling bandit agents.
+"""
+
+import numpy as np
+from .OutcomeStore import OutcomeStore
+
+class DenseOutcomeStore(OutcomeStore):
+    """
+    Keeps the outcomes in a (K, K) matrix. The matrix is only allocated once
+    it is first needed, so creating an agent that switches to another backend is cheap.
+    """
+
+    def __init__(self, n_arms):
+        """
+        Initializes the store.
+
+        Args:
+            n_arms: number of arms.
+        """
+        super(DenseOutcomeStore,self).__init__(n_arms)
+        self.matrix = None # In position (i,j), # of times i beat j.
+
+    def add(self, winner, loser):
+        """
+        (Override) Records the result of a duel.
+
+        Args:
+            winner: arm that won the duel.
+            loser: arm that lost the duel.
+        """
+        super().add(winner, loser)
+        self.get_matrix()[winner, loser] += 1
+
+    def get_wins(self, winner, loser):
+        """
+        (Override) Returns the number of times an arm beat another.
+
+        Args:
+            winner: first arm.
+            loser: second arm.
+
+        Returns:
+            number of recorded wins of winner against loser.
+        """
+        return self.matrix[winner, loser] if self.matrix is not None else 0
+
+    def get_matrix(self):
+        """
+        (Override) Returns the live outcome matrix, allocating it if needed.
+
+        Returns:
+            (n_arms, n_arms) array, in position (i,j), # of times i beat j.
+        """
+        if self.matrix is None:
+            self.matrix = np.zeros((self.n_arms, self.n_arms), dtype=np.int32)
+        return self.matrix
+
+    def reset(self):
+        """
+        (Override) Forgets every recorded duel, zeroing the matrix in place if it was allocated.
+        """
+        super().reset()
+        if self.matrix is not None:
+            self.matrix.fill(0)
+
+    def is_dense(self):
+        """
+        (Override) The matrix is the store itself.
+        """
+        return True
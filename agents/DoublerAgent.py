@@ -3,7 +3,6 @@ Doubler (MAB reduction) dueling bandit agent.
 First introduced in http://proceedings.mlr.press/v32/ailon14.pdf.
 """
 
-import random
 import numpy as np
 from numpy.core.numeric import Inf
 from .DBAgent import DBAgent
@@ -13,7 +12,7 @@ class DoublerAgent(DBAgent):
     Implements a dueling bandit agent following the Doubler policy.
     """
 
-    def __init__(self, n_arms, mab):
+    def __init__(self, n_arms, mab, rng=None):
         """
         Initializes Doubler agent. This agent allows a MAB to be used
         with dueling bandits.
@@ -21,8 +20,9 @@ class DoublerAgent(DBAgent):
         Args:
             n_arms: number of arms
             mab: Object of type MABAgent that will be used for doubler.
+            rng: Seed or numpy Generator for every random decision of the agent. Shared with the MAB.
         """
-        super(DoublerAgent,self).__init__(n_arms)
+        super(DoublerAgent,self).__init__(n_arms, rng)
         self.mab = mab
 
         # Ensure the MAB is fresh.
@@ -42,6 +42,20 @@ class DoublerAgent(DBAgent):
         # Used a list instead of a set for random choice performance.
         self.opponent = [0]
 
+        # The MABs draw from the same random stream as the agent.
+        self.set_rng(self.rng)
+
+    def set_rng(self, rng):
+        """
+        (Override) Replaces the random generator of the agent, sharing it (and its pool of random numbers) with the MAB.
+
+        Args:
+            rng: Seed, SeedSequence or numpy Generator.
+        """
+        super().set_rng(rng)
+        self.mab.set_rng(self.rng)
+        self.mab.pool = self.pool
+
     def reward(self, n_arm_1, n_arm_2, one_wins):
         """
         Updates the knowledge given the reward. Since it's a Dueling Bandit, the reward
@@ -80,7 +94,7 @@ class DoublerAgent(DBAgent):
         self.played.add(arm1)
 
         # Arm 2 is played by the uniform sampler depending on past epoch
-        arm2 = random.choice(self.opponent)
+        arm2 = self.opponent[self.rng.integers(len(self.opponent))]
 
         return arm1, arm2
 
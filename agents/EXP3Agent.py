@@ -26,7 +26,7 @@ class EXP3Agent(MABAgent):
     Implements a multi armed bandit agent following the EXP3 policy.
     """ 
 
-    def __init__(self, n_arms, exploration_rate = 0.1, optimism=None):
+    def __init__(self, n_arms, exploration_rate = 0.1, optimism=None, rng=None):
         """
         Initializes EXP3 Agent. 
         
@@ -34,8 +34,9 @@ class EXP3Agent(MABAgent):
             n_arms: number of arms
             exploration_rate: weight (0 to 1) that is given to exploration vs exploitation.
             optimism: starting estimation for the value of every arm.
+            rng: Seed or numpy Generator for every random decision of the agent.
         """
-        super(EXP3Agent,self).__init__(n_arms, optimism)
+        super(EXP3Agent,self).__init__(n_arms, optimism, rng)
         self.exprate = exploration_rate
         self.optimism = optimism
         self.weights = np.ones(n_arms) # EXP3 weights
@@ -52,7 +53,7 @@ class EXP3Agent(MABAgent):
         # Compute each arms probabilities
         self.probs = (1-self.exprate)*(self.weights/sum(self.weights)) + self.exprate/self.n_arms
 
-        return np.random.choice(range(self.n_arms), p=self.probs)
+        return self.rng.choice(self.n_arms, p=self.probs)
 
     def reward(self, n_arm, reward):
         """
@@ -72,9 +73,13 @@ class EXP3Agent(MABAgent):
         Fully resets the agent
         """
         super().reset()
-        self.weights = np.ones(self.n_arms)
-        self.probs = np.empty(self.n_arms)
+        self.weights.fill(1) # Probabilities are recomputed on every step
 
+    def get_state_names(self):
+        """
+        (Override) Adds the weights and last probabilities to the state.
+        """
+        return super().get_state_names() + ['weights', 'probs']
 
     def get_name(self):
         """
@@ -2,7 +2,6 @@
 Epsilon greedy MAB agent.
 """
 
-import random
 import numpy as np
 from .MABAgent import MABAgent
 
@@ -11,7 +10,7 @@ class EpsilonGreedyAgent(MABAgent):
     Implements a multi armed bandit agent following the epsilon greedy policy.
     """   
 
-    def __init__(self, n_arms, epsilon = 0.1, optimism=None):
+    def __init__(self, n_arms, epsilon = 0.1, optimism=None, rng=None):
         """
         Initializes epsilon_greedy Agent. 
         
@@ -19,8 +18,9 @@ class EpsilonGreedyAgent(MABAgent):
             n_arms: number of arms
             epsilon: probability of (random) exploration
             optimism: starting estimation for the value of every arm.
+            rng: Seed or numpy Generator for every random decision of the agent.
         """
-        super(EpsilonGreedyAgent,self).__init__(n_arms, optimism)
+        super(EpsilonGreedyAgent,self).__init__(n_arms, optimism, rng)
         self.epsilon = epsilon
         self.optimism = optimism
 
@@ -33,11 +33,11 @@ class EpsilonGreedyAgent(MABAgent):
         """
         averages = self.averages
         n_arms = self.n_arms
-        if random.random() < self.epsilon:
-            arm = random.randint(0, n_arms-1)
+        if self.pool.random() < self.epsilon:
+            arm = self.rng.integers(n_arms)
             return arm
         else:
-            arm = np.random.choice(np.flatnonzero(averages == averages.max()))# Random tie-breaking
+            arm = self.rng.choice(np.flatnonzero(averages == averages.max()))# Random tie-breaking
             return arm
 
     def get_name(self):
@@ -3,25 +3,26 @@ Interleaved Filter (IF) dueling bandit agent.
 Introduced in https://www.cs.cornell.edu/people/tj/publications/yue_etal_09a.pdf.
 """
 
-import random
 import numpy as np
 from .DBAgent import DBAgent
+from .SparseOutcomeStore import SparseOutcomeStore
 
 class IFAgent(DBAgent):
     """
     Implements a dueling bandit agent following the Interleaved Filter policy.
     """   
 
-    def __init__(self, n_arms, horizon):
+    def __init__(self, n_arms, horizon, rng=None):
         """
         Initializes IF Agent. 
         
         Args:
             n_arms: number of arms
-            horizon: indicates the time horizon for the algorithm to run. 
+            horizon: indicates the time horizon for the algorithm to run.
+            rng: Seed or numpy Generator for every random decision of the agent.
         """
 
-        super(IFAgent,self).__init__(n_arms)
+        super(IFAgent,self).__init__(n_arms, rng)
         self.horizon = horizon
 
         # 1 - delta = Confidence required to conclude winner. 
@@ -31,8 +32,21 @@ class IFAgent(DBAgent):
         # Current best candidate
         self.leader = 0
 
-        # Candidates that are eligible to face the current best
-        self.candidates = range(1, n_arms)
+        # Candidates that are eligible to face the current best, in increasing order.
+        self.candidates = np.arange(1, n_arms)
+
+        # Every duel is between the leader and a candidate, so the decisions are taken from
+        # the wins of each arm against the leader and of the leader against each arm. The
+        # duels are still recorded in the outcome store, which is sparse by default since it
+        # only holds the pairs of the current leader, so memory and resets are O(K).
+        self.outcome_store = SparseOutcomeStore(n_arms)
+        self.candidate_wins = np.zeros(n_arms, dtype=np.int32)
+        self.leader_wins = np.zeros(n_arms, dtype=np.int32)
+        self.log_inv_delta = np.log(1/self.delta) # Numerator of the confidence intervals
+
+        # Whether the leader won each duel of the current round, in candidate order. They are
+        # added to the counters at the end of the round, so a duel only appends to a list.
+        self.round_outcomes = []
 
         # Index of the candidate that should face the leader next.
         self.turn = 0
@@ -49,11 +63,14 @@ class IFAgent(DBAgent):
         """
 
         # If the leader has already been selected, no need to update.
-        if not self.candidates:
+        if self.candidates.size == 0:
             return
 
         super().reward(n_arm_1, n_arm_2, one_wins)
 
+        # The leader is the first arm of the pair, and the candidate of the turn the second one
+        self.round_outcomes.append(one_wins)
+
         # Advance the turn
         self.turn += 1
 
@@ -62,48 +79,46 @@ class IFAgent(DBAgent):
             return
 
         # Otherwise, we update statistics and candidates.
+        leader_won = np.array(self.round_outcomes, dtype=bool)
+        self.leader_wins[self.candidates] += leader_won
+        self.candidate_wins[self.candidates] += ~leader_won
+        self.round_outcomes = []
 
-        # We keep track of losing and winning candidates
-        soft_losers = [] # Candidates that are worse, but not confidently
-        hard_losers = [] # Candidates that are worse confidently
-        winner = None # Candidate that is better, confidently.
-        winner_odds = -1 # Win rate of the current winner
-
-        for candidate in self.candidates:
-
-            # Probability that the candidate beats the leader
-            prob = self.get_ratio(candidate, self.leader)
+        # Probability that each candidate beats the leader, 1/2 if they never met
+        wins = self.candidate_wins[self.candidates]
+        comparisons = wins + self.leader_wins[self.candidates]
+        probs = np.divide(wins, comparisons, out=np.full(comparisons.shape, 1/2), where=comparisons > 0)
 
-            # Size of the confidence interval for this match
-            conf = np.sqrt(np.log(1/self.delta)/self.get_comparison_count(candidate, self.leader))
+        # Size of the confidence interval for each match
+        with np.errstate(divide='ignore'):
+            confs = np.sqrt(self.log_inv_delta/comparisons)
 
-            # If the leader confidently beats the candidate, remove it
-            if prob + conf < 1/2:
-                hard_losers.append(candidate)
+        # Candidates that are worse confidently, and candidates that are worse, but not confidently
+        hard_losers = (probs + confs < 1/2)
+        soft_losers = (probs < 1/2)
 
-            # If the leader beats the candidate, mark it for possible pruning
-            if prob < 1/2:
-                soft_losers.append(candidate)
-
-            # If candidate confidently beats the leader, mark it as winner.
-            if prob > winner_odds and prob - conf > 1/2:
-                winner = candidate
-                winner_odds = prob
+        # Candidates that confidently beat the leader. The winner is the first one with the highest win rate.
+        winners = (probs - confs > 1/2)
 
         # Remove confident losers
-        self.candidates = list(set(self.candidates) - set(hard_losers))
+        keep = ~hard_losers
 
-        if winner != None:
+        if winners.any():
+            winner = np.argmax(np.where(winners, probs, -1))
 
             # Pruning
-            self.candidates = list(set(self.candidates) - set(soft_losers))
+            keep &= ~soft_losers
+            keep[winner] = False
+
+            # Reset the probabilities of the previous round, which were all against the leader.
+            super().reset()
+            self.candidate_wins.fill(0)
+            self.leader_wins.fill(0)
 
             # New leader
-            self.leader = winner
-            self.candidates = self.candidates.remove(winner)
+            self.leader = self.candidates[winner]
 
-            # Reset the probabilities of the previous round
-            super().reset()
+        self.candidates = self.candidates[keep]
 
         # Reset turn
         self.turn = 0
@@ -117,7 +132,7 @@ class IFAgent(DBAgent):
         """
 
         # If we're finished determining a leader, we stick to it.
-        if not self.candidates:
+        if self.candidates.size == 0:
             return self.leader, self.leader
 
         return self.leader, self.candidates[self.turn]
@@ -129,7 +144,10 @@ class IFAgent(DBAgent):
 
         super().reset()
         self.leader = 0
-        self.candidates = range(1, self.n_arms)
+        self.candidates = np.arange(1, self.n_arms)
+        self.candidate_wins.fill(0)
+        self.leader_wins.fill(0)
+        self.round_outcomes = []
         self.turn = 0
 
     def get_name(self):
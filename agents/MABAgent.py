@@ -4,22 +4,40 @@ Overriding this class allows for custom agent implementations.
 """
 
 import numpy as np
+from utils.RandomPool import RandomPool
+from utils.Configurable import Configurable
+from .memory import get_memory_footprint
 
-class MABAgent():
+class MABAgent(Configurable):
     """Abstract class for MAB Agent"""
 
-    def __init__(self, n_arms, optimism=None):
+    def __init__(self, n_arms, optimism=None, rng=None):
         """
         Initializes MABAgent object.
         Args:
             n_arms: Number of arms
             optimism: starting value for rewards
+            rng: Seed or numpy Generator for every random decision of the agent.
         """
-        self.averages = np.array([optimism if optimism else np.NINF] * n_arms)
+        self.averages = np.full(n_arms, optimism if optimism else np.NINF, dtype=float)
         self.optimism = optimism
-        self.times_explored = np.zeros(n_arms)
+        self.times_explored = np.zeros(n_arms, dtype=np.int32)
+        self.total_explored = 0 # Running sum of times_explored
         self.n_arms = n_arms
         self.is_dueling = False # Used when comparing DBs and MABs in the same simulation
+        self.rng = np.random.default_rng(rng)
+        self.pool = RandomPool(self.rng) # Scalar draws of hot loops, taken from self.rng
+
+    def set_rng(self, rng):
+        """
+        Replaces the random generator of the agent, e.g. with an independent
+        stream for each repeat.
+
+        Args:
+            rng: Seed, SeedSequence or numpy Generator.
+        """
+        self.rng = np.random.default_rng(rng)
+        self.pool = RandomPool(self.rng)
 
     def reward(self, n_arm, reward):
         """
@@ -37,6 +55,7 @@ class MABAgent():
             self.averages[n_arm] = old_value + 1/(self.times_explored[n_arm]+1) * (reward - old_value)
 
         self.times_explored[n_arm] += 1
+        self.total_explored += 1
 
     def step(self):
         """
@@ -51,8 +70,78 @@ class MABAgent():
         """
         Fully resets the agent
         """
-        self.averages = np.array([self.optimism if self.optimism else np.NINF] * self.n_arms)
-        self.times_explored = np.zeros(self.n_arms)
+        self.averages.fill(self.optimism if self.optimism else np.NINF)
+        self.times_explored.fill(0)
+        self.total_explored = 0
+
+    def get_state_names(self):
+        """
+        Returns the names of the attributes that hold what the agent has learnt,
+        i.e. those restored by "reset". Each one is either an array with one entry
+        per arm or a number. Override when adding such attributes.
+
+        Returns:
+            list of attribute names.
+        """
+        return ['averages', 'times_explored', 'total_explored']
+
+    def get_memory_footprint(self):
+        """
+        Estimates the memory held by the agent, including its sub-agents and buffers.
+
+        Returns:
+            estimated number of bytes.
+        """
+        return get_memory_footprint(self)
+
+    def supports_replicates(self):
+        """
+        Returns whether the agent implements the batched interface (reset_replicates,
+        step_replicates and reward_replicates). Override when implementing it.
+
+        Returns:
+            True if several independent repeats can be simulated at once.
+        """
+        return False
+
+    def reset_replicates(self, n_replicates):
+        """
+        Fully resets the agent for a batched run of n_replicates independent
+        repeats. State is kept with a leading replicate axis.
+
+        Args:
+            n_replicates: number of independent repeats.
+        """
+        self.n_replicates = n_replicates
+        self.replicate_indices = np.arange(n_replicates)
+        self.replicate_averages = np.full((n_replicates, self.n_arms), self.optimism if self.optimism else np.NINF)
+        self.replicate_times_explored = np.zeros((n_replicates, self.n_arms), dtype=np.int32)
+        self.replicate_total_explored = np.zeros(n_replicates, dtype=np.int64)
+
+    def reward_replicates(self, n_arms, rewards):
+        """
+        Batched version of "reward", updating the knowledge of every replicate.
+
+        Args:
+            n_arms: array with the pulled arm on each replicate.
+            rewards: array with the numerical reward obtained on each replicate.
+        """
+        indices = self.replicate_indices
+        times_explored = self.replicate_times_explored[indices, n_arms]
+        # The first observation replaces the starting value, as in "reward"
+        old_values = np.where(times_explored > 0, self.replicate_averages[indices, n_arms], rewards)
+        self.replicate_averages[indices, n_arms] = old_values + 1/(times_explored+1) * (rewards - old_values)
+        self.replicate_times_explored[indices, n_arms] += 1
+        self.replicate_total_explored += 1
+
+    def step_replicates(self):
+        """
+        Batched version of "step". Override to use custom policy.
+
+        Returns:
+            array with the arm that the policy decided to pull on each replicate.
+        """
+        return np.zeros(self.n_replicates, dtype=int)
 
     def get_best(self):
         """
@@ -3,6 +3,7 @@ MultiSBM (MAB reduction) dueling bandit agent.
 First introduced in http://proceedings.mlr.press/v32/ailon14.pdf.
 """
 
+import numpy as np
 from .DBAgent import DBAgent
 
 class MultiSBMAgent(DBAgent):
@@ -10,7 +11,7 @@ class MultiSBMAgent(DBAgent):
     Implements a dueling bandit agent following the MultiSBM policy.
     """  
 
-    def __init__(self, n_arms, mab_callable, mab_args=[], mab_kwargs=dict()):
+    def __init__(self, n_arms, mab_callable, mab_args=[], mab_kwargs=dict(), compact=False, rng=None):
         """
         Initializes MultiSBM agent. This agent allows a MAB to be used
         with dueling bandits.
@@ -22,20 +23,52 @@ class MultiSBMAgent(DBAgent):
                 creation.
             mab_kwargs: Dict of key-word arguments to be passed to the MAB
                 callable on creation.
+            compact: if set to true, a single MAB is created and the state of the MAB
+                facing each arm is kept in a row of shared (K, K) matrices (see
+                MABAgent.get_state_names), which is lighter to reset and to pickle.
+            rng: Seed or numpy Generator for every random decision of the agent. Shared with every MAB.
         """
-        super(MultiSBMAgent,self).__init__(n_arms)
+        super(MultiSBMAgent,self).__init__(n_arms, rng)
         self.mab_callable = mab_callable
-
-        # Create one MAB per arm. Each MAB will face the arm it's indexed with
-        self.mabs = [mab_callable(*mab_args, **mab_kwargs) for _ in range(n_arms)]
-
-        # Ensure the MABs are fresh.
-        for mab in self.mabs:
-            mab.reset()
+        self.compact = compact
+
+        if compact:
+            # A single MAB, whose state is swapped with the row of the arm it faces.
+            self.mab = mab_callable(*mab_args, **mab_kwargs)
+            self.mab.reset()
+            self.mabs = [self.mab]
+
+            # Fresh state of a MAB, and the state of the MAB facing each arm in row i.
+            self.initial_state = {name: np.copy(getattr(self.mab, name)) for name in self.mab.get_state_names()}
+            self.states = {name: np.empty((n_arms,) + value.shape, dtype=value.dtype) for name, value in self.initial_state.items()}
+            for name, value in self.initial_state.items():
+                self.states[name][...] = value
+        else:
+            # Create one MAB per arm. Each MAB will face the arm it's indexed with
+            self.mabs = [mab_callable(*mab_args, **mab_kwargs) for _ in range(n_arms)]
+
+            # Ensure the MABs are fresh.
+            for mab in self.mabs:
+                mab.reset()
 
         # Last played arm by a MAB
         self.last_played = 0
 
+        # The MABs draw from the same random stream as the agent.
+        self.set_rng(self.rng)
+
+    def set_rng(self, rng):
+        """
+        (Override) Replaces the random generator of the agent, sharing it (and its pool of random numbers) with every MAB.
+
+        Args:
+            rng: Seed, SeedSequence or numpy Generator.
+        """
+        super().set_rng(rng)
+        for mab in self.mabs:
+            mab.set_rng(self.rng)
+            mab.pool = self.pool
+
     def reward(self, n_arm_1, n_arm_2, one_wins):
         """
         Updates the knowledge given the reward. Since it's a Dueling Bandit, the reward
@@ -49,7 +82,12 @@ class MultiSBMAgent(DBAgent):
         """
         
         # Feed the MAB whether it won.
-        self.mabs[n_arm_1].reward(n_arm_2, int(not one_wins))
+        if self.compact:
+            self.load_state(n_arm_1)
+            self.mab.reward(n_arm_2, int(not one_wins))
+            self.store_state(n_arm_1)
+        else:
+            self.mabs[n_arm_1].reward(n_arm_2, int(not one_wins))
 
     def step(self):
         """
@@ -63,7 +101,12 @@ class MultiSBMAgent(DBAgent):
         arm1 = self.last_played
 
         # Arm 2 is determined by the MAB in charge of playing against arm 1
-        arm2 = self.mabs[arm1].step()
+        if self.compact:
+            self.load_state(arm1)
+            arm2 = self.mab.step()
+            self.store_state(arm1)
+        else:
+            arm2 = self.mabs[arm1].step()
         self.last_played = arm2
 
         return arm1, arm2
@@ -74,10 +117,36 @@ class MultiSBMAgent(DBAgent):
         Fully resets the agent
         """
         super().reset()
-        for mab in self.mabs:
-            mab.reset()
+        if self.compact:
+            for name, value in self.initial_state.items():
+                self.states[name][...] = value
+        else:
+            for mab in self.mabs:
+                mab.reset()
         self.last_played = 0
 
+    def load_state(self, arm):
+        """
+        (Compact mode) Makes the MAB hold the state of the MAB facing the arm.
+        Arrays are bound to views of the rows, so that in-place updates reach the matrices.
+
+        Args:
+            arm: index of the arm faced by the MAB.
+        """
+        for name, matrix in self.states.items():
+            setattr(self.mab, name, matrix[arm])
+
+    def store_state(self, arm):
+        """
+        (Compact mode) Saves the state of the MAB into the row of the arm, since the MAB
+        may have replaced some of its attributes (e.g. numbers) instead of updating them.
+
+        Args:
+            arm: index of the arm faced by the MAB.
+        """
+        for name, matrix in self.states.items():
+            matrix[arm] = getattr(self.mab, name)
+
     def get_name(self):
         """
         String representation of the agent.
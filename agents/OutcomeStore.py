@@ -0,0 +1,68 @@
+"""
+Generic storage of the pairwise outcomes recorded by a dueling bandit agent.
+Overriding this class allows for custom storage backends.
+"""
+
+class OutcomeStore():
+    """Abstract class for outcome stores"""
+
+    def __init__(self, n_arms):
+        """
+        Initializes the store.
+
+        Args:
+            n_arms: number of arms.
+        """
+        self.n_arms = n_arms
+        self.total = 0 # Total matches recorded
+
+    def add(self, winner, loser):
+        """
+        Records the result of a duel.
+
+        Args:
+            winner: arm that won the duel.
+            loser: arm that lost the duel.
+        """
+        self.total += 1
+
+    def get_wins(self, winner, loser):
+        """
+        Returns the number of times an arm beat another.
+
+        Args:
+            winner: first arm.
+            loser: second arm.
+
+        Returns:
+            number of recorded wins of winner against loser.
+        """
+        return 0
+
+    def get_total(self):
+        """
+        Returns the total number of matches recorded.
+        """
+        return self.total
+
+    def get_matrix(self):
+        """
+        Returns the outcomes as a dense matrix. Override in sparse backends.
+
+        Returns:
+            (n_arms, n_arms) array, in position (i,j), # of times i beat j.
+        """
+        raise NotImplementedError
+
+    def reset(self):
+        """
+        Forgets every recorded duel.
+        """
+        self.total = 0
+
+    def is_dense(self):
+        """
+        Returns whether get_matrix gives the live matrix of the store (so that it
+        is cheap and reflects later duels) rather than a materialized copy.
+        """
+        return False
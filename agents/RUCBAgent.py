@@ -4,22 +4,24 @@ First introduced in: http://proceedings.mlr.press/v32/zoghi14.pdf
 """
 
 import numpy as np
-from .DBAgent import DBAgent
+from .DBAgent import DBAgent, random_argmax
+from .ConfidenceBounds import ConfidenceBounds
 
 class RUCBAgent(DBAgent):
     """
     Implements a dueling bandit agent following the RUCB policy.
     """
 
-    def __init__(self, n_arms, alpha=0.51):
+    def __init__(self, n_arms, alpha=0.51, rng=None):
         """
         Initializes RUCB agent.
 
         Args:
             n_arms: number of arms. 
             alpha: "Exploration rate" similar to UCB.
+            rng: Seed or numpy Generator for every random decision of the agent.
         """
-        super(RUCBAgent,self).__init__(n_arms)
+        super(RUCBAgent,self).__init__(n_arms, rng)
 
         # UCB exp rate
         self.alpha = alpha
@@ -30,6 +32,9 @@ class RUCBAgent(DBAgent):
         # Time step
         self.time = 1
 
+        # Upper bounds, with Copeland upper counts to find condorcet winner candidates
+        self.bounds = ConfidenceBounds(n_arms, alpha)
+
     def step(self):
         """
         (Override) Returns the pair that should be matched, using RUCB.
@@ -38,20 +43,16 @@ class RUCBAgent(DBAgent):
             Pair of indices (i,j) that the policy decided to pull.
         """
 
-        # Compute Upper Bounds for confidence intervals (UCB)
-        total_matches = self.outcomes + np.transpose(self.outcomes)
-        mask = (total_matches != 0) # This will prevent division by zero, setting 1 in those places instead.
-        conf_interval_sizes = np.sqrt(self.alpha * np.where(mask, np.divide(np.log(self.time), total_matches, where=mask), 1))
-        upper_bounds = np.where(mask, np.divide(self.outcomes, total_matches, where=mask), 1) + conf_interval_sizes
-        np.fill_diagonal(upper_bounds, 1/2)
+        # Update Upper Bounds for confidence intervals (UCB)
+        self.bounds.set_time(self.time)
 
         # Select candidates to condorcet winner
-        cond_winners = np.flatnonzero((upper_bounds >= 1/2).all(axis=1))
+        cond_winners = np.flatnonzero(self.bounds.get_count('upper') == self.n_arms)
 
         # Select benchmarking arm
         a_c = None
         if cond_winners.size == 0:
-            a_c = np.random.randint(0, self.n_arms)
+            a_c = self.rng.integers(0, self.n_arms)
             if self.best != a_c:
                 self.best = None
         elif cond_winners.size == 1:
@@ -59,27 +60,91 @@ class RUCBAgent(DBAgent):
             self.best = a_c
         else:
             # Select with higher weight for the best one.
-            weights = np.full(self.n_arms, 1/(2*(self.n_arms-1)) if self.best else 1/self.n_arms)
-            if self.best:
+            weights = np.full(self.n_arms, 1/(2*(self.n_arms-1)) if self.best is not None else 1/self.n_arms)
+            if self.best is not None:
                 weights[self.best] = 1/2
-            a_c = np.random.choice(self.n_arms, p=weights)
+            a_c = self.rng.choice(self.n_arms, p=weights)
 
         # Select opponent as the tightest one with a_c
-        score_vs_ac = upper_bounds[:, a_c]
+        score_vs_ac = self.bounds.get_upper_column(a_c)
         opponent_candidates = np.flatnonzero(score_vs_ac == score_vs_ac.max())
         if opponent_candidates.size == 1:
             a_d = opponent_candidates[0]
         else:
             # Remove a_c as the opponent, if neccessary
             opponent_candidates = np.delete(opponent_candidates, np.where(opponent_candidates == a_c))
-            a_d = np.random.choice(opponent_candidates)
+            a_d = self.rng.choice(opponent_candidates)
+
+        # Increase time step
+        self.time += 1
+
+        return (a_c, a_d)
+
+    def supports_replicates(self):
+        """
+        (Override) RUCB supports batched runs.
+        """
+        return True
+
+    def reset_replicates(self, n_replicates):
+        """
+        (Override) Fully resets the agent for a batched run.
+
+        Args:
+            n_replicates: number of independent repeats.
+        """
+        super().reset_replicates(n_replicates)
+        self.time = 1
+        self.replicate_best = np.full(n_replicates, -1) # -1 stands for "no best candidate"
+
+    def step_replicates(self):
+        """
+        (Override) Batched version of "step", following the same policy on every replicate.
+
+        Returns:
+            Pair of arrays (i,j) with the pair that the policy decided to pull on each replicate.
+        """
+        indices = self.replicate_indices
+        outcomes = self.replicate_outcomes
+        diagonal = np.arange(self.n_arms)
+
+        # Compute Upper Bounds for confidence intervals (UCB)
+        total_matches = outcomes + np.transpose(outcomes, (0, 2, 1))
+        mask = (total_matches != 0)
+        conf_interval_sizes = np.sqrt(self.alpha * np.where(mask, np.divide(np.log(self.time), total_matches, where=mask), 1))
+        upper_bounds = np.where(mask, np.divide(outcomes, total_matches, where=mask), 1) + conf_interval_sizes
+        upper_bounds[:, diagonal, diagonal] = 1/2
+
+        # Select candidates to condorcet winner
+        cond_winners = (upper_bounds >= 1/2).all(axis=2)
+        n_cond_winners = np.count_nonzero(cond_winners, axis=1)
+
+        # Select benchmarking arm. Several candidates: the best one with probability 1/2,
+        # otherwise uniformly among the rest. Without a best one, uniformly among all arms.
+        best = self.replicate_best
+        has_best = best >= 0
+        uniform = self.rng.integers(0, self.n_arms, size=indices.size)
+        others = self.rng.integers(0, self.n_arms-1, size=indices.size)
+        others += (others >= best)
+        weighted = np.where(has_best, np.where(self.rng.random(indices.size) < 1/2, best, others), uniform)
+        a_c = np.where(n_cond_winners == 1, np.argmax(cond_winners, axis=1), np.where(n_cond_winners == 0, uniform, weighted))
+
+        # Update best candidates
+        self.replicate_best = np.where(n_cond_winners == 1, a_c, np.where((n_cond_winners == 0) & (best != a_c), -1, best))
+
+        # Select opponent as the tightest one with a_c, removing a_c if there are more candidates
+        score_vs_ac = upper_bounds[indices, :, a_c]
+        opponent_candidates = score_vs_ac == score_vs_ac.max(axis=1, keepdims=True)
+        several = np.count_nonzero(opponent_candidates, axis=1) > 1
+        opponent_candidates[indices[several], a_c[several]] = False
+        a_d = random_argmax(np.where(opponent_candidates, 0, -1), self.rng)
 
         # Increase time step
         self.time += 1
 
         return (a_c, a_d)
-        
-        
+
+
     def reset(self):
         """
         Fully resets the agent
@@ -88,6 +153,12 @@ class RUCBAgent(DBAgent):
         self.time = 1
         self.best = None
 
+    def supports_sparse_outcomes(self):
+        """
+        (Override) The upper bounds of RUCB cover every pair, so a sparse store would not save memory.
+        """
+        return False
+
     def get_name(self):
         """
         String representation of the agent.
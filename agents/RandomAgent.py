@@ -2,7 +2,7 @@
 Random DB Agent to serve as baseline.
 """
 
-import random
+import numpy as np
 from .DBAgent import DBAgent
 
 class RandomAgent(DBAgent):
@@ -17,10 +17,26 @@ class RandomAgent(DBAgent):
         Returns:
             Pair of indices (i,j) that the policy decided to pull.
         """
-        arm1 = random.randint(0, self.n_arms-1)
-        arm2 = random.randint(0, self.n_arms-1)
+        arm1 = self.rng.integers(self.n_arms)
+        arm2 = self.rng.integers(self.n_arms)
         return arm1, arm2
 
+    def supports_replicates(self):
+        """
+        (Override) The random policy supports batched runs.
+        """
+        return True
+
+    def step_replicates(self):
+        """
+        (Override) Returns the pairs that should be matched on every replicate, randomly.
+
+        Returns:
+            Pair of arrays (i,j) with the pair that the policy decided to pull on each replicate.
+        """
+        arms = self.rng.integers(0, self.n_arms, size=(2, self.n_replicates))
+        return arms[0], arms[1]
+
     def get_name(self):
         """
         String representation of the agent.
@@ -10,7 +10,7 @@ class SparringAgent(DBAgent):
     Implements a dueling bandit agent following the sparring policy.
     """ 
 
-    def __init__(self, n_arms, mab1, mab2):
+    def __init__(self, n_arms, mab1, mab2, rng=None):
         """
         Initializes Sparring agent. This agent allows a MAB to be used
         with dueling bandits.
@@ -19,8 +19,9 @@ class SparringAgent(DBAgent):
             n_arms: number of arms.
             mab1: MAB in charge of arm 1. Must be of type MABAgent.
             mab2: MAB in charge of arm 2. Must be of type MABAgent.
+            rng: Seed or numpy Generator for every random decision of the agent. Shared with both MABs.
         """
-        super(SparringAgent,self).__init__(n_arms)
+        super(SparringAgent,self).__init__(n_arms, rng)
         
         self.mab1 = mab1
         self.mab2 = mab2
@@ -28,6 +29,21 @@ class SparringAgent(DBAgent):
         self.mab1.reset()
         self.mab2.reset()
 
+        # The MABs draw from the same random stream as the agent.
+        self.set_rng(self.rng)
+
+    def set_rng(self, rng):
+        """
+        (Override) Replaces the random generator of the agent, sharing it (and its pool of random numbers) with both MABs.
+
+        Args:
+            rng: Seed, SeedSequence or numpy Generator.
+        """
+        super().set_rng(rng)
+        for mab in (self.mab1, self.mab2):
+            mab.set_rng(self.rng)
+            mab.pool = self.pool
+
     def reward(self, n_arm_1, n_arm_2, one_wins):
         """
         Updates the knowledge given the reward. Since it's a Dueling Bandit, the reward
@@ -53,6 +69,44 @@ class SparringAgent(DBAgent):
 
         return self.mab1.step(), self.mab2.step()
 
+    def supports_replicates(self):
+        """
+        (Override) Sparring supports batched runs if both its MABs do.
+        """
+        return self.mab1.supports_replicates() and self.mab2.supports_replicates()
+
+    def reset_replicates(self, n_replicates):
+        """
+        (Override) Fully resets the agent and its MABs for a batched run.
+
+        Args:
+            n_replicates: number of independent repeats.
+        """
+        super().reset_replicates(n_replicates)
+        self.mab1.reset_replicates(n_replicates)
+        self.mab2.reset_replicates(n_replicates)
+
+    def reward_replicates(self, n_arms_1, n_arms_2, one_wins):
+        """
+        (Override) Batched version of "reward".
+
+        Args:
+            n_arms_1: array with the first arm of the pulled pair on each replicate.
+            n_arms_2: array with the second arm of the pulled pair on each replicate.
+            one_wins: boolean array indicating whether the first arm won on each replicate.
+        """
+        self.mab1.reward_replicates(n_arms_1, one_wins.astype(int))
+        self.mab2.reward_replicates(n_arms_2, (~one_wins).astype(int))
+
+    def step_replicates(self):
+        """
+        (Override) Batched version of "step".
+
+        Returns:
+            Pair of arrays (i,j) with the pair that the policy decided to pull on each replicate.
+        """
+        return self.mab1.step_replicates(), self.mab2.step_replicates()
+
         
     def reset(self):
         """
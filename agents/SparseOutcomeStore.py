@@ -0,0 +1,81 @@
+"""
+Sparse storage of pairwise outcomes, for experiments with many arms where
+agents only compare a small fraction of the pairs.
+"""
+
+import numpy as np
+from .OutcomeStore import OutcomeStore
+
+class SparseOutcomeStore(OutcomeStore):
+    """
+    Keeps the outcomes in a dict from (winner, loser) to count, so memory grows
+    with the number of distinct pairs compared instead of K^2.
+    """
+
+    def __init__(self, n_arms):
+        """
+        Initializes the store.
+
+        Args:
+            n_arms: number of arms.
+        """
+        super(SparseOutcomeStore,self).__init__(n_arms)
+        self.wins = {} # (i,j) -> # of times i beat j. Pairs never won are missing.
+
+    def add(self, winner, loser):
+        """
+        (Override) Records the result of a duel.
+
+        Args:
+            winner: arm that won the duel.
+            loser: arm that lost the duel.
+        """
+        super().add(winner, loser)
+        key = (int(winner), int(loser))
+        self.wins[key] = self.wins.get(key, 0) + 1
+
+    def get_wins(self, winner, loser):
+        """
+        (Override) Returns the number of times an arm beat another.
+
+        Args:
+            winner: first arm.
+            loser: second arm.
+
+        Returns:
+            number of recorded wins of winner against loser.
+        """
+        return self.wins.get((int(winner), int(loser)), 0)
+
+    def get_coo(self):
+        """
+        Returns the recorded outcomes in coordinate format.
+
+        Returns:
+            tuple (winners, losers, counts) of arrays with one entry per pair with wins.
+        """
+        if not self.wins:
+            return np.zeros(0, dtype=int), np.zeros(0, dtype=int), np.zeros(0, dtype=np.int32)
+        pairs = np.array(list(self.wins.keys()))
+        counts = np.fromiter(self.wins.values(), dtype=np.int32, count=len(self.wins))
+        return pairs[:, 0], pairs[:, 1], counts
+
+    def get_matrix(self):
+        """
+        (Override) Materializes the outcomes as a dense matrix. Changes to
+        the matrix are not stored, and later duels are not reflected on it.
+
+        Returns:
+            (n_arms, n_arms) array, in position (i,j), # of times i beat j.
+        """
+        matrix = np.zeros((self.n_arms, self.n_arms), dtype=np.int32)
+        winners, losers, counts = self.get_coo()
+        matrix[winners, losers] = counts
+        return matrix
+
+    def reset(self):
+        """
+        (Override) Forgets every recorded duel.
+        """
+        super().reset()
+        self.wins = {}
@@ -12,7 +12,7 @@ class ThompsonBetaAgent(MABAgent):
     Implements a multi armed bandit agent following the Thompson Sampling (with beta prior) policy.
     """    
 
-    def __init__(self, n_arms, alpha_zero=1, beta_zero=1, failure_thres=1/2, optimism=None):
+    def __init__(self, n_arms, alpha_zero=1, beta_zero=1, failure_thres=1/2, optimism=None, rng=None):
         """
         Initializes the agent. 
 
@@ -24,13 +24,14 @@ class ThompsonBetaAgent(MABAgent):
                 below the threshold will counted as a failure. This exists mainly to support
                 testing this agent in non-bernoulli environments (don't set this value for bernoulli environments).
             optimism: starting estimation for the value of every arm.
+            rng: Seed or numpy Generator for every random decision of the agent.
         """
-        super(ThompsonBetaAgent,self).__init__(n_arms, optimism)
+        super(ThompsonBetaAgent,self).__init__(n_arms, optimism, rng)
         self.alpha = alpha_zero
         self.beta = beta_zero
         self.failure_thres = failure_thres
-        self.successes = np.zeros(n_arms)
-        self.failures = np.zeros(n_arms)
+        self.successes = np.zeros(n_arms, dtype=np.int32)
+        self.failures = np.zeros(n_arms, dtype=np.int32)
 
     def step(self):
         """
@@ -39,11 +40,8 @@ class ThompsonBetaAgent(MABAgent):
         Returns:
             Index i of the arm that the policy decided to pull.
         """
-        estimated_params = np.empty(self.n_arms) # Holds the estimated parameters
-
-        # Estimate the parameters
-        for arm in range(self.n_arms):
-            estimated_params[arm] = np.random.beta(self.successes[arm] + self.alpha, self.failures[arm] + self.beta)
+        # Estimate the parameters of every arm at once
+        estimated_params = self.rng.beta(self.successes + self.alpha, self.failures + self.beta)
 
         # Return the arm which was estimated to be best.
         return np.argmax(estimated_params)
@@ -69,9 +67,55 @@ class ThompsonBetaAgent(MABAgent):
         Fully resets the agent
         """
         super().reset()
-        self.successes = np.zeros(self.n_arms)
-        self.failures = np.zeros(self.n_arms)
+        self.successes.fill(0)
+        self.failures.fill(0)
         
+    def get_state_names(self):
+        """
+        (Override) Adds the success and failure counters to the state.
+        """
+        return super().get_state_names() + ['successes', 'failures']
+
+    def supports_replicates(self):
+        """
+        (Override) Thompson Sampling with beta prior supports batched runs.
+        """
+        return True
+
+    def reset_replicates(self, n_replicates):
+        """
+        (Override) Fully resets the agent for a batched run.
+
+        Args:
+            n_replicates: number of independent repeats.
+        """
+        super().reset_replicates(n_replicates)
+        self.replicate_successes = np.zeros((n_replicates, self.n_arms), dtype=np.int32)
+        self.replicate_failures = np.zeros((n_replicates, self.n_arms), dtype=np.int32)
+
+    def step_replicates(self):
+        """
+        (Override) Batched version of "step".
+
+        Returns:
+            array with the arm that the policy decided to pull on each replicate.
+        """
+        estimated_params = self.rng.beta(self.replicate_successes + self.alpha, self.replicate_failures + self.beta)
+        return np.argmax(estimated_params, axis=1)
+
+    def reward_replicates(self, n_arms, rewards):
+        """
+        (Override) Batched version of "reward".
+
+        Args:
+            n_arms: array with the pulled arm on each replicate.
+            rewards: array with the numerical reward obtained on each replicate.
+        """
+        super().reward_replicates(n_arms, rewards)
+        failed = rewards < self.failure_thres
+        self.replicate_failures[self.replicate_indices, n_arms] += failed
+        self.replicate_successes[self.replicate_indices, n_arms] += ~failed
+
     def get_name(self):
         """
         String representation of the agent.
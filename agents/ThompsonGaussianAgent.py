@@ -6,7 +6,6 @@ As presented in https://papers.nips.cc/paper/4321-an-empirical-evaluation-of-tho
 """
 
 import numpy as np
-from scipy.stats import invgamma
 from .MABAgent import MABAgent
 
 class ThompsonGaussianAgent(MABAgent):
@@ -14,7 +13,7 @@ class ThompsonGaussianAgent(MABAgent):
     Implements a multi armed bandit agent following the Thompson Sampling (with Gaussian prior) policy.
     """   
 
-    def __init__(self, n_arms, avg_zero=0, k_zero=1, sigma_zero=1, nu_zero=1, optimism=None):
+    def __init__(self, n_arms, avg_zero=0, k_zero=1, sigma_zero=1, nu_zero=1, optimism=None, rng=None):
         """
         Initializes thompson sampling agent with gaussian prior.
         More on the statistical background (bayesian conjugate for normal distribution with
@@ -30,8 +29,9 @@ class ThompsonGaussianAgent(MABAgent):
             sigma_zero: is the starting prediction for the degrees of freedom of the variance.
             nu_zero: is the scale for the degree of the variance parameter.
             optimism: starting estimation for the value of each arm.
+            rng: Seed or numpy Generator for every random decision of the agent.
         """
-        super(ThompsonGaussianAgent,self).__init__(n_arms, optimism)
+        super(ThompsonGaussianAgent,self).__init__(n_arms, optimism, rng)
         self.avg_zero = avg_zero
         self.k_zero = k_zero
         self.sigma_zero = sigma_zero
@@ -50,35 +50,28 @@ class ThompsonGaussianAgent(MABAgent):
             Index i of the arm that the policy decided to pull.
         """
 
-        estimated_params = np.empty(self.n_arms) # Holds the estimated parameters
+        # Get number of data points of every arm:
+        n = self.times_explored
+        explored = (n != 0)
 
-        # Estimate the parameters
-        for arm in range(self.n_arms):
-            # Get number of data points:
-            n = self.times_explored[arm]
+        # Store the average and sum of squared differences for each arm.
+        # Guess the values if no data points have been seen yet.
+        average = np.where(explored, self.averages, self.avg_zero)
+        ssd = np.where(explored, self.square_sum - (average ** 2) / np.maximum(n, 1), 0)
 
-            # Store the average and sum of squared differences for this arm.
-            if n != 0:
-                average = self.averages[arm]
-                ssd = self.square_sum[arm] - 1/n * (average ** 2)
-            else:
-                # Guess the values if no data points have been seen yet.
-                average = self.avg_zero
-                ssd = 0
+        # Compute the parameters combining prior and data
+        k_n = self.k_zero + n
+        avg_n = (self.k_zero/k_n) * self.avg_zero + (n/k_n)*average
+        nu_n = self.nu_zero + n
 
-            # Compute the parameters combining prior and data
-            k_n = self.k_zero + n
-            avg_n = (self.k_zero/k_n) * self.avg_zero + (n/k_n)*average
-            nu_n = self.nu_zero + n
+        # Obtain intermediate value used in posterior parameters
+        aux = self.nu_zero * self.sigma_zero + ssd + (n*self.k_zero*(self.avg_zero - average)**2)/(k_n)
 
-            # Obtain intermediate value used in posterior parameters
-            aux = self.nu_zero * self.sigma_zero + ssd + (n*self.k_zero*(self.avg_zero - average)**2)/(k_n)
+        # Draw the variances from the variance posterior (inverse gamma, i.e. the inverse of a gamma)
+        variance = (aux/2) / self.rng.gamma(nu_n/2)
 
-            # Draw the variance from the variance posterior (inverse gamma)
-            variance = (aux/2) * invgamma.rvs(nu_n/2)
-
-            # Draw the mean from the mean posterior (normal)
-            estimated_params[arm] = np.random.normal(loc=avg_n, scale=np.sqrt(variance)/k_n)
+        # Draw the means from the mean posterior (normal)
+        estimated_params = self.rng.normal(loc=avg_n, scale=np.sqrt(variance)/k_n)
 
         # Return the arm which was estimated to be best.
         return np.argmax(estimated_params)
@@ -101,8 +94,13 @@ class ThompsonGaussianAgent(MABAgent):
         Fully resets the agent
         """
         super().reset()
-        self.square_avg = np.zeros(self.n_arms)
-        
+        self.square_sum.fill(0)
+
+    def get_state_names(self):
+        """
+        (Override) Adds the sums of squares to the state.
+        """
+        return super().get_state_names() + ['square_sum']
 
     def get_name(self):
         """
@@ -9,7 +9,7 @@ class UCBAgent(MABAgent):
     """
     Implements a multi armed bandit agent following the UCB policy.
     """  
-    def __init__(self, n_arms, exploration_rate = 1, optimism=None):
+    def __init__(self, n_arms, exploration_rate = 1, optimism=None, rng=None):
         """
         Initializes the agent.
 
@@ -18,8 +18,9 @@ class UCBAgent(MABAgent):
             exploration_rate: weight that is given to uncertainty vs average 
                 The higher the rate, the more exploration occurs.
             optimism: starting estimation for the value of each arm.
+            rng: Seed or numpy Generator for every random decision of the agent.
         """
-        super(UCBAgent,self).__init__(n_arms, optimism)
+        super(UCBAgent,self).__init__(n_arms, optimism, rng)
         self.exprate = exploration_rate
         self.optimism = optimism
 
@@ -32,21 +33,41 @@ class UCBAgent(MABAgent):
         """
 
         # Compute "time", that is the order of this step
-        time = sum(self.times_explored) + 1
+        time = self.total_explored + 1
 
-        ucb_scores = np.zeros(self.n_arms)
+        # If an arm hasnt been explored, explore (lowest index first).
+        unexplored = np.flatnonzero(self.times_explored == 0)
+        if unexplored.size > 0:
+            return unexplored[0]
 
-        for i in range(self.n_arms):
-            # If arm hasnt been explored, explore.
-            if self.times_explored[i] == 0:
-                return i
-            else:
-                # Compute ucb score
-                ucb_scores[i] = self.averages[i]  + self.exprate * np.sqrt(np.log(time)/self.times_explored[i])
+        # Compute ucb scores
+        ucb_scores = self.averages + self.exprate * np.sqrt(np.log(time)/self.times_explored)
 
         # Pull the best score
         return np.argmax(ucb_scores)
 
+    def supports_replicates(self):
+        """
+        (Override) UCB supports batched runs.
+        """
+        return True
+
+    def step_replicates(self):
+        """
+        (Override) Batched version of "step".
+
+        Returns:
+            array with the arm that the policy decided to pull on each replicate.
+        """
+        times_explored = self.replicate_times_explored
+        time = self.replicate_total_explored[:, np.newaxis] + 1
+        unexplored = (times_explored == 0)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ucb_scores = self.replicate_averages + self.exprate * np.sqrt(np.log(time)/times_explored)
+
+        # Unexplored arms are pulled first, lowest index first.
+        return np.where(unexplored.any(axis=1), np.argmax(unexplored, axis=1), np.argmax(ucb_scores, axis=1))
 
     def get_name(self):
         """
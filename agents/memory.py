@@ -0,0 +1,41 @@
+"""
+Helpers to estimate the memory held by agents.
+"""
+
+import sys
+import types
+import numpy as np
+
+def get_memory_footprint(obj, seen=None):
+    """
+    Estimates the memory held by an object: its own size plus, recursively, the
+    size of its attributes and of the items of its containers. Numpy arrays count
+    their data only if they own it (views count their header), objects reachable
+    several times are counted once, and classes, functions and random generators
+    are not followed.
+
+    Args:
+        obj: object to measure.
+        seen: set with the ids of the objects already counted.
+
+    Returns:
+        estimated number of bytes.
+    """
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    # For arrays that own their data, getsizeof includes it.
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (np.ndarray, np.random.Generator, type, types.FunctionType, types.MethodType)):
+        return size
+
+    if isinstance(obj, dict):
+        size += sum(get_memory_footprint(key, seen) + get_memory_footprint(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(get_memory_footprint(item, seen) for item in obj)
+    elif hasattr(obj, '__dict__'):
+        size += get_memory_footprint(vars(obj), seen)
+    return size
@@ -3,7 +3,9 @@ Simulation for arm separation values.
 """
 
 from simulation.Simulation import Simulation
-from simulation.Experiment import Experiment
+from simulation.Sweep import Sweep
+from simulation.Spec import Spec
+from simulation.Param import Param
 from agents.MultiSBMAgent import MultiSBMAgent
 from agents.ThompsonBetaAgent import ThompsonBetaAgent
 from agents.IFAgent import IFAgent
@@ -13,7 +15,7 @@ from agents.SparringAgent import SparringAgent
 from agents.DTSAgent import DTSAgent
 from agents.RUCBAgent import RUCBAgent
 from agents.CCBAgent import CCBAgent
-from environments import GaussianEnvironment
+from environments.GaussianEnvironment import GaussianEnvironment
 import numpy as np
 
 N_EPOCHS = 50000
@@ -22,23 +24,21 @@ n_arms = 2
 SEPARATION = [100, 10, 1, 0.1, 0.01, 0.001]
 sim = Simulation(f"change arm separation, {N_EPOCHS} epochs, {n_arms} arms")
 
-for separation in SEPARATION:
-    agents = []
-    agents.append(IFAgent(n_arms, N_EPOCHS))
-    agents.append(BTMAgent(n_arms, N_EPOCHS))
-    agents.append(DoublerAgent(n_arms, ThompsonBetaAgent(n_arms)))
-    agents.append(MultiSBMAgent(n_arms, ThompsonBetaAgent, [n_arms]))
-    agents.append(SparringAgent(n_arms, ThompsonBetaAgent(n_arms), ThompsonBetaAgent(n_arms)))
-    agents.append(DTSAgent(n_arms))
-    agents.append(RUCBAgent(n_arms))
-    agents.append(CCBAgent(n_arms))
+agents = [Spec(IFAgent, n_arms, N_EPOCHS),
+          Spec(BTMAgent, n_arms, N_EPOCHS),
+          Spec(DoublerAgent, n_arms, Spec(ThompsonBetaAgent, n_arms)),
+          Spec(MultiSBMAgent, n_arms, ThompsonBetaAgent, [n_arms], compact=True),
+          Spec(SparringAgent, n_arms, Spec(ThompsonBetaAgent, n_arms), Spec(ThompsonBetaAgent, n_arms)),
+          Spec(DTSAgent, n_arms),
+          Spec(RUCBAgent, n_arms),
+          Spec(CCBAgent, n_arms)]
 
-    environ = GaussianEnvironment.GaussianEnvironment(n_arms, values = np.linspace(1, (n_arms-1)*separation, num=n_arms))
-
-    n_repeats = N_REPEATS
-    sim.add_experiment(Experiment(f"s = {separation}", agents, environ, N_EPOCHS, n_repeats, plot_position=separation))
+points = [{'separation': separation, 'values': np.linspace(1, (n_arms-1)*separation, num=n_arms)} for separation in SEPARATION]
+sim.add_sweep(Sweep("s = {separation}", points, agents, Spec(GaussianEnvironment, n_arms, values = Param('values')),
+                    N_EPOCHS, N_REPEATS, plot_position=Param('separation')))
+sim.reuse_results()
 
 sim.run_all(save = True)
 
 sim.plot_aggregated_metrics('copeland_regret', padding=[0.0005, 0.0005], scale='log')
-sim.save_all_metrics('copeland_regret', scale = 'log')
\ No newline at end of file
+sim.save_all_metrics('copeland_regret', scale = 'log')
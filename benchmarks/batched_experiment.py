@@ -0,0 +1,67 @@
+"""
+Benchmark of batched experiments (Experiment(batched=True)) against the
+repeat by repeat loop, on scaled-down versions of the n_arms.py and
+transitivity.py configurations.
+
+Run from the root of the project with: python -m benchmarks.batched_experiment
+"""
+
+import time
+from simulation.Experiment import Experiment
+from agents.MultiSBMAgent import MultiSBMAgent
+from agents.ThompsonBetaAgent import ThompsonBetaAgent
+from agents.IFAgent import IFAgent
+from agents.BTMAgent import BTMAgent
+from agents.DoublerAgent import DoublerAgent
+from agents.SparringAgent import SparringAgent
+from agents.DTSAgent import DTSAgent
+from agents.RUCBAgent import RUCBAgent
+from agents.CCBAgent import CCBAgent
+from agents.RandomAgent import RandomAgent
+from environments import GaussianEnvironment, NoisyGaussianEnvironment
+
+N_EPOCHS = 1000
+N_REPEATS = 50
+
+def make_agents(n_arms, n_epochs):
+    """
+    Returns the agent list used by n_arms.py and transitivity.py.
+    """
+    return [RandomAgent(n_arms),
+            IFAgent(n_arms, n_epochs),
+            BTMAgent(n_arms, n_epochs),
+            DoublerAgent(n_arms, ThompsonBetaAgent(n_arms)),
+            MultiSBMAgent(n_arms, ThompsonBetaAgent, [n_arms], compact=True),
+            SparringAgent(n_arms, ThompsonBetaAgent(n_arms), ThompsonBetaAgent(n_arms)),
+            DTSAgent(n_arms),
+            RUCBAgent(n_arms),
+            CCBAgent(n_arms)]
+
+def time_agent(agent, environment, batched):
+    """
+    Returns the seconds needed to run a single agent experiment.
+    """
+    experiment = Experiment("benchmark", [agent], environment, N_EPOCHS, N_REPEATS, batched=batched)
+    start = time.perf_counter()
+    experiment.run()
+    return time.perf_counter() - start
+
+def benchmark(title, n_arms, make_environment):
+    """
+    Prints serial and batched timings for each agent of a configuration.
+    """
+    print(f"\n{title}: {n_arms} arms, {N_REPEATS} repeats x {N_EPOCHS} epochs")
+    print(f"{'agent':<50}{'serial (s)':>12}{'batched (s)':>12}{'speedup':>10}")
+    total_serial, total_batched = 0, 0
+    for serial_agent, batched_agent in zip(make_agents(n_arms, N_EPOCHS), make_agents(n_arms, N_EPOCHS)):
+        serial = time_agent(serial_agent, make_environment(), False)
+        batched = time_agent(batched_agent, make_environment(), True)
+        total_serial += serial
+        total_batched += batched
+        print(f"{serial_agent.get_name()[:48]:<50}{serial:>12.2f}{batched:>12.2f}{serial/batched:>10.1f}")
+    print(f"{'total':<50}{total_serial:>12.2f}{total_batched:>12.2f}{total_serial/total_batched:>10.1f}")
+
+if __name__ == "__main__":
+    for n_arms in [10, 50]:
+        benchmark("n_arms.py", n_arms, lambda: GaussianEnvironment.GaussianEnvironment(n_arms, values = list(range(n_arms))))
+    benchmark("transitivity.py", 10, lambda: NoisyGaussianEnvironment.NoisyGaussianEnvironment(10, d = 2))
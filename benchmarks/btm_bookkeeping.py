@@ -0,0 +1,121 @@
+"""
+Benchmark of the BTM agent, which keeps running totals of its counters, a mask of
+the working set and heaps of probabilities, against the former agent, which summed
+the whole counter matrices on every step and reward.
+
+For each number of arms, both agents face their own copy of the same gaussian
+environment with the same seeds, so they must make exactly the same decisions.
+The script checks that they do, reports the time per epoch of each agent, and
+exits with an error code if the decisions of any configuration differ.
+
+Run from the root of the project with: python -m benchmarks.btm_bookkeeping
+"""
+
+import sys
+import time
+import numpy as np
+from agents.DBAgent import DBAgent
+from agents.BTMAgent import BTMAgent
+from environments.GaussianEnvironment import GaussianEnvironment
+
+EPOCHS_PER_ARM = 100 # Enough for the working set to shrink
+SEEDS = [0, 1, 2]
+
+class FormerBTMAgent(DBAgent):
+    """
+    Former BTMAgent, kept as a reference.
+    """
+
+    def __init__(self, n_arms, horizon, gamma=1, rng=None):
+        super(FormerBTMAgent,self).__init__(n_arms, rng)
+        self.horizon = horizon
+        self.gamma = gamma
+        self.delta = 1/(2*n_arms*horizon)
+        self.working_set = list(range(n_arms))
+        self.wins = np.zeros((self.n_arms, self.n_arms))
+        self.comparisons = np.zeros((self.n_arms, self.n_arms))
+        self.probs = np.array([1/2] * self.n_arms)
+        self.steps = 0
+
+    def reward(self, n_arm_1, n_arm_2, one_wins):
+        if len(self.working_set) == 1 or self.steps >= self.horizon:
+            return
+        if one_wins:
+            self.wins[n_arm_1][n_arm_2] += 1
+        self.comparisons[n_arm_1][n_arm_2] += 1
+        wins_per_arm = np.sum(self.wins,axis=1)
+        comps_per_arm = np.sum(self.comparisons,axis=1)
+        self.probs[n_arm_1] = wins_per_arm[n_arm_1] / comps_per_arm[n_arm_1]
+        self.steps += 1
+        comp_min = np.min(comps_per_arm[self.working_set])
+        conf = self.gamma**2 * np.sqrt((1/comp_min) * np.log(1/self.delta)) if comp_min != 0 else 1
+        if(self.gamma > 1):
+            conf *= 3
+        worst_prob = np.min(self.probs[self.working_set])
+        best_prob = np.max(self.probs[self.working_set])
+        if worst_prob + conf <= best_prob - conf:
+            losers_all = np.flatnonzero(self.probs == worst_prob)
+            losers = losers_all[np.in1d(losers_all, self.working_set, assume_unique=True)]
+            loser = self.rng.choice(losers)
+            self.wins[:,loser] = np.zeros(self.n_arms)
+            self.comparisons[:,loser] = np.zeros(self.n_arms)
+            self.working_set.remove(loser)
+            for arm in range(self.n_arms):
+                if arm in self.working_set:
+                    wins_per_arm = np.sum(self.wins,axis=1)
+                    comps_per_arm = np.sum(self.comparisons,axis=1)
+                    with np.errstate(invalid='ignore'):
+                        self.probs[arm] = wins_per_arm[arm] / comps_per_arm[arm]
+                else:
+                    self.probs[arm] = 0
+
+    def step(self):
+        if len(self.working_set) == 1 or self.steps >= self.horizon:
+            best = np.argmax(self.probs)
+            return best, best
+        comps_per_arm = np.sum(self.comparisons,axis=1)
+        comps_min = np.min(comps_per_arm[self.working_set])
+        least_comps_all = np.flatnonzero(comps_per_arm == comps_min)
+        least_comps = least_comps_all[np.in1d(least_comps_all, self.working_set, assume_unique=True)]
+        arm1 = self.rng.choice(least_comps)
+        arm2 = self.rng.choice(self.working_set)
+        return arm1, arm2
+
+def run(agent, n_arms, n_epochs, seed):
+    """
+    Runs the agent for n_epochs epochs.
+
+    Returns:
+        list with the selected pairs and the seconds per epoch.
+    """
+    environment = GaussianEnvironment(n_arms, rng=seed)
+    pairs = []
+    start = time.perf_counter()
+    for _ in range(n_epochs):
+        arm1, arm2 = agent.step()
+        reward1, reward2 = environment.dueling_step(arm1, arm2)
+        agent.reward(arm1, arm2, reward1 > reward2)
+        pairs.append((int(arm1), int(arm2)))
+    return pairs, (time.perf_counter() - start) / n_epochs
+
+if __name__ == "__main__":
+    print(f"{'arms':>6}{'gamma':>7}{'former (us)':>13}{'new (us)':>10}{'speedup':>9}{'removed':>9}  decisions")
+    failures = 0
+    for n_arms in [10, 50, 200]:
+        for gamma in [1, 1.5]:
+            n_epochs = EPOCHS_PER_ARM * n_arms
+            former_time, new_time, identical = 0, 0, True
+            for seed in SEEDS:
+                former = FormerBTMAgent(n_arms, n_epochs, gamma, rng=100 + seed)
+                new = BTMAgent(n_arms, n_epochs, gamma, rng=100 + seed)
+                former_pairs, elapsed = run(former, n_arms, n_epochs, seed)
+                former_time += elapsed / len(SEEDS)
+                new_pairs, elapsed = run(new, n_arms, n_epochs, seed)
+                new_time += elapsed / len(SEEDS)
+                identical &= (former_pairs == new_pairs) and np.array_equal(former.probs, new.probs, equal_nan=True)
+            removed = n_arms - len(new.working_set)
+            print(f"{n_arms:>6}{gamma:>7}{former_time*1e6:>13.1f}{new_time*1e6:>10.1f}{former_time/new_time:>9.1f}{removed:>9}  {'identical' if identical else 'DIFFERENT'}")
+            failures += not identical
+
+    print(f"\n{failures} configurations with different decisions")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,131 @@
+"""
+Benchmark of the CCB agent, which keeps its best candidates and best opponents as
+boolean masks and checks its hypotheses with masked reductions, against the former
+agent, which kept them as Python sets and looped over them on every step.
+
+The former agent is kept drawing its random subsets and candidates from sorted
+sets instead of in set iteration order, and its scalar draws from the random pool
+of the agent, so that both agents must make exactly the same decisions. Both agents
+face their own copy of the same gaussian environment, and the time per epoch of
+each agent is reported. The script exits with an error code if the decisions for
+any number of arms differ.
+
+Run from the root of the project with: python -m benchmarks.ccb_hypotheses
+"""
+
+import sys
+import time
+import numpy as np
+from agents.DBAgent import DBAgent
+from agents.CCBAgent import CCBAgent
+from agents.ConfidenceBounds import ConfidenceBounds
+from environments.GaussianEnvironment import GaussianEnvironment
+
+N_EPOCHS = 3000
+SEEDS = [0, 1, 2]
+
+class FormerCCBAgent(DBAgent):
+    """
+    Former CCBAgent (drawing from sorted sets and the random pool), kept as a reference.
+    """
+
+    def __init__(self, n_arms, alpha=0.51, rng=None):
+        super(FormerCCBAgent,self).__init__(n_arms, rng)
+        self.alpha = alpha
+        self.best = set(range(n_arms))
+        self.best_opponents = [set() for _ in range(n_arms)]
+        self.copeland_winner_losses = n_arms
+        self.time = 1
+        self.bounds = ConfidenceBounds(n_arms, alpha, counts=('upper', 'lower'))
+
+    def step(self):
+        self.bounds.set_time(self.time)
+        cope_upper = self.bounds.get_count('upper') - 1
+        cope_lower = self.bounds.get_count('lower') - 1
+        cope_winners = np.flatnonzero(cope_upper == cope_upper.max())
+        for i in range(self.n_arms):
+            for j in self.best_opponents[i]:
+                if self.bounds.get_lower(i, j) > 0.5:
+                    self.best = set(range(self.n_arms))
+                    self.best_opponents = [set() for _ in range(self.n_arms)]
+                    self.copeland_winner_losses = self.n_arms
+        if self.best:
+            copy = set(self.best)
+            for i in copy:
+                if cope_upper[i] < cope_lower[i]:
+                    self.best.remove(i)
+                    if len(self.best_opponents[i]) != self.copeland_winner_losses + 1:
+                        self.best_opponents[i] = set(np.flatnonzero((self.bounds.get_upper_row(i) < 1/2)))
+        else:
+            self.best = set(range(self.n_arms))
+            self.best_opponents = [set() for _ in range(self.n_arms)]
+            self.copeland_winner_losses = self.n_arms
+        for i in cope_winners:
+            if cope_lower[i] == cope_upper[i]:
+                self.best.add(i)
+                self.best_opponents[i] = set()
+                self.copeland_winner_losses = self.n_arms - 1 - cope_upper[i]
+                for j in range(self.n_arms):
+                    if i == j:
+                        continue
+                    if len(self.best_opponents[j]) < self.copeland_winner_losses + 1:
+                        self.best_opponents[j] = set()
+                    elif len(self.best_opponents[j]) > self.copeland_winner_losses + 1:
+                        self.best_opponents[j] = set(self.rng.choice(sorted(self.best_opponents[j]), 
+                                                     size=self.copeland_winner_losses+1, replace=False))
+        self.time += 1
+        if self.pool.random() < 1/4:
+            pairs = [(i,j) for i in range(self.n_arms) for j in sorted(self.best_opponents[i]) if self.bounds.get_lower(i, j) <= 1/2 and self.bounds.get_upper(i, j) <= 1/2]
+            if pairs:
+                return pairs[self.rng.integers(0,len(pairs))]
+        if self.pool.random() < 2/3:
+            intersected = self.best.intersection(cope_winners)
+            if intersected:
+                cope_winners = np.array(sorted(intersected))
+        a_c = self.rng.choice(cope_winners)
+        score_vs_ac = self.bounds.get_upper_column(a_c)
+        if self.pool.random() < 1/2:
+            to_discard = set(range(self.n_arms)).difference(self.best_opponents[a_c])
+            score_vs_ac[list(to_discard)] = np.NINF
+        opponent_candidates = np.flatnonzero(score_vs_ac == score_vs_ac.max())
+        np.delete(opponent_candidates, np.where(self.bounds.get_lower_column(a_c)[opponent_candidates] > 0.5))
+        if opponent_candidates.size == 1:
+            a_d = opponent_candidates[0]
+        else:
+            opponent_candidates = np.delete(opponent_candidates, np.where(opponent_candidates == a_c))
+            a_d = self.rng.choice(opponent_candidates)
+        return (a_c, a_d)
+
+def run(agent, n_arms, seed):
+    """
+    Runs the agent for N_EPOCHS epochs.
+
+    Returns:
+        list with the selected pairs and the seconds per epoch.
+    """
+    environment = GaussianEnvironment(n_arms, rng=seed)
+    pairs = []
+    start = time.perf_counter()
+    for _ in range(N_EPOCHS):
+        arm1, arm2 = agent.step()
+        reward1, reward2 = environment.dueling_step(arm1, arm2)
+        agent.reward(arm1, arm2, reward1 > reward2)
+        pairs.append((int(arm1), int(arm2)))
+    return pairs, (time.perf_counter() - start) / N_EPOCHS
+
+if __name__ == "__main__":
+    print(f"{'arms':>6}{'former (us)':>13}{'new (us)':>10}{'speedup':>9}  decisions")
+    failures = 0
+    for n_arms in [10, 50, 200]:
+        former_time, new_time, identical = 0, 0, True
+        for seed in SEEDS:
+            former_pairs, elapsed = run(FormerCCBAgent(n_arms, rng=100 + seed), n_arms, seed)
+            former_time += elapsed / len(SEEDS)
+            new_pairs, elapsed = run(CCBAgent(n_arms, rng=100 + seed), n_arms, seed)
+            new_time += elapsed / len(SEEDS)
+            identical &= (former_pairs == new_pairs)
+        print(f"{n_arms:>6}{former_time*1e6:>13.1f}{new_time*1e6:>10.1f}{former_time/new_time:>9.1f}  {'identical' if identical else 'DIFFERENT'}")
+        failures += not identical
+
+    print(f"\n{failures} configurations with different decisions")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,98 @@
+"""
+Benchmark of the DTS agent step, which only draws the estimates it needs (and, for
+the choice of the first arm, only whether they are below 1/2), against the former
+step, which sampled the whole matrix of Beta estimates.
+
+For each number of arms, the agent is first trained against a gaussian environment
+so that the pruning phase has discarded some arms. Both steps are then timed from
+that state, and the distribution of the selected pairs is compared: the total
+variation distance between the empirical distributions of both steps should be
+as small as the one between two samples of the former step (noise column).
+
+Run from the root of the project with: python -m benchmarks.dts_sampling
+"""
+
+import time
+import numpy as np
+from collections import Counter
+from agents.DTSAgent import DTSAgent
+from environments.GaussianEnvironment import GaussianEnvironment
+
+N_TRAINING_EPOCHS = 2000
+N_TIMED_STEPS = 200
+N_DISTRIBUTION_STEPS = 20000
+
+def full_matrix_step(agent):
+    """
+    Former DTSAgent.step: samples the full matrix of estimates, keeps its upper
+    triangle and then samples the whole column of the first arm.
+    """
+    agent.bounds.set_time(agent.time)
+    scores = agent.bounds.get_count('strict_upper')
+    winners = (scores == scores.max())
+
+    thetas = np.triu(agent.rng.beta(agent.outcomes + agent.alpha, np.transpose(agent.outcomes) + agent.beta), 1)
+    thetas = thetas + (1-np.transpose(thetas))
+
+    scores = np.where(winners, np.count_nonzero(thetas > 1/2, axis=1), np.NINF)
+    arm1 = agent.rng.choice(np.flatnonzero(scores == scores.max()))
+
+    thetas[:, arm1] = agent.rng.beta(agent.outcomes[:,arm1] + agent.alpha, agent.outcomes[arm1,:] + agent.beta)
+    thetas[arm1, arm1] = 1/2
+
+    uncertain_pairs = np.where(agent.bounds.get_lower_column(arm1) <= 1/2, thetas[:, arm1], np.NINF)
+    arm2 = agent.rng.choice(np.flatnonzero(uncertain_pairs == uncertain_pairs.max()))
+
+    agent.time += 1
+    return arm1, arm2
+
+def train(n_arms):
+    """
+    Returns a DTS agent trained against a gaussian environment.
+    """
+    environment = GaussianEnvironment(n_arms, values = list(np.linspace(0, 1, n_arms)), rng=0)
+    agent = DTSAgent(n_arms, rng=1)
+    for _ in range(N_TRAINING_EPOCHS):
+        arm1, arm2 = agent.step()
+        reward1, reward2 = environment.dueling_step(arm1, arm2)
+        agent.reward(arm1, arm2, reward1 > reward2)
+    return agent
+
+def sample_pairs(agent, step, n_steps):
+    """
+    Calls a step function n_steps times from the same state of the agent.
+
+    Returns:
+        list with the selected pairs and the seconds per step.
+    """
+    time_step = agent.time
+    pairs = []
+    start = time.perf_counter()
+    for _ in range(n_steps):
+        agent.time = time_step
+        pairs.append(tuple(int(arm) for arm in step(agent)))
+    elapsed = (time.perf_counter() - start) / n_steps
+    agent.time = time_step
+    return pairs, elapsed
+
+def total_variation(pairs1, pairs2):
+    """
+    Returns the total variation distance between the empirical distributions of two lists of pairs.
+    """
+    counts1, counts2 = Counter(pairs1), Counter(pairs2)
+    return sum(abs(counts1[pair]/len(pairs1) - counts2[pair]/len(pairs2)) for pair in set(counts1) | set(counts2)) / 2
+
+if __name__ == "__main__":
+    print(f"{'arms':>6}{'full (ms)':>12}{'sparse (ms)':>14}{'speedup':>10}{'TV distance':>14}{'noise':>8}")
+    for n_arms in [10, 25, 50, 100, 200]:
+        agent = train(n_arms)
+        _, full = sample_pairs(agent, full_matrix_step, N_TIMED_STEPS)
+        _, sparse = sample_pairs(agent, DTSAgent.step, N_TIMED_STEPS)
+        distance, noise = "", ""
+        if n_arms <= 25:
+            full_pairs, _ = sample_pairs(agent, full_matrix_step, N_DISTRIBUTION_STEPS)
+            other_full_pairs, _ = sample_pairs(agent, full_matrix_step, N_DISTRIBUTION_STEPS)
+            sparse_pairs, _ = sample_pairs(agent, DTSAgent.step, N_DISTRIBUTION_STEPS)
+            distance = f"{total_variation(full_pairs, sparse_pairs):.3f}"
+            noise = f"{total_variation(full_pairs, other_full_pairs):.3f}"
+        print(f"{n_arms:>6}{full*1000:>12.3f}{sparse*1000:>14.3f}{full/sparse:>10.1f}{distance:>14}{noise:>8}")
@@ -0,0 +1,111 @@
+"""
+Benchmark of the IF agent, which keeps its candidates as an index vector, only
+counts the duels against the leader (O(K) memory) and evaluates every candidate at
+the end of a round in a single vectorized expression, against the former agent,
+which looped over the candidates, rebuilt them with sets and reset the whole
+(K, K) outcome matrix when the leader changed.
+
+The former agent is kept with two fixes, so that both agents must make exactly
+the same decisions: the candidates are kept in increasing order, and the new
+leader is removed from the candidates without discarding them (the former agent
+stopped after its first leader change). Both agents face their own copy of the
+same gaussian environment, and the time per epoch and memory of each agent are reported. The
+script exits with an error code if the decisions for any number of arms differ.
+
+Run from the root of the project with: python -m benchmarks.if_rounds
+"""
+
+import sys
+import time
+import numpy as np
+from agents.DBAgent import DBAgent
+from agents.IFAgent import IFAgent
+from environments.GaussianEnvironment import GaussianEnvironment
+
+EPOCHS_PER_ARM = 300 # Enough for the leader to change a few times
+SEEDS = [0, 1, 2]
+
+class FormerIFAgent(DBAgent):
+    """
+    Former IFAgent (with the fixes above), kept as a reference.
+    """
+
+    def __init__(self, n_arms, horizon, rng=None):
+        super(FormerIFAgent,self).__init__(n_arms, rng)
+        self.horizon = horizon
+        self.delta = 1/(horizon * (n_arms**2))
+        self.leader = 0
+        self.candidates = list(range(1, n_arms))
+        self.turn = 0
+
+    def reward(self, n_arm_1, n_arm_2, one_wins):
+        if not self.candidates:
+            return
+        super().reward(n_arm_1, n_arm_2, one_wins)
+        self.turn += 1
+        if self.turn < len(self.candidates):
+            return
+        soft_losers = []
+        hard_losers = []
+        winner = None
+        winner_odds = -1
+        for candidate in self.candidates:
+            prob = self.get_ratio(candidate, self.leader)
+            conf = np.sqrt(np.log(1/self.delta)/self.get_comparison_count(candidate, self.leader))
+            if prob + conf < 1/2:
+                hard_losers.append(candidate)
+            if prob < 1/2:
+                soft_losers.append(candidate)
+            if prob > winner_odds and prob - conf > 1/2:
+                winner = candidate
+                winner_odds = prob
+        self.candidates = sorted(set(self.candidates) - set(hard_losers))
+        if winner != None:
+            self.candidates = sorted(set(self.candidates) - set(soft_losers))
+            self.leader = winner
+            self.candidates.remove(winner)
+            self.outcome_store.reset()
+        self.turn = 0
+
+    def step(self):
+        if not self.candidates:
+            return self.leader, self.leader
+        return self.leader, self.candidates[self.turn]
+
+def run(agent, n_arms, n_epochs, seed):
+    """
+    Runs the agent for n_epochs epochs.
+
+    Returns:
+        list with the selected pairs and the seconds per epoch.
+    """
+    environment = GaussianEnvironment(n_arms, rng=seed)
+    pairs = []
+    start = time.perf_counter()
+    for _ in range(n_epochs):
+        arm1, arm2 = agent.step()
+        reward1, reward2 = environment.dueling_step(arm1, arm2)
+        agent.reward(arm1, arm2, reward1 > reward2)
+        pairs.append((int(arm1), int(arm2)))
+    return pairs, (time.perf_counter() - start) / n_epochs
+
+if __name__ == "__main__":
+    print(f"{'arms':>6}{'former (us)':>13}{'new (us)':>10}{'speedup':>9}{'former (MB)':>13}{'new (MB)':>10}{'leaders':>9}  decisions")
+    failures = 0
+    for n_arms in [10, 100, 1000]:
+        n_epochs = EPOCHS_PER_ARM * n_arms
+        former_time, new_time, identical, leaders = 0, 0, True, 0
+        for seed in SEEDS:
+            former = FormerIFAgent(n_arms, n_epochs)
+            new = IFAgent(n_arms, n_epochs)
+            former_pairs, elapsed = run(former, n_arms, n_epochs, seed)
+            former_time += elapsed / len(SEEDS)
+            new_pairs, elapsed = run(new, n_arms, n_epochs, seed)
+            new_time += elapsed / len(SEEDS)
+            identical &= (former_pairs == new_pairs)
+            leaders += len(set(pair[0] for pair in new_pairs))
+        print(f"{n_arms:>6}{former_time*1e6:>13.1f}{new_time*1e6:>10.1f}{former_time/new_time:>9.1f}{former.get_memory_footprint()/1e6:>13.2f}{new.get_memory_footprint()/1e6:>10.2f}{leaders/len(SEEDS):>9.1f}  {'identical' if identical else 'DIFFERENT'}")
+        failures += not identical
+
+    print(f"\n{failures} configurations with different decisions")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,103 @@
+"""
+Benchmark of the MAB agents steps that sample or score every arm in a single
+vectorized call (ThompsonBetaAgent, ThompsonGaussianAgent and UCBAgent) against
+the former steps, which looped over the arms.
+
+For each number of arms, the agent is first trained against an environment so that
+every arm has been explored. Both steps are then timed from that state.
+
+Run from the root of the project with: python -m benchmarks.mab_step
+"""
+
+import time
+import numpy as np
+from scipy.stats import invgamma
+from agents.ThompsonBetaAgent import ThompsonBetaAgent
+from agents.ThompsonGaussianAgent import ThompsonGaussianAgent
+from agents.UCBAgent import UCBAgent
+from environments.BernoulliEnvironment import BernoulliEnvironment
+from environments.GaussianEnvironment import GaussianEnvironment
+
+N_TRAINING_ROUNDS = 3
+N_TIMED_STEPS = 200
+
+def loop_thompson_beta_step(agent):
+    """
+    Former ThompsonBetaAgent.step: draws one Beta estimate per arm.
+    """
+    estimated_params = np.empty(agent.n_arms)
+    for arm in range(agent.n_arms):
+        estimated_params[arm] = agent.rng.beta(agent.successes[arm] + agent.alpha, agent.failures[arm] + agent.beta)
+    return np.argmax(estimated_params)
+
+def loop_thompson_gaussian_step(agent):
+    """
+    Former ThompsonGaussianAgent.step: draws the variance and then the mean of each arm.
+    """
+    estimated_params = np.empty(agent.n_arms)
+    for arm in range(agent.n_arms):
+        n = agent.times_explored[arm]
+        if n != 0:
+            average = agent.averages[arm]
+            ssd = agent.square_sum[arm] - 1/n * (average ** 2)
+        else:
+            average = agent.avg_zero
+            ssd = 0
+        k_n = agent.k_zero + n
+        avg_n = (agent.k_zero/k_n) * agent.avg_zero + (n/k_n)*average
+        nu_n = agent.nu_zero + n
+        aux = agent.nu_zero * agent.sigma_zero + ssd + (n*agent.k_zero*(agent.avg_zero - average)**2)/(k_n)
+        variance = (aux/2) * invgamma.rvs(nu_n/2, random_state=agent.rng)
+        estimated_params[arm] = agent.rng.normal(loc=avg_n, scale=np.sqrt(variance)/k_n)
+    return np.argmax(estimated_params)
+
+def loop_ucb_step(agent):
+    """
+    Former UCBAgent.step: sums the exploration counts and scores one arm at a time.
+    """
+    time_step = sum(agent.times_explored) + 1
+    ucb_scores = np.zeros(agent.n_arms)
+    for i in range(agent.n_arms):
+        if agent.times_explored[i] == 0:
+            return i
+        ucb_scores[i] = agent.averages[i] + agent.exprate * np.sqrt(np.log(time_step)/agent.times_explored[i])
+    return np.argmax(ucb_scores)
+
+# Agent class, former step and environment class of each benchmarked agent.
+AGENTS = [
+    (ThompsonBetaAgent, loop_thompson_beta_step, BernoulliEnvironment),
+    (ThompsonGaussianAgent, loop_thompson_gaussian_step, GaussianEnvironment),
+    (UCBAgent, loop_ucb_step, GaussianEnvironment),
+]
+
+def train(agent_class, environment_class, n_arms):
+    """
+    Returns an agent that has pulled every arm N_TRAINING_ROUNDS times.
+    """
+    environment = environment_class(n_arms, rng=0)
+    agent = agent_class(n_arms, rng=1)
+    for _ in range(N_TRAINING_ROUNDS):
+        for arm in range(n_arms):
+            agent.reward(arm, environment.step(arm))
+    return agent
+
+def steps_per_second(agent, step, n_steps):
+    """
+    Calls a step function n_steps times from the same state of the agent.
+
+    Returns:
+        the number of steps per second.
+    """
+    start = time.perf_counter()
+    for _ in range(n_steps):
+        step(agent)
+    return n_steps / (time.perf_counter() - start)
+
+if __name__ == "__main__":
+    print(f"{'agent':>24}{'arms':>6}{'loop (steps/s)':>16}{'vector (steps/s)':>18}{'speedup':>10}")
+    for agent_class, loop_step, environment_class in AGENTS:
+        for n_arms in [10, 100, 1000]:
+            agent = train(agent_class, environment_class, n_arms)
+            loop = steps_per_second(agent, loop_step, N_TIMED_STEPS)
+            vector = steps_per_second(agent, agent_class.step, N_TIMED_STEPS)
+            print(f"{agent_class.__name__:>24}{n_arms:>6}{loop:>16.0f}{vector:>18.0f}{vector/loop:>10.1f}")
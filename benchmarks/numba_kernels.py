@@ -0,0 +1,106 @@
+"""
+Parity checks and benchmark of the compiled kernels (simulation/kernels.py) against
+the agent and environment classes, for every supported pair.
+
+Kernels draw their random numbers from another generator, so runs are compared
+statistically: each pair is run with and without kernels, and for every metric
+and checkpoint epoch the difference of both means is divided by its standard error.
+Pairs whose largest z-score exceeds MAX_Z_SCORE are reported as failures, and the
+script exits with an error code if there is any.
+
+Run from the root of the project with: python -m benchmarks.numba_kernels
+"""
+
+import sys
+import time
+import numpy as np
+from simulation.Experiment import Experiment
+from simulation.Metrics import METRIC_NAMES
+from simulation import kernels
+from agents.UCBAgent import UCBAgent
+from agents.EpsilonGreedyAgent import EpsilonGreedyAgent
+from agents.ThompsonBetaAgent import ThompsonBetaAgent
+from agents.RandomAgent import RandomAgent
+from agents.RUCBAgent import RUCBAgent
+from agents.BTMAgent import BTMAgent
+from agents.IFAgent import IFAgent
+from environments.GaussianEnvironment import GaussianEnvironment
+from environments.NoisyGaussianEnvironment import NoisyGaussianEnvironment
+from environments.BernoulliEnvironment import BernoulliEnvironment
+from environments.CyclicRPSEnvironment import CyclicRPSEnvironment
+
+N_ARMS = 8
+N_EPOCHS = 400
+N_REPEATS = 300
+CHECKPOINTS = [9, 99, N_EPOCHS-1]
+MAX_Z_SCORE = 4.5
+
+AGENTS = {
+    'UCB': lambda: UCBAgent(N_ARMS),
+    'Epsilon-Greedy': lambda: EpsilonGreedyAgent(N_ARMS, epsilon=0.1),
+    'Thompson Beta': lambda: ThompsonBetaAgent(N_ARMS),
+    'Random': lambda: RandomAgent(N_ARMS),
+    'RUCB': lambda: RUCBAgent(N_ARMS),
+    'BTM': lambda: BTMAgent(N_ARMS, N_EPOCHS),
+    'IF': lambda: IFAgent(N_ARMS, N_EPOCHS),
+}
+
+ENVIRONMENTS = {
+    'Gaussian': lambda: GaussianEnvironment(N_ARMS),
+    'Noisy Gaussian': lambda: NoisyGaussianEnvironment(N_ARMS),
+    'Bernoulli': lambda: BernoulliEnvironment(N_ARMS),
+    'Cyclic RPS': lambda: CyclicRPSEnvironment(N_ARMS),
+}
+
+def run(make_agent, make_environment, use_kernels):
+    """
+    Runs a single agent experiment.
+
+    Returns:
+        Metrics object of the agent and the seconds needed.
+    """
+    experiment = Experiment("parity", [make_agent()], make_environment(), N_EPOCHS, N_REPEATS, seed=0, use_kernels=use_kernels)
+    start = time.perf_counter()
+    experiment.run()
+    return experiment.metrics[0], time.perf_counter() - start
+
+def max_z_score(metrics1, metrics2):
+    """
+    Returns the largest z-score of the difference of means over every metric and checkpoint.
+    """
+    means1, means2 = metrics1.get_metrics(), metrics2.get_metrics()
+    errors1, errors2 = metrics1.get_standard_errors(), metrics2.get_standard_errors()
+    largest = 0
+    for name in METRIC_NAMES:
+        difference = np.abs(means1[name][CHECKPOINTS] - means2[name][CHECKPOINTS])
+        error = np.sqrt(errors1[name][CHECKPOINTS]**2 + errors2[name][CHECKPOINTS]**2)
+        # Metrics without variance (e.g. deterministic rewards) must match exactly
+        z_scores = np.where(error > 0, difference / np.where(error > 0, error, 1), np.where(difference > 1e-9, np.inf, 0))
+        largest = max(largest, z_scores.max())
+    return largest
+
+if __name__ == "__main__":
+    if not kernels.NUMBA_AVAILABLE:
+        print("numba is not available, every experiment runs in pure Python.")
+        sys.exit(0)
+
+    # Compile every kernel before timing
+    for make_agent in AGENTS.values():
+        for make_environment in ENVIRONMENTS.values():
+            experiment = Experiment("warmup", [make_agent()], make_environment(), 2, 1, seed=0, use_kernels=True)
+            experiment.run()
+
+    print(f"{N_ARMS} arms, {N_REPEATS} repeats x {N_EPOCHS} epochs")
+    print(f"{'agent':<16}{'environment':<16}{'python (s)':>12}{'kernel (s)':>12}{'speedup':>10}{'max |z|':>10}")
+    failures = 0
+    for agent_name, make_agent in AGENTS.items():
+        for environment_name, make_environment in ENVIRONMENTS.items():
+            python_metrics, python_time = run(make_agent, make_environment, False)
+            kernel_metrics, kernel_time = run(make_agent, make_environment, True)
+            z_score = max_z_score(python_metrics, kernel_metrics)
+            status = "" if z_score <= MAX_Z_SCORE else "  FAIL"
+            failures += status != ""
+            print(f"{agent_name:<16}{environment_name:<16}{python_time:>12.2f}{kernel_time:>12.3f}{python_time/kernel_time:>10.1f}{z_score:>10.2f}{status}")
+
+    print(f"\n{failures} failures")
+    sys.exit(1 if failures else 0)
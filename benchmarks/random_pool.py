@@ -0,0 +1,48 @@
+"""
+Benchmark of scalar random draws taken from a RandomPool against scalar draws
+taken directly from a numpy Generator, both for the bare draws and for the
+per-step calls of the environments that use the pool.
+
+Run from the root of the project with: python -m benchmarks.random_pool
+"""
+
+import timeit
+import numpy as np
+from utils.RandomPool import RandomPool
+from environments.GaussianEnvironment import GaussianEnvironment
+from environments.BernoulliEnvironment import BernoulliEnvironment
+from environments.CyclicRPSEnvironment import CyclicRPSEnvironment
+
+N_DRAWS = 200000
+
+def nanoseconds(function):
+    """
+    Returns the nanoseconds per call of a function.
+    """
+    return timeit.timeit(function, number=N_DRAWS) / N_DRAWS * 1e9
+
+def direct_environment(environment):
+    """
+    Returns the environment with a pool that forwards every scalar draw to its generator,
+    i.e. how environments drew their per-step numbers before pools existed.
+    """
+    environment.pool = environment.rng
+    return environment
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    pool = RandomPool(np.random.default_rng(0))
+    rows = [
+        ("uniform", rng.random, pool.random),
+        ("standard normal", rng.standard_normal, pool.standard_normal),
+    ]
+    for name, make in [("Gaussian pull", lambda: GaussianEnvironment(10, rng=0)),
+                       ("Bernoulli pull", lambda: BernoulliEnvironment(10, rng=0))]:
+        rows.append((name, lambda environment=direct_environment(make()): environment.pull(3), lambda environment=make(): environment.pull(3)))
+    make = lambda: CyclicRPSEnvironment(10, rng=0)
+    rows.append(("Cyclic dueling step", lambda environment=direct_environment(make()): environment.dueling_step(3, 4), lambda environment=make(): environment.dueling_step(3, 4)))
+
+    print(f"{'draw':>22}{'generator (ns)':>16}{'pool (ns)':>11}{'speedup':>9}")
+    for name, direct, pooled in rows:
+        direct_time, pooled_time = nanoseconds(direct), nanoseconds(pooled)
+        print(f"{name:>22}{direct_time:>16.0f}{pooled_time:>11.0f}{direct_time/pooled_time:>9.1f}")
@@ -0,0 +1,304 @@
+"""
+Benchmark suite measuring the throughput of every agent (step + reward), of the
+dueling step of every environment, of Metrics.update_dueling and of scaled-down
+end-to-end experiments, for several numbers of arms.
+
+Every measurement runs a fixed, seeded workload, which is repeated N_ROUNDS times
+keeping the fastest round. Results (operations per second) are stored as JSON
+together with the machine and library versions, and can be compared against a
+previously saved run: measurements slower than the baseline by more than the
+tolerance are flagged as regressions, and the script exits with an error code.
+
+Run from the root of the project with:
+    python -m benchmarks.suite --output results.json
+    python -m benchmarks.suite --output new.json --baseline results.json
+See python -m benchmarks.suite --help for the remaining options.
+"""
+
+import argparse
+import datetime
+import json
+import platform
+import subprocess
+import sys
+import time
+import numpy as np
+import scipy
+
+from simulation.Experiment import Experiment
+from simulation.Metrics import Metrics
+from simulation import kernels
+from agents.RandomAgent import RandomAgent
+from agents.IFAgent import IFAgent
+from agents.BTMAgent import BTMAgent
+from agents.DoublerAgent import DoublerAgent
+from agents.MultiSBMAgent import MultiSBMAgent
+from agents.SparringAgent import SparringAgent
+from agents.DTSAgent import DTSAgent
+from agents.RUCBAgent import RUCBAgent
+from agents.CCBAgent import CCBAgent
+from agents.UCBAgent import UCBAgent
+from agents.EpsilonGreedyAgent import EpsilonGreedyAgent
+from agents.EXP3Agent import EXP3Agent
+from agents.ThompsonBetaAgent import ThompsonBetaAgent
+from agents.ThompsonGaussianAgent import ThompsonGaussianAgent
+from environments.GaussianEnvironment import GaussianEnvironment
+from environments.NoisyGaussianEnvironment import NoisyGaussianEnvironment
+from environments.BernoulliEnvironment import BernoulliEnvironment
+from environments.CyclicRPSEnvironment import CyclicRPSEnvironment
+
+ARM_VALUES = [2, 10, 100, 1000]
+# Timed operations per round for each number of arms (larger ones are slower).
+N_OPERATIONS = {2: 2000, 10: 2000, 100: 500, 1000: 100}
+N_ROUNDS = 3
+TOLERANCE = 0.25
+
+# Horizon given to the agents that need one, longer than any timed workload.
+HORIZON = 100000
+
+DB_AGENTS = {
+    'Random': lambda n_arms: RandomAgent(n_arms, rng=0),
+    'IF': lambda n_arms: IFAgent(n_arms, HORIZON, rng=0),
+    'BTM': lambda n_arms: BTMAgent(n_arms, HORIZON, rng=0),
+    'Doubler': lambda n_arms: DoublerAgent(n_arms, ThompsonBetaAgent(n_arms), rng=0),
+    'MultiSBM': lambda n_arms: MultiSBMAgent(n_arms, ThompsonBetaAgent, [n_arms], compact=True, rng=0),
+    'Sparring': lambda n_arms: SparringAgent(n_arms, ThompsonBetaAgent(n_arms), ThompsonBetaAgent(n_arms), rng=0),
+    'DTS': lambda n_arms: DTSAgent(n_arms, rng=0),
+    'RUCB': lambda n_arms: RUCBAgent(n_arms, rng=0),
+    'CCB': lambda n_arms: CCBAgent(n_arms, rng=0),
+}
+
+MAB_AGENTS = {
+    'UCB': lambda n_arms: UCBAgent(n_arms, rng=0),
+    'EpsilonGreedy': lambda n_arms: EpsilonGreedyAgent(n_arms, rng=0),
+    'EXP3': lambda n_arms: EXP3Agent(n_arms, rng=0),
+    'ThompsonBeta': lambda n_arms: ThompsonBetaAgent(n_arms, rng=0),
+    'ThompsonGaussian': lambda n_arms: ThompsonGaussianAgent(n_arms, rng=0),
+}
+
+ENVIRONMENTS = {
+    'Gaussian': lambda n_arms: GaussianEnvironment(n_arms, rng=0),
+    'NoisyGaussian': lambda n_arms: NoisyGaussianEnvironment(n_arms, rng=0),
+    'Bernoulli': lambda n_arms: BernoulliEnvironment(n_arms, rng=0),
+    'CyclicRPS': lambda n_arms: CyclicRPSEnvironment(n_arms, rng=0),
+}
+
+def best_rate(run, n_operations, setup=None):
+    """
+    Runs a workload N_ROUNDS times.
+
+    Args:
+        run: function performing n_operations operations. It is called once per round.
+        n_operations: number of operations performed by each call.
+        setup: optional function called before each round, not timed, e.g. to reset
+            the state so that every round runs the same workload.
+
+    Returns:
+        operations per second of the fastest round.
+    """
+    best = np.inf
+    for _ in range(N_ROUNDS):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    return n_operations / best
+
+def reset_agent(agent):
+    """
+    Resets an agent and its random stream, so that every round makes the same decisions.
+    """
+    agent.set_rng(0)
+    agent.reset()
+
+def benchmark_db_agent(make_agent, n_arms):
+    """
+    Steps per second of a DB agent (step + reward). Duels are decided with fixed arm
+    values in [0, 1], so that agents converge as they would in an experiment.
+    """
+    agent = make_agent(n_arms)
+    values = np.linspace(0, 1, n_arms)
+    n_steps = N_OPERATIONS[n_arms]
+    draws = np.random.default_rng(1).random(n_steps)
+
+    def run():
+        for i in range(n_steps):
+            arm1, arm2 = agent.step()
+            agent.reward(arm1, arm2, draws[i] < 1/2 + (values[arm1] - values[arm2]) / 2)
+
+    return best_rate(run, n_steps, lambda: reset_agent(agent))
+
+def benchmark_mab_agent(make_agent, n_arms):
+    """
+    Steps per second of a MAB agent (step + reward), with gaussian rewards.
+    """
+    agent = make_agent(n_arms)
+    values = np.linspace(0, 1, n_arms)
+    n_steps = N_OPERATIONS[n_arms]
+    noise = np.random.default_rng(1).standard_normal(n_steps)
+
+    def run():
+        for i in range(n_steps):
+            arm = agent.step()
+            agent.reward(arm, values[arm] + noise[i])
+
+    return best_rate(run, n_steps, lambda: reset_agent(agent))
+
+def benchmark_environment(make_environment, n_arms):
+    """
+    Dueling steps per second of an environment, on random pairs.
+    """
+    environment = make_environment(n_arms)
+    environment.reset()
+    n_steps = N_OPERATIONS[n_arms] * 10
+    arms = np.random.default_rng(1).integers(0, n_arms, size=(2, n_steps)).tolist()
+
+    def run():
+        for arm1, arm2 in zip(*arms):
+            environment.dueling_step(arm1, arm2)
+
+    return best_rate(run, n_steps)
+
+def benchmark_metrics(n_arms):
+    """
+    Calls per second of Metrics.update_dueling (not deferred), on random pairs.
+    """
+    environment = GaussianEnvironment(n_arms, rng=0)
+    environment.reset()
+    optimal_arm, optimal_value = environment.get_optimal(), environment.get_optimal_value()
+    n_steps = N_OPERATIONS[n_arms] * 10
+    rng = np.random.default_rng(1)
+    arms = rng.integers(0, n_arms, size=(2, n_steps)).tolist()
+    rewards = rng.standard_normal((2, n_steps)).tolist()
+
+    def run():
+        metrics = Metrics(n_steps)
+        for i in range(n_steps):
+            metrics.update_dueling(i, environment, arms[0][i], arms[1][i], rewards[0][i], rewards[1][i], optimal_arm, optimal_value)
+
+    return best_rate(run, n_steps)
+
+def benchmark_experiment(batched, n_arms=10, n_epochs=500, n_repeats=4):
+    """
+    Epochs per second (summed over every agent and repeat) of a scaled-down version of
+    the n_arms.py experiment, run serially.
+    """
+    agents = [RandomAgent(n_arms),
+              IFAgent(n_arms, n_epochs),
+              BTMAgent(n_arms, n_epochs),
+              DoublerAgent(n_arms, ThompsonBetaAgent(n_arms)),
+              MultiSBMAgent(n_arms, ThompsonBetaAgent, [n_arms], compact=True),
+              SparringAgent(n_arms, ThompsonBetaAgent(n_arms), ThompsonBetaAgent(n_arms)),
+              DTSAgent(n_arms),
+              RUCBAgent(n_arms),
+              CCBAgent(n_arms)]
+
+    def run():
+        experiment = Experiment("benchmark", agents, GaussianEnvironment(n_arms), n_epochs, n_repeats, batched=batched, seed=0)
+        experiment.run()
+
+    return best_rate(run, len(agents) * n_repeats * n_epochs)
+
+def get_commit():
+    """
+    Returns the current git commit, if any.
+    """
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_suite(arm_values, groups):
+    """
+    Runs the selected benchmarks, printing each result as soon as it is known.
+
+    Args:
+        arm_values: numbers of arms of the agent, environment and metrics benchmarks.
+        groups: names of the benchmark groups to run ('agents', 'environments', 'metrics', 'experiments').
+
+    Returns:
+        dictionary {benchmark name: operations per second}.
+    """
+    benchmarks = []
+    for n_arms in arm_values:
+        if 'agents' in groups:
+            benchmarks += [(f"agent/{name}/K={n_arms}", lambda make=make, n_arms=n_arms: benchmark_db_agent(make, n_arms)) for name, make in DB_AGENTS.items()]
+            benchmarks += [(f"agent/{name}/K={n_arms}", lambda make=make, n_arms=n_arms: benchmark_mab_agent(make, n_arms)) for name, make in MAB_AGENTS.items()]
+        if 'environments' in groups:
+            benchmarks += [(f"environment/{name}/K={n_arms}", lambda make=make, n_arms=n_arms: benchmark_environment(make, n_arms)) for name, make in ENVIRONMENTS.items()]
+        if 'metrics' in groups:
+            benchmarks.append((f"metrics/update_dueling/K={n_arms}", lambda n_arms=n_arms: benchmark_metrics(n_arms)))
+    if 'experiments' in groups:
+        benchmarks.append(("experiment/serial/K=10", lambda: benchmark_experiment(False)))
+        benchmarks.append(("experiment/batched/K=10", lambda: benchmark_experiment(True)))
+
+    results = {}
+    for name, benchmark in benchmarks:
+        results[name] = benchmark()
+        print(f"{name:<45}{results[name]:>14.1f} /s", flush=True)
+    return results
+
+def compare(results, baseline, tolerance):
+    """
+    Prints the ratio of every result to its baseline, flagging the regressions.
+
+    Args:
+        results: dictionary {benchmark name: operations per second}.
+        baseline: dictionary with the same format, from a previous run.
+        tolerance: relative slowdown allowed before flagging a regression.
+
+    Returns:
+        list with the names of the regressed benchmarks.
+    """
+    regressions = []
+    print(f"\n{'benchmark':<45}{'baseline /s':>14}{'current /s':>14}{'ratio':>8}")
+    for name in sorted(set(results) & set(baseline)):
+        ratio = results[name] / baseline[name]
+        flag = ""
+        if ratio < 1 - tolerance:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        elif ratio > 1 + tolerance:
+            flag = "  faster"
+        print(f"{name:<45}{baseline[name]:>14.1f}{results[name]:>14.1f}{ratio:>8.2f}{flag}")
+    missing = set(baseline) - set(results)
+    if missing:
+        print(f"\n{len(missing)} benchmarks of the baseline were not run")
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Throughput benchmarks of agents, environments, metrics and experiments.")
+    parser.add_argument("--output", help="JSON file where the results are stored.")
+    parser.add_argument("--baseline", help="JSON file of a previous run to compare against.")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE, help="Relative slowdown flagged as a regression.")
+    parser.add_argument("--arms", type=int, nargs="+", default=ARM_VALUES, choices=ARM_VALUES, help="Numbers of arms to benchmark.")
+    parser.add_argument("--groups", nargs="+", default=['agents', 'environments', 'metrics', 'experiments'],
+                        choices=['agents', 'environments', 'metrics', 'experiments'], help="Benchmark groups to run.")
+    args = parser.parse_args()
+
+    results = run_suite(args.arms, args.groups)
+    report = {
+        'metadata': {
+            'date': datetime.datetime.now().isoformat(timespec='seconds'),
+            'commit': get_commit(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'scipy': scipy.__version__,
+            'numba': kernels.NUMBA_AVAILABLE,
+            'machine': platform.platform(),
+            'processor': platform.processor(),
+            'rounds': N_ROUNDS,
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline['results'], args.tolerance)
+        print(f"\n{len(regressions)} regressions")
+        sys.exit(1 if regressions else 0)
@@ -10,14 +10,27 @@ class BernoulliEnvironment(Environment):
     Implements bernoulli-distributed arm environment.
     """
 
-    def __init__(self, n_arms):
+    def __init__(self, n_arms, rng = None):
         """
         Initializes the environment.
 
         Args:
             n_arms: number of arms.
+            rng: Seed or numpy Generator for every random draw of the environment.
         """
-        super(BernoulliEnvironment, self).__init__(n_arms, np.random.random)
+        super(BernoulliEnvironment, self).__init__(n_arms, rng=rng)
+
+    def sample_values(self, n_values):
+        """
+        Draws the success probability of each arm.
+
+        Args:
+            n_values: Nº of values to draw.
+
+        Returns:
+            array of values drawn uniformly from [0, 1).
+        """
+        return self.rng.random(n_values)
 
     def pull(self, n_arm):
         """
@@ -30,7 +43,33 @@ class BernoulliEnvironment(Environment):
             numerical reward obtained.
         """
         value = self.arms[n_arm]
-        return int(np.random.random() < value)
+        return int(self.pool.random() < value)
+
+    def pull_batch(self, arms):
+        """
+        Pulls many arms at once with a bernoulli distribution with mean given by arm value.
+
+        Args:
+            arms: array of arm indices to be pulled.
+
+        Returns:
+            array with the reward obtained by each pull.
+        """
+        values = self.arms[arms]
+        return (self.rng.random(values.shape) < values).astype(int)
+
+    def replicate_pull(self, arms):
+        """
+        Pulls one arm on each replicate with a bernoulli distribution with mean given by arm value.
+
+        Args:
+            arms: array with the arm pulled on each replicate.
+
+        Returns:
+            array with the reward obtained on each replicate.
+        """
+        values = self.replicates['arms'][self.replicate_indices, arms]
+        return (self.rng.random(values.shape) < values).astype(int)
 
     def get_probability_dueling(self, arm1, arm2):
         """
@@ -53,6 +92,20 @@ class BernoulliEnvironment(Environment):
         p2 = self.arms[arm2]
         return p1*(1-p2) + (p1*p2 + (1-p1)*(1-p2))/2
 
+    def compute_preference_matrix(self):
+        """
+        Computes the probability that each arm beats each other arm, applying the
+        formula of get_probability_dueling to the whole grid of pairs at once.
+
+        Returns:
+            matrix whose entry [i,j] is the probability that arm i beats arm j.
+        """
+        if np.any(self.probabilities_dueling < 0):
+            p1 = self.arms[:, np.newaxis]
+            p2 = self.arms[np.newaxis, :]
+            self.set_preference_matrix(p1*(1-p2) + (p1*p2 + (1-p1)*(1-p2))/2)
+        return np.array(self.probabilities_dueling, copy=True)
+
     def get_name(self):
         """
         String representation of the environment.
@@ -6,7 +6,6 @@ Only meaningful upon pairwise comparisons (behaves the same as GaussianEnvironme
 
 import numpy as np
 from .Environment import Environment
-from random import random
 
 class CyclicRPSEnvironment(Environment):
     """
@@ -17,7 +16,9 @@ class CyclicRPSEnvironment(Environment):
     cyclic distribution.
     """
 
-    def __init__(self, n_arms, value_generator = np.random.normal, values = None, winner_prob=2/3, std=0):
+    replicate_attributes = Environment.replicate_attributes + ('probabilities',)
+
+    def __init__(self, n_arms, value_generator = None, values = None, winner_prob=2/3, std=0, rng = None):
         """
         Initializes the environment.
 
@@ -28,30 +29,14 @@ class CyclicRPSEnvironment(Environment):
             values: Actual arm values. If given, value_generator is unused.
             variance: Random noise from gaussian(0,std) is applied to every probability, then clipped
                 to either [1/2,1] or [0,1/2] depending on whether it's the winner or the loser.
+            rng: Seed or numpy Generator for every random draw of the environment.
         """
-        super(CyclicRPSEnvironment,self).__init__(n_arms, value_generator, values)
-        self.probabilities = np.zeros((n_arms, n_arms)) # Entry [i,j] is probability that i beats j
+        super(CyclicRPSEnvironment,self).__init__(n_arms, value_generator, values, rng)
         self.winner_prob = winner_prob
         self.std = std
 
         # Initialize the distribution table
-        for arm1 in range(n_arms):
-            for arm2 in range(arm1+1):
-                if arm1 == arm2:
-                    self.probabilities[arm1,arm2] = 1/2
-                    self.probabilities[arm2,arm1] = 1/2
-                else:
-                    # Compute the probability of winning
-                    prob = np.clip(winner_prob + np.random.normal(loc=0, scale=std),1/2,1)
-                    # These are the two win conditions, if any is met, arm1 wins.
-                    win1 = ((arm1 - arm2) % self.n_arms) < self.n_arms/2
-                    win2 = (((arm1 - arm2) % self.n_arms) == self.n_arms/2 and arm1 < arm2)
-                    if win1 or win2:
-                        self.probabilities[arm1, arm2] = prob
-                        self.probabilities[arm2, arm1] = 1-prob
-                    else:
-                        self.probabilities[arm1, arm2] = 1-prob
-                        self.probabilities[arm2, arm1] = prob
+        self.probabilities = self.generate_probabilities() # Entry [i,j] is probability that i beats j
 
         # Update the copeland scores
         self.copeland_scores = np.count_nonzero(self.probabilities > 1/2, axis=1)/(self.n_arms-1)
@@ -76,12 +61,52 @@ class CyclicRPSEnvironment(Environment):
         self.pulls[n_arm2] += 1
         self.steps += 1
 
-        if random() < self.probabilities[n_arm1, n_arm2]:
+        if self.pool.random() < self.probabilities[n_arm1, n_arm2]:
             # First wins
             return (1, 0)
 
         return (0, 1)
 
+    def dueling_step_batch(self, arms1, arms2):
+        """
+        Batched version of "dueling_step": compares many pairs of arms at once
+        with cyclic probability distribution.
+
+        Args:
+            arms1: array with the first arm of each pair.
+            arms2: array with the second arm of each pair.
+
+        Returns:
+            Tuple containing the arrays of rewards of each arm, being 1 for
+            the winner and 0 for the loser.
+        """
+        arms1 = np.asarray(arms1, dtype=int)
+        arms2 = np.asarray(arms2, dtype=int)
+        np.add.at(self.pulls, arms1, 1)
+        np.add.at(self.pulls, arms2, 1)
+        self.steps += arms1.size
+        first_wins = (self.rng.random(arms1.size) < self.probabilities[arms1, arms2]).astype(int)
+        return (first_wins, 1 - first_wins)
+
+    def replicate_dueling_step(self, arms1, arms2):
+        """
+        Batched version of "dueling_step": compares one pair on each replicate
+        with cyclic probability distribution.
+
+        Args:
+            arms1: array with the first arm of the pair on each replicate.
+            arms2: array with the second arm of the pair on each replicate.
+
+        Returns:
+            Tuple containing the arrays of rewards of each arm, being 1 for
+            the winner and 0 for the loser.
+        """
+        indices = self.replicate_indices
+        self.replicate_pulls[indices, arms1] += 1
+        self.replicate_pulls[indices, arms2] += 1
+        first_wins = (self.rng.random(indices.size) < self.replicates['probabilities'][indices, arms1, arms2]).astype(int)
+        return (first_wins, 1 - first_wins)
+
     def reset(self):
         """
         Resets environment internals
@@ -89,28 +114,45 @@ class CyclicRPSEnvironment(Environment):
         super().reset()
 
         # Initialize the distribution table
-        for arm1 in range(self.n_arms):
-            for arm2 in range(arm1+1):
-                if arm1 == arm2:
-                    self.probabilities[arm1,arm2] = 1/2
-                    self.probabilities[arm2,arm1] = 1/2
-                else:
-                    # Compute the probability of winning
-                    prob = np.clip(self.winner_prob + np.random.normal(loc=0, scale=self.std),1/2,1)
-                    # These are the two win conditions, if any is met, arm1 wins.
-                    win1 = ((arm1 - arm2) % self.n_arms) < self.n_arms/2
-                    win2 = (((arm1 - arm2) % self.n_arms) == self.n_arms/2 and arm1 < arm2)
-                    if win1 or win2:
-                        self.probabilities[arm1, arm2] = prob
-                        self.probabilities[arm2, arm1] = 1-prob
-                    else:
-                        self.probabilities[arm1, arm2] = 1-prob
-                        self.probabilities[arm2, arm1] = prob
+        self.probabilities = self.generate_probabilities()
 
         # Update the copeland scores
         self.copeland_scores = np.count_nonzero(self.probabilities > 1/2, axis=1)/(self.n_arms-1)
         
 
+    def generate_probabilities(self):
+        """
+        Samples the cyclic distribution table. Every pair (arm1, arm2) with arm2 < arm1
+        gets a winning probability, drawn in row-major order of the lower triangle.
+
+        Returns:
+            matrix whose entry [i,j] is the probability that arm i beats arm j.
+        """
+        arms1, arms2 = np.tril_indices(self.n_arms, k=-1)
+        # Compute the probability of winning
+        probs = np.clip(self.winner_prob + self.rng.normal(loc=0, scale=self.std, size=arms1.size), 1/2, 1)
+        # These are the two win conditions, if any is met, arm1 wins.
+        win1 = ((arms1 - arms2) % self.n_arms) < self.n_arms/2
+        win2 = (((arms1 - arms2) % self.n_arms) == self.n_arms/2) & (arms1 < arms2)
+        probs = np.where(win1 | win2, probs, 1 - probs)
+
+        probabilities = np.full((self.n_arms, self.n_arms), 1/2)
+        probabilities[arms1, arms2] = probs
+        probabilities[arms2, arms1] = 1 - probs
+        return probabilities
+
+    def compute_preference_matrix(self):
+        """
+        Computes the probability that each arm beats each other arm, which is
+        the sampled distribution table itself.
+
+        Returns:
+            matrix whose entry [i,j] is the probability that arm i beats arm j.
+        """
+        if np.any(self.probabilities_dueling < 0):
+            self.set_preference_matrix(self.probabilities)
+        return np.array(self.probabilities_dueling, copy=True)
+
     def get_probability_dueling(self, arm1, arm2):
         """
         Receives two arms and returns the probability that arm1 >= arm2.
@@ -4,42 +4,88 @@ Can be overriden to support custom implementations.
 """
 
 import numpy as np
+from utils.RandomPool import RandomPool
+from utils.Configurable import Configurable
+from .RegretTable import RegretTable
 
-class Environment():
+class Environment(Configurable):
     """Implements abstract Environment w/ constant output"""
 
-    def __init__(self, n_arms, value_generator = np.random.normal, values = None):
+    # Attributes that fully describe a sampled environment. Batched experiments
+    # stack them along a leading "replicate" axis (see reset_replicates).
+    replicate_attributes = ('arms', 'copeland_scores', 'copeland_regrets', 'probabilities_dueling')
+
+    def __init__(self, n_arms, value_generator = None, values = None, rng = None):
         """
         Initializes the environment.
 
         Args:
             n_arms: Number of arms
-            value_generator: Function for each arm hidden value (true reward)
+            value_generator: Function for each arm hidden value (true reward). If not given,
+                values are drawn from the environment generator (see sample_values).
             values: Arm values. If given, value_generator is ignored.
+            rng: Seed or numpy Generator for every random draw of the environment.
         """
         self.value_generator = value_generator
+        self.n_arms = n_arms
+        self.rng = np.random.default_rng(rng)
+        self.pool = RandomPool(self.rng) # Scalar draws of hot loops, taken from self.rng
         if values is None:
-            self.arms = np.array([value_generator() for i in range(n_arms)])
+            self.arms = self.generate_values(n_arms)
         else:
             if len(values) > n_arms:
                 values = values[:n_arms]
             elif len(values) < n_arms:
-                values += [value_generator() for i in range(n_arms - len(values))]
+                values = list(values) + list(self.generate_values(n_arms - len(values)))
             self.arms = np.array(values, dtype=float)
 
-        self.n_arms = n_arms
-        self.pulls = np.zeros(n_arms) # Individual pull values
+        self.pulls = np.zeros(n_arms, dtype=np.int32) # Individual pull counts
         self.steps = 0 # Total Steps
         self.probabilities_dueling = np.full((n_arms, n_arms), -1.0) # Cache for pairwise probabilities
         self.copeland_regrets = np.full(n_arms, np.NINF) # Cache for copeland regrets
+        self.regret_table = None # Built on demand after each reset, see get_regret_table
 
         # Copeland score of each arm. This measures how many other arms
         # it beats, normalized so that the Condorcet Winner (if any) has score 1.
-        self.copeland_scores = np.zeros(n_arms)
-        aux = np.array(self.arms, copy=True)
-        for i in range(n_arms):
-            self.copeland_scores[np.argmax(aux)] = (n_arms-i-1) / (n_arms-1)
-            aux[np.argmax(aux)] = np.NINF
+        self.copeland_scores = self.compute_copeland_scores()
+
+    def set_rng(self, rng):
+        """
+        Replaces the random generator of the environment, e.g. with an independent
+        stream for each repeat.
+
+        Args:
+            rng: Seed, SeedSequence or numpy Generator.
+        """
+        self.rng = np.random.default_rng(rng)
+        self.pool = RandomPool(self.rng)
+
+    def sample_values(self, n_values):
+        """
+        Draws arm values from the environment generator. Override in subclasses to
+        change the default distribution of the arm values.
+
+        Args:
+            n_values: Nº of values to draw.
+
+        Returns:
+            array of values drawn from a standard normal distribution.
+        """
+        return self.rng.standard_normal(n_values)
+
+    def generate_values(self, n_values):
+        """
+        Draws arm values with value_generator if given, or with sample_values otherwise.
+
+        Args:
+            n_values: Nº of values to draw.
+
+        Returns:
+            array of arm values.
+        """
+        if self.value_generator is None:
+            return self.sample_values(n_values)
+        return np.array([self.value_generator() for i in range(n_values)], dtype=float)
 
     def pull(self, n_arm):
         """
@@ -89,11 +135,62 @@ class Environment():
         self.steps += 1
         return (self.pull(n_arm1), self.pull(n_arm2))
 
+    def pull_batch(self, arms):
+        """
+        Pulls many arms at once and returns their rewards. Override in subclasses
+        to match "pull", drawing all the noise with a single random call.
+
+        Args:
+            arms: array of arm indices to be pulled.
+
+        Returns:
+            array with the reward obtained by each pull.
+        """
+        return self.arms[arms]
+
+    def step_batch(self, arms):
+        """
+        Batched version of "step": returns rewards for many arm pulls,
+        updating internal values.
+
+        Args:
+            arms: array of arm indices to be pulled.
+
+        Returns:
+            array with the reward obtained by each pull.
+        """
+        arms = np.asarray(arms, dtype=int)
+        np.add.at(self.pulls, arms, 1)
+        self.steps += arms.size
+        return self.pull_batch(arms)
+
+    def dueling_step_batch(self, arms1, arms2):
+        """
+        Batched version of "dueling_step": returns rewards for many pairs of arms,
+        updating internal values. As in "dueling_step", dueling bandits should
+        only see the result of each comparison.
+
+        Args:
+            arms1: array with the first arm of each pair.
+            arms2: array with the second arm of each pair.
+
+        Returns:
+            Tuple containing the arrays of rewards of each arm of the pairs.
+        """
+        arms1 = np.asarray(arms1, dtype=int)
+        arms2 = np.asarray(arms2, dtype=int)
+        np.add.at(self.pulls, arms1, 1)
+        np.add.at(self.pulls, arms2, 1)
+        self.steps += arms1.size
+        # Both arms of every pair are pulled together, so that noise is drawn only once
+        rewards = self.pull_batch(np.concatenate((arms1, arms2)))
+        return (rewards[:arms1.size], rewards[arms1.size:])
+
     def soft_reset(self):
         """
         Only resets metrics but environment is kept the same.
         """
-        self.pulls = np.zeros(self.n_arms)
+        self.pulls.fill(0)
         self.steps = 0
         
     def reset(self):
@@ -101,14 +198,110 @@ class Environment():
         Resets environment internals.
         """
         self.soft_reset()
-        self.arms = np.array([self.value_generator() for i in range(self.n_arms)])
-        self.copeland_scores = np.zeros(self.n_arms)
-        self.probabilities_dueling = np.full((self.n_arms, self.n_arms),-1.0)
-        self.copeland_regrets = np.full(self.n_arms, np.NINF)
-        aux = np.array(self.arms, copy=True)
-        for i in range(self.n_arms):
-            self.copeland_scores[np.argmax(aux)] = (self.n_arms-i-1) / (self.n_arms-1)
-            aux[np.argmax(aux)] = np.NINF
+        self.arms = self.generate_values(self.n_arms)
+        self.probabilities_dueling.fill(-1.0)
+        self.copeland_regrets.fill(np.NINF)
+        self.regret_table = None
+        self.copeland_scores = self.compute_copeland_scores()
+
+    def compute_copeland_scores(self):
+        """
+        Computes the copeland score of each arm for transitive environments, where
+        an arm beats every arm with lower value. Ties are broken by arm index.
+
+        Returns:
+            array with the copeland score of each arm.
+        """
+        # Stable sort, so that among equal values the lowest index ranks first
+        order = np.argsort(-self.arms, kind='stable')
+        copeland_scores = np.empty(self.n_arms)
+        copeland_scores[order] = np.arange(self.n_arms - 1, -1, -1) / (self.n_arms - 1)
+        return copeland_scores
+
+    def reset_replicates(self, n_replicates, seeds = None):
+        """
+        Samples n_replicates independent environments, exactly as if reset was
+        called once per repeat, and stores them stacked along a leading replicate
+        axis so that every repeat can be advanced at once.
+
+        Args:
+            n_replicates: number of independent environments to sample.
+            seeds: Optional list with the random stream used to sample each replicate (see set_rng).
+        """
+        states = {name: [] for name in self.replicate_attributes}
+        optimal_arms = np.zeros(n_replicates, dtype=int)
+        optimal_values = np.zeros(n_replicates)
+
+        for replicate in range(n_replicates):
+            if seeds is not None:
+                self.set_rng(seeds[replicate])
+            self.reset()
+            # Building the regret table fills the copeland regret and probability caches.
+            table = self.get_regret_table()
+            for name in self.replicate_attributes:
+                states[name].append(np.array(getattr(self, name), copy=True))
+            optimal_arms[replicate] = table.optimal_arm
+            optimal_values[replicate] = table.optimal_value
+
+        self.n_replicates = n_replicates
+        self.replicate_indices = np.arange(n_replicates)
+        self.replicates = {name: np.stack(values) for name, values in states.items()}
+        self.replicate_optimal = optimal_arms
+        self.replicate_optimal_values = optimal_values
+        self.replicate_pulls = np.zeros((n_replicates, self.n_arms), dtype=np.int32)
+
+    def load_replicate(self, replicate):
+        """
+        Restores one of the environments sampled by reset_replicates, so that
+        it can be used through the regular (non batched) interface.
+
+        Args:
+            replicate: index of the replicate to restore.
+        """
+        for name, values in self.replicates.items():
+            setattr(self, name, np.array(values[replicate], copy=True))
+        self.regret_table = None
+        self.soft_reset()
+
+    def replicate_pull(self, arms):
+        """
+        Pulls one arm on each replicate. Override in subclasses to match "pull".
+
+        Args:
+            arms: array with the arm pulled on each replicate.
+
+        Returns:
+            array with the reward obtained on each replicate.
+        """
+        return self.replicates['arms'][self.replicate_indices, arms]
+
+    def replicate_step(self, arms):
+        """
+        Batched version of "step": pulls one arm on each replicate.
+
+        Args:
+            arms: array with the arm pulled on each replicate.
+
+        Returns:
+            array with the reward obtained on each replicate.
+        """
+        self.replicate_pulls[self.replicate_indices, arms] += 1
+        return self.replicate_pull(arms)
+
+    def replicate_dueling_step(self, arms1, arms2):
+        """
+        Batched version of "dueling_step": compares one pair on each replicate.
+
+        Args:
+            arms1: array with the first arm of the pair on each replicate.
+            arms2: array with the second arm of the pair on each replicate.
+
+        Returns:
+            Tuple containing the arrays of rewards of each arm.
+        """
+        self.replicate_pulls[self.replicate_indices, arms1] += 1
+        self.replicate_pulls[self.replicate_indices, arms2] += 1
+        return (self.replicate_pull(arms1), self.replicate_pull(arms2))
 
     def get_optimal(self):
         """
@@ -147,23 +340,28 @@ class Environment():
         Returns:
             the copeland regret for the arm.
         """
-        if self.copeland_regrets[arm] > np.NINF:
-            return self.copeland_regrets[arm]
+        if self.copeland_regrets[arm] == np.NINF:
+            self.compute_copeland_regrets()
+        return self.copeland_regrets[arm]
 
-        winners = self.get_copeland_winners()
+    def compute_copeland_regrets(self, preferences = None):
+        """
+        Computes the copeland regret of every arm at once, i.e., the largest
+        advantage that any copeland winner has over the arm (0 for the winners).
 
-        if arm in winners:
-            # No regret if it's one of the winners
-            self.copeland_regrets[arm] = 0
-            return 0
+        Args:
+            preferences: preference matrix of the environment. Computed if not given.
 
-        max = np.NINF
-        for winner in winners:
-            delta = self.get_probability_dueling_cached(winner, arm) - 1/2
-            if delta > max:
-                max = delta
-        self.copeland_regrets[arm] = max
-        return max
+        Returns:
+            array with the copeland regret of each arm.
+        """
+        if preferences is None:
+            preferences = self.compute_preference_matrix()
+        winners = self.get_copeland_winners()
+        self.copeland_regrets = np.max(preferences[winners], axis=0) - 1/2
+        # No regret if it's one of the winners
+        self.copeland_regrets[winners] = 0
+        return np.array(self.copeland_regrets, copy=True)
 
     def get_probability_dueling(self, arm1, arm2):
         """
@@ -198,6 +396,47 @@ class Environment():
             self.probabilities_dueling[arm2, arm1] = 1 - prob
         return self.probabilities_dueling[arm1, arm2]
 
+    def compute_preference_matrix(self):
+        """
+        Computes the probability that each arm beats each other arm, filling the
+        pairwise probability cache. Subclasses override it with array operations;
+        this generic version calls get_probability_dueling once per pair.
+
+        Returns:
+            matrix whose entry [i,j] is the probability that arm i beats arm j.
+        """
+        if np.any(self.probabilities_dueling < 0):
+            for arm1 in range(self.n_arms):
+                self.probabilities_dueling[arm1, arm1] = 1/2
+                for arm2 in range(arm1+1, self.n_arms):
+                    self.get_probability_dueling_cached(arm1, arm2)
+        return np.array(self.probabilities_dueling, copy=True)
+
+    def set_preference_matrix(self, upper):
+        """
+        Fills the pairwise probability cache from the probabilities of its upper
+        triangle, so that entries [i,j] and [j,i] always add up to 1.
+
+        Args:
+            upper: matrix whose entries [i,j] with i < j are the probability that arm i beats arm j.
+                The rest of the entries are ignored.
+        """
+        upper = np.triu(upper, k=1)
+        self.probabilities_dueling = upper + np.tril(1 - upper.T, k=-1)
+        np.fill_diagonal(self.probabilities_dueling, 1/2)
+
+    def get_regret_table(self):
+        """
+        Returns the frozen lookup tables (copeland regrets, pairwise preferences and arm
+        ordering) of the current environment, which are computed once per reset.
+
+        Returns:
+            RegretTable object.
+        """
+        if self.regret_table is None:
+            self.regret_table = RegretTable(self)
+        return self.regret_table
+
     def get_name(self):
         """
         String representation of the environment.
@@ -205,4 +444,4 @@ class Environment():
         Returns:
             string representing the environment.
         """
-        return f"Default"
\ No newline at end of file
+        return f"Default"
@@ -22,7 +22,33 @@ class GaussianEnvironment(Environment):
             numerical reward obtained.
         """
         value = self.arms[n_arm]
-        return value + np.random.normal()
+        return value + self.pool.standard_normal()
+
+    def pull_batch(self, arms):
+        """
+        Pulls many arms at once with a gaussian distribution with mean given by arm value.
+
+        Args:
+            arms: array of arm indices to be pulled.
+
+        Returns:
+            array with the reward obtained by each pull.
+        """
+        values = self.arms[arms]
+        return values + self.rng.normal(size=values.shape)
+
+    def replicate_pull(self, arms):
+        """
+        Pulls one arm on each replicate with a gaussian distribution with mean given by arm value.
+
+        Args:
+            arms: array with the arm pulled on each replicate.
+
+        Returns:
+            array with the reward obtained on each replicate.
+        """
+        values = self.replicates['arms'][self.replicate_indices, arms]
+        return values + self.rng.normal(size=values.shape)
 
     def get_probability_dueling(self, arm1, arm2):
         """
@@ -41,6 +67,18 @@ class GaussianEnvironment(Environment):
         """
         return 1 - norm.cdf((self.arms[arm2] - self.arms[arm1]) / np.sqrt(2))
 
+    def compute_preference_matrix(self):
+        """
+        Computes the probability that each arm beats each other arm, applying the
+        formula of get_probability_dueling to the whole grid of pairs at once.
+
+        Returns:
+            matrix whose entry [i,j] is the probability that arm i beats arm j.
+        """
+        if np.any(self.probabilities_dueling < 0):
+            self.set_preference_matrix(1 - norm.cdf((self.arms - self.arms[:, np.newaxis]) / np.sqrt(2)))
+        return np.array(self.probabilities_dueling, copy=True)
+
     def get_name(self):
         """
         String representation of the environment.
@@ -17,7 +17,9 @@ class NoisyGaussianEnvironment(GaussianEnvironment):
     noisy distribution.
     """
 
-    def __init__(self, n_arms, value_generator = np.random.normal, values = None, d=0.1):
+    replicate_attributes = GaussianEnvironment.replicate_attributes + ('epsilons',)
+
+    def __init__(self, n_arms, value_generator = None, values = None, d=0.1, rng = None):
         """
         Initializes the environment.
 
@@ -26,10 +28,11 @@ class NoisyGaussianEnvironment(GaussianEnvironment):
             value_generator: Function for each arm hidden value (true reward)
             values: Arm values. If given, value_generator is ignored.
             d: Amount of noise added. The higher, the less transitivity.
+            rng: Seed or numpy Generator for every random draw of the environment.
         """
-        super(NoisyGaussianEnvironment,self).__init__(n_arms, value_generator, values)
+        super(NoisyGaussianEnvironment,self).__init__(n_arms, value_generator, values, rng)
         self.d = d
-        self.epsilons = np.tril(np.random.normal(loc=0, scale=d**2, size=(n_arms, n_arms)), k=-1)
+        self.epsilons = np.tril(self.rng.normal(loc=0, scale=d**2, size=(n_arms, n_arms)), k=-1)
         t = np.transpose(self.epsilons)
         self.epsilons = self.epsilons + -t
 
@@ -60,7 +63,48 @@ class NoisyGaussianEnvironment(GaussianEnvironment):
         value2 = self.arms[n_arm2]
         epsilon = self.epsilons[n_arm1, n_arm2]
         # We add the epsilon value to the first arm to produce noise.
-        return (value1 + np.random.normal() + epsilon, value2 + np.random.normal())
+        return (value1 + self.pool.standard_normal() + epsilon, value2 + self.pool.standard_normal())
+
+    def dueling_step_batch(self, arms1, arms2):
+        """
+        Batched version of "dueling_step": returns rewards for many pairs of arms,
+        adding the pairwise noise to the first arm of each pair.
+
+        Args:
+            arms1: array with the first arm of each pair.
+            arms2: array with the second arm of each pair.
+
+        Returns:
+            Tuple containing the arrays of rewards of each arm of the pairs.
+        """
+        arms1 = np.asarray(arms1, dtype=int)
+        arms2 = np.asarray(arms2, dtype=int)
+        np.add.at(self.pulls, arms1, 1)
+        np.add.at(self.pulls, arms2, 1)
+        self.steps += arms1.size
+        noise = self.rng.normal(size=(2, arms1.size))
+        return (self.arms[arms1] + noise[0] + self.epsilons[arms1, arms2], self.arms[arms2] + noise[1])
+
+    def replicate_dueling_step(self, arms1, arms2):
+        """
+        Batched version of "dueling_step": compares one pair on each replicate,
+        adding the pairwise noise to the first arm.
+
+        Args:
+            arms1: array with the first arm of the pair on each replicate.
+            arms2: array with the second arm of the pair on each replicate.
+
+        Returns:
+            Tuple containing the arrays of rewards of each arm.
+        """
+        indices = self.replicate_indices
+        self.replicate_pulls[indices, arms1] += 1
+        self.replicate_pulls[indices, arms2] += 1
+        values1 = self.replicates['arms'][indices, arms1]
+        values2 = self.replicates['arms'][indices, arms2]
+        epsilons = self.replicates['epsilons'][indices, arms1, arms2]
+        noise = self.rng.normal(size=(2, indices.size))
+        return (values1 + noise[0] + epsilons, values2 + noise[1])
 
 
     def get_probability_dueling(self, arm1, arm2):
@@ -80,13 +124,24 @@ class NoisyGaussianEnvironment(GaussianEnvironment):
         """
         return 1 - norm.cdf((self.arms[arm2] - self.arms[arm1] - self.epsilons[arm1,arm2]) / np.sqrt(2))
 
+    def compute_preference_matrix(self):
+        """
+        Computes the probability that each arm beats each other arm, applying the
+        formula of get_probability_dueling to the whole grid of pairs at once.
+
+        Returns:
+            matrix whose entry [i,j] is the probability that arm i beats arm j.
+        """
+        if np.any(self.probabilities_dueling < 0):
+            self.set_preference_matrix(1 - norm.cdf((self.arms - self.arms[:, np.newaxis] - self.epsilons) / np.sqrt(2)))
+        return np.array(self.probabilities_dueling, copy=True)
 
     def reset(self):
         """
         Resets environment internals
         """
         super().reset()
-        self.epsilons = np.tril(np.random.normal(loc=0, scale=self.d**2, size=(self.n_arms, self.n_arms)), k=-1)
+        self.epsilons = np.tril(self.rng.normal(loc=0, scale=self.d**2, size=(self.n_arms, self.n_arms)), k=-1)
         t = np.transpose(self.epsilons)
         self.epsilons = self.epsilons + -t
         # Update the copeland scores
@@ -0,0 +1,39 @@
+"""
+Precomputed, read-only lookup tables of a sampled environment.
+"""
+
+import numpy as np
+
+class RegretTable():
+    """
+    Frozen tables with everything metrics need from an environment, so that
+    they can be looked up (or computed in bulk) instead of querying the
+    environment on every step. Obtained through Environment.get_regret_table.
+    """
+
+    def __init__(self, environment):
+        """
+        Builds the tables for the current state of the environment.
+
+        Args:
+            environment: Environment object, already reset.
+        """
+        # Entry [i,j] is the probability that i beats j.
+        self.preferences = np.array(environment.compute_preference_matrix(), dtype=float)
+
+        # Copeland regret of each arm.
+        self.copeland_regrets = np.array(environment.compute_copeland_regrets(self.preferences), dtype=float)
+
+        # Underlying value of each arm and arm indices sorted from best to worst value.
+        self.arm_values = np.array(environment.arms, dtype=float)
+        self.arm_order = np.argsort(-self.arm_values, kind='stable')
+
+        self.optimal_arm = int(environment.get_optimal())
+        self.optimal_value = float(environment.get_optimal_value())
+
+        for array in (self.preferences, self.copeland_regrets, self.arm_values, self.arm_order):
+            array.flags.writeable = False
+
+        # Python lists, since indexing them with scalars is much faster than indexing arrays.
+        self.copeland_regret_list = self.copeland_regrets.tolist()
+        self.arm_value_list = self.arm_values.tolist()
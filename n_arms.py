@@ -2,9 +2,10 @@
 Simulation for arm number impact in DB.
 """
 
-from matplotlib.pyplot import xlabel
 from simulation.Simulation import Simulation
-from simulation.Experiment import Experiment
+from simulation.Sweep import Sweep
+from simulation.Spec import Spec
+from simulation.Param import Param
 from agents.MultiSBMAgent import MultiSBMAgent
 from agents.ThompsonBetaAgent import ThompsonBetaAgent
 from agents.IFAgent import IFAgent
@@ -15,7 +16,7 @@ from agents.DTSAgent import DTSAgent
 from agents.RUCBAgent import RUCBAgent
 from agents.CCBAgent import CCBAgent
 from agents.RandomAgent import RandomAgent
-from environments import GaussianEnvironment
+from environments.GaussianEnvironment import GaussianEnvironment
 
 N_EPOCHS = 10000
 N_REPEATS = 10 # Number of repeats for the largest amount of arms. The remaining arms are run more times since its cheaper.
@@ -25,23 +26,21 @@ N_ARM_VALUES = [10, 20, 30, 50, 100, 150, 200]
 
 sim = Simulation(f"change arm number, {N_EPOCHS} epochs, equally spaced arms")
 
-
-for n_arms in N_ARM_VALUES:
-    agents = []
-    agents.append(RandomAgent(n_arms))
-    agents.append(IFAgent(n_arms, N_EPOCHS))
-    agents.append(BTMAgent(n_arms, N_EPOCHS))
-    agents.append(DoublerAgent(n_arms, ThompsonBetaAgent(n_arms)))
-    agents.append(MultiSBMAgent(n_arms, ThompsonBetaAgent, [n_arms]))
-    agents.append(SparringAgent(n_arms, ThompsonBetaAgent(n_arms), ThompsonBetaAgent(n_arms)))
-    agents.append(DTSAgent(n_arms))
-    agents.append(RUCBAgent(n_arms))
-    agents.append(CCBAgent(n_arms))
-
-    environ = GaussianEnvironment.GaussianEnvironment(n_arms, values = list(range(n_arms)))
-
-    n_repeats = min(int(N_REPEATS * float(N_ARM_VALUES[-1])**2 / float(n_arms)**2), MAX_N_REPEATS)
-    sim.add_experiment(Experiment(f"N = {n_arms}", agents, environ, N_EPOCHS, n_repeats, plot_position=n_arms))
+n_arms = Param('n_arms')
+agents = [Spec(RandomAgent, n_arms),
+          Spec(IFAgent, n_arms, N_EPOCHS),
+          Spec(BTMAgent, n_arms, N_EPOCHS),
+          Spec(DoublerAgent, n_arms, Spec(ThompsonBetaAgent, n_arms)),
+          Spec(MultiSBMAgent, n_arms, ThompsonBetaAgent, [n_arms], compact=True),
+          Spec(SparringAgent, n_arms, Spec(ThompsonBetaAgent, n_arms), Spec(ThompsonBetaAgent, n_arms)),
+          Spec(DTSAgent, n_arms),
+          Spec(RUCBAgent, n_arms),
+          Spec(CCBAgent, n_arms)]
+
+points = [{'n_arms': n, 'values': list(range(n)), 'n_repeats': min(int(N_REPEATS * float(N_ARM_VALUES[-1])**2 / float(n)**2), MAX_N_REPEATS)} for n in N_ARM_VALUES]
+sim.add_sweep(Sweep("N = {n_arms}", points, agents, Spec(GaussianEnvironment, n_arms, values = Param('values')),
+                    N_EPOCHS, Param('n_repeats'), plot_position=n_arms))
+sim.reuse_results()
 
 sim.run_all(save = True)
 
@@ -52,4 +51,4 @@ for i in range(len(N_ARM_VALUES)):
     sim.experiments[name].name = str(N_ARM_VALUES[i])
 sim.plot_aggregated_metrics('weak_regret', [-10, 10], xlabel="Número de brazos", ylabel = "Regret mínimo", title = "Brazos Gaussianos, 10000 épocas", labelsize=20, titlesize=22, legendsize=12, store = True, names = names, storesize = (12,6))
 #sim.plot_aggregated_metrics('weak_regret', [-10, 10])
-#sim.plot_aggregated_metrics('strong_regret', [-10, 10])
\ No newline at end of file
+#sim.plot_aggregated_metrics('strong_regret', [-10, 10])
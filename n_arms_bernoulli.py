@@ -31,7 +31,7 @@ for n_arms in N_ARM_VALUES:
     agents.append(IFAgent(n_arms, N_EPOCHS))
     agents.append(BTMAgent(n_arms, N_EPOCHS))
     agents.append(DoublerAgent(n_arms, ThompsonBetaAgent(n_arms)))
-    agents.append(MultiSBMAgent(n_arms, ThompsonBetaAgent, [n_arms]))
+    agents.append(MultiSBMAgent(n_arms, ThompsonBetaAgent, [n_arms], compact=True))
     agents.append(SparringAgent(n_arms, ThompsonBetaAgent(n_arms), ThompsonBetaAgent(n_arms)))
     agents.append(DTSAgent(n_arms))
     agents.append(RUCBAgent(n_arms))
@@ -3,7 +3,9 @@ Simulation for epoch impact in DB.
 """
 
 from simulation.Simulation import Simulation
-from simulation.Experiment import Experiment
+from simulation.Sweep import Sweep
+from simulation.Spec import Spec
+from simulation.Param import Param
 from agents.MultiSBMAgent import MultiSBMAgent
 from agents.ThompsonBetaAgent import ThompsonBetaAgent
 from agents.IFAgent import IFAgent
@@ -13,7 +15,7 @@ from agents.SparringAgent import SparringAgent
 from agents.DTSAgent import DTSAgent
 from agents.RUCBAgent import RUCBAgent
 from agents.CCBAgent import CCBAgent
-from environments import GaussianEnvironment
+from environments.GaussianEnvironment import GaussianEnvironment
 
 n_arms = 30
 N_REPEATS = 10 # Number of repeats for the largest amount of epochs. The remaining arms are run more times since its cheaper.
@@ -23,23 +25,22 @@ N_EPOCHS_VALUES = [100, 1000, 2500, 5000, 10000, 25000, 50000, 100000, 150000, 2
 
 sim = Simulation(f"change epoch horizon, {n_arms} arms, equally spaced arms")
 
-for n_epochs in N_EPOCHS_VALUES:
-    agents = []
-    agents.append(IFAgent(n_arms, n_epochs))
-    agents.append(BTMAgent(n_arms, n_epochs))
-    agents.append(DoublerAgent(n_arms, ThompsonBetaAgent(n_arms)))
-    agents.append(MultiSBMAgent(n_arms, ThompsonBetaAgent, [n_arms]))
-    agents.append(SparringAgent(n_arms, ThompsonBetaAgent(n_arms), ThompsonBetaAgent(n_arms)))
-    agents.append(DTSAgent(n_arms))
-    agents.append(RUCBAgent(n_arms))
-    agents.append(CCBAgent(n_arms))
-
-    environ = GaussianEnvironment.GaussianEnvironment(n_arms, values = list(range(n_arms)))
-
-    n_repeats = min(int(N_REPEATS * float(N_EPOCHS_VALUES[-1]) / float(n_epochs)), MAX_N_REPEATS)
-    sim.add_experiment(Experiment(f"N = {n_epochs}", agents, environ, n_epochs, n_repeats, plot_position=n_epochs))
+n_epochs = Param('n_epochs')
+agents = [Spec(IFAgent, n_arms, n_epochs),
+          Spec(BTMAgent, n_arms, n_epochs),
+          Spec(DoublerAgent, n_arms, Spec(ThompsonBetaAgent, n_arms)),
+          Spec(MultiSBMAgent, n_arms, ThompsonBetaAgent, [n_arms], compact=True),
+          Spec(SparringAgent, n_arms, Spec(ThompsonBetaAgent, n_arms), Spec(ThompsonBetaAgent, n_arms)),
+          Spec(DTSAgent, n_arms),
+          Spec(RUCBAgent, n_arms),
+          Spec(CCBAgent, n_arms)]
+
+points = [{'n_epochs': n, 'n_repeats': min(int(N_REPEATS * float(N_EPOCHS_VALUES[-1]) / float(n)), MAX_N_REPEATS)} for n in N_EPOCHS_VALUES]
+sim.add_sweep(Sweep("N = {n_epochs}", points, agents, Spec(GaussianEnvironment, n_arms, values = list(range(n_arms))),
+                    n_epochs, Param('n_repeats'), plot_position=n_epochs))
+sim.reuse_results()
 
 sim.run_all(save = True)
 
 sim.plot_aggregated_metrics('copeland_regret', padding=[10, 100], cut_ticks = [6000,200001])
-sim.save_all_metrics('copeland_regret')
\ No newline at end of file
+sim.save_all_metrics('copeland_regret')
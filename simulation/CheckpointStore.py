@@ -0,0 +1,181 @@
+"""
+Incremental checkpoints of experiments, stored as metrics shards.
+"""
+
+import json
+import os
+import re
+import zlib
+import numpy as np
+
+from .Metrics import Metrics as mm, METRIC_NAMES
+
+# First value of every record header, to detect corrupted files.
+SHARD_MAGIC = 0x5348415244
+# Repeat index of the shards holding every repeat of an agent (batched experiments).
+ALL_REPEATS = -1
+
+def get_file_name(name):
+    """
+    Returns a file name for an experiment name. Names are sanitized and suffixed
+    with their hash, so that different names never share files.
+
+    Args:
+        name: name of the experiment.
+
+    Returns:
+        file name, without extension.
+    """
+    name = str(name)
+    safe_name = re.sub(r'[^A-Za-z0-9_.-]+', '_', name)[:100]
+    return f"{safe_name}_{zlib.crc32(name.encode()):08x}"
+
+class CheckpointStore():
+    """
+    Stores the results of experiments as they are produced, so that an interrupted
+    run can be resumed without repeating the finished work.
+
+    Each finished (experiment, agent, repeat) work unit is appended to a log file of
+    the experiment as a shard: the per-epoch counts, means and M2 of its Metrics,
+    which take O(n_epochs) space. Batched experiments store one shard per agent
+    with every repeat (repeat index ALL_REPEATS). A small JSON file next to the log
+    keeps the seed and configuration of the experiment, so that the resumed run
+    uses the same random streams. Since shards are merged in repeat order, the
+    resumed results match those of an uninterrupted run.
+    """
+
+    def __init__(self, directory):
+        """
+        Initializes the store.
+
+        Args:
+            directory: folder where the checkpoints are stored. It is created if needed.
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def get_path(self, experiment, extension):
+        """
+        Returns the path of a file of an experiment (see get_file_name).
+
+        Args:
+            experiment: Experiment object.
+            extension: file extension.
+
+        Returns:
+            path of the file.
+        """
+        return os.path.join(self.directory, f"{get_file_name(experiment.get_name())}.{extension}")
+
+    def get_configuration(self, experiment):
+        """
+        Returns the configuration of an experiment that must match to reuse its shards.
+
+        Args:
+            experiment: Experiment object.
+
+        Returns:
+            JSON serializable dictionary.
+        """
+        return {'name': str(experiment.get_name()),
+                'n_epochs': experiment.n_epochs,
+                'n_repeats': experiment.n_repeats,
+                'batched': experiment.batched,
+                'agents': experiment.get_agent_names()}
+
+    def open_experiment(self, experiment):
+        """
+        Prepares the checkpoints of an experiment. If there are previous ones, the seed
+        of the experiment is taken from them when not given, and the configuration
+        is checked. Otherwise, the configuration and seed are stored.
+
+        Args:
+            experiment: Experiment object.
+        """
+        path = self.get_path(experiment, "json")
+        configuration = self.get_configuration(experiment)
+        if os.path.exists(path):
+            with open(path) as f:
+                stored = json.load(f)
+            stored_seed = stored.pop('seed')
+            if stored != configuration:
+                raise ValueError(f"Checkpoint of experiment {experiment.get_name()} was made with another configuration")
+            if experiment.seed is None:
+                experiment.seed = stored_seed
+            elif json.loads(json.dumps(experiment.seed)) != stored_seed:
+                raise ValueError(f"Checkpoint of experiment {experiment.get_name()} was made with another seed")
+            return
+
+        configuration['seed'] = experiment.get_seed()
+        with open(path, "w") as f:
+            json.dump(configuration, f, indent=2)
+
+    def add_shard(self, experiment, repeat, agent_id, metrics):
+        """
+        Appends the results of a finished work unit to the log of the experiment.
+
+        Args:
+            experiment: Experiment object.
+            repeat: index of the repeat, or ALL_REPEATS if metrics hold every repeat.
+            agent_id: index of the agent.
+            metrics: Metrics object with the results.
+        """
+        header = np.array([SHARD_MAGIC, agent_id, repeat, len(METRIC_NAMES), metrics.n_epochs], dtype=np.int64)
+        with open(self.get_path(experiment, "shards"), "ab") as f:
+            f.write(header.tobytes())
+            f.write(np.asarray(metrics.value_counts, dtype=np.float64).tobytes())
+            f.write(np.asarray(metrics.means, dtype=np.float64).tobytes())
+            f.write(np.asarray(metrics.m2, dtype=np.float64).tobytes())
+            f.flush()
+
+    def load_shards(self, experiment):
+        """
+        Reads every shard of an experiment. An incomplete record at the end of the log
+        (e.g. if the process was killed while writing it) is discarded.
+
+        Args:
+            experiment: Experiment object.
+
+        Returns:
+            dictionary {(repeat, agent index): Metrics object}.
+        """
+        path = self.get_path(experiment, "shards")
+        if not os.path.exists(path):
+            return {}
+        with open(path, "rb") as f:
+            data = f.read()
+
+        shards = {}
+        offset = 0
+        header_size = 5 * 8
+        while offset + header_size <= len(data):
+            magic, agent_id, repeat, n_metrics, n_epochs = np.frombuffer(data, dtype=np.int64, count=5, offset=offset)
+            if magic != SHARD_MAGIC or n_metrics != len(METRIC_NAMES) or n_epochs != experiment.n_epochs:
+                raise ValueError(f"Corrupted checkpoint of experiment {experiment.get_name()}")
+            record_size = header_size + 8 * n_epochs * (1 + 2 * n_metrics)
+            if offset + record_size > len(data):
+                break
+            values = np.frombuffer(data, dtype=np.float64, count=n_epochs * (1 + 2 * n_metrics), offset=offset + header_size)
+            metrics = mm(int(n_epochs), deferred=True)
+            metrics.set_moments(values[:n_epochs], values[n_epochs:(1 + n_metrics) * n_epochs].reshape(n_metrics, n_epochs),
+                                values[(1 + n_metrics) * n_epochs:].reshape(n_metrics, n_epochs))
+            shards[(int(repeat), int(agent_id))] = metrics
+            offset += record_size
+
+        if offset < len(data):
+            # Drop the incomplete record, so that new shards are appended after the valid ones
+            with open(path, "r+b") as f:
+                f.truncate(offset)
+        return shards
+
+    def clear(self, experiment):
+        """
+        Removes every checkpoint of an experiment.
+
+        Args:
+            experiment: Experiment object.
+        """
+        for extension in ["shards", "json"]:
+            path = self.get_path(experiment, extension)
+            if os.path.exists(path):
+                os.remove(path)
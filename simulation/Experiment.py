@@ -3,14 +3,243 @@ Class representing a MAB/DB experiment.
 """
 
 from .Metrics import Metrics as mm
-
-import matplotlib.pyplot as plt
-import matplotlib as mpl
+from .ExperimentResults import ExperimentResults
+from .Profiler import Profiler
+from .CheckpointStore import CheckpointStore, ALL_REPEATS
+from .ResultCache import ResultCache
+from .Spec import Spec, get_config_hash
+from . import kernels
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from tqdm import tqdm
 import numpy as np
 import random
+import time
+
+def simulate(agent, environment, metrics, n_epochs, optimal_arm, optimal_value, use_kernels = False, profiler = None):
+    """
+    Runs a single repeat of an agent against the current state of an environment.
+
+    Args:
+        agent: agent to run. It is fully reset first.
+        environment: Environment object, already reset.
+        metrics: Metrics object where the results are stored.
+        n_epochs: Nº of iterations.
+        optimal_arm: index of the best arm of the environment.
+        optimal_value: value of the best arm of the environment.
+        use_kernels: If set to true and numba is available, supported agent and environment
+            pairs are run by a compiled kernel (see kernels.py). The agent object is then left reset.
+        profiler: If given, Profiler object where the time spent in each component is
+            accumulated (see simulate_profiled).
+    """
+    if profiler is not None:
+        simulate_profiled(agent, environment, metrics, n_epochs, optimal_arm, optimal_value, use_kernels, profiler)
+        return
+
+    agent.reset()
+
+    if use_kernels and kernels.supports_kernel(agent, environment):
+        arms, rewards = kernels.run_kernel(agent, environment, n_epochs)
+        metrics.update_trajectory(environment, arms, rewards, optimal_arm, optimal_value)
+        environment.soft_reset()
+        metrics.new_iteration()
+        return
+
+    # Carry one experiment
+    for i in range(n_epochs):
+        # MAB's case:
+        if not agent.is_dueling:
+            # Ask the agent for an action
+            arm = agent.step()
+            # Get reward
+            reward = environment.step(arm)
+            # Feed agent
+            agent.reward(arm, reward)
+            # Update metrics
+            metrics.update(i, environment, arm, reward, optimal_arm, optimal_value)
+        # DB's case:
+        else:
+            # Ask the agent for an action
+            arm1, arm2 = agent.step()
+            # Get rewards in order to compare
+            reward1, reward2 = environment.dueling_step(arm1, arm2)
+            # Feed agent with the result of the comparison only. Ties are broken randomly
+            agent.reward(arm1, arm2, reward1 > reward2 if reward1 != reward2 else environment.pool.random() < 1/2)
+            # Update metrics
+            metrics.update_dueling(i, environment, arm1, arm2, reward1, reward2, optimal_arm, optimal_value)
+
+    environment.soft_reset()
+    metrics.new_iteration()
+
+def simulate_profiled(agent, environment, metrics, n_epochs, optimal_arm, optimal_value, use_kernels, profiler):
+    """
+    Version of simulate that accumulates, for the agent name, the wall time and calls of
+    its step and reward, of the environment, of the metrics updates, of the resets and,
+    if a compiled kernel is used, of the whole kernel run. Kept apart so that the
+    plain loop has no overhead.
+
+    Args:
+        agent, environment, metrics, n_epochs, optimal_arm, optimal_value, use_kernels: see simulate.
+        profiler: Profiler object.
+    """
+    clock = time.perf_counter_ns
+    name = agent.get_name()
+    step_time, reward_time, environment_time, metrics_time = 0, 0, 0, 0
+
+    start = clock()
+    agent.reset()
+    profiler.add(name, 'reset', clock() - start)
+
+    if use_kernels and kernels.supports_kernel(agent, environment):
+        start = clock()
+        arms, rewards = kernels.run_kernel(agent, environment, n_epochs)
+        profiler.add(name, 'kernel', clock() - start)
+        start = clock()
+        metrics.update_trajectory(environment, arms, rewards, optimal_arm, optimal_value)
+        metrics_time += clock() - start
+        n_epochs = 0
+
+    for i in range(n_epochs):
+        if not agent.is_dueling:
+            start = clock()
+            arm = agent.step()
+            step_end = clock()
+            reward = environment.step(arm)
+            environment_end = clock()
+            agent.reward(arm, reward)
+            reward_end = clock()
+            metrics.update(i, environment, arm, reward, optimal_arm, optimal_value)
+        else:
+            start = clock()
+            arm1, arm2 = agent.step()
+            step_end = clock()
+            reward1, reward2 = environment.dueling_step(arm1, arm2)
+            one_wins = reward1 > reward2 if reward1 != reward2 else environment.pool.random() < 1/2
+            environment_end = clock()
+            agent.reward(arm1, arm2, one_wins)
+            reward_end = clock()
+            metrics.update_dueling(i, environment, arm1, arm2, reward1, reward2, optimal_arm, optimal_value)
+        end = clock()
+        step_time += step_end - start
+        environment_time += environment_end - step_end
+        reward_time += reward_end - environment_end
+        metrics_time += end - reward_end
+
+    if n_epochs > 0:
+        profiler.add(name, 'step', step_time, n_epochs)
+        profiler.add(name, 'environment', environment_time, n_epochs)
+        profiler.add(name, 'reward', reward_time, n_epochs)
+
+    start = clock()
+    environment.soft_reset()
+    reset_end = clock()
+    metrics.new_iteration()
+    profiler.add(name, 'reset', reset_end - start, 0)
+    profiler.add(name, 'metrics', metrics_time + clock() - reset_end, max(n_epochs, 1))
+
+# Kinds of random streams derived from an experiment seed.
+ENVIRONMENT_STREAM = 0 # Sampling of the environment of a repeat
+AGENT_STREAM = 1 # Decisions of an agent
+NOISE_STREAM = 2 # Rewards and tie-breaks seen by an agent
+
+def get_seed_sequence(seed, stream, *key):
+    """
+    Returns the SeedSequence of an independent random stream of an experiment.
+    The same (seed, stream, key) always yields the same stream, so any repeat can
+    be reproduced in isolation.
+
+    Args:
+        seed: experiment seed.
+        stream: kind of stream (ENVIRONMENT_STREAM, AGENT_STREAM or NOISE_STREAM).
+        key: integers identifying the stream, such as the repeat index and the agent key (see Experiment.get_agent_key).
+
+    Returns:
+        numpy SeedSequence.
+    """
+    return np.random.SeedSequence(seed, spawn_key=(stream,) + key)
+
+def seed_global_generators(seed_sequence):
+    """
+    Seeds the global random generators (numpy's and the random module) from a SeedSequence.
+    Only custom value generators of environments rely on them.
 
-class Experiment():
+    Args:
+        seed_sequence: numpy SeedSequence to draw the seed from.
+    """
+    state = seed_sequence.generate_state(1)[0]
+    np.random.seed(state)
+    random.seed(int(state))
+
+def sample_environment(environment, environment_seed):
+    """
+    Resets the environment with the stream of a repeat.
+
+    Args:
+        environment: Environment object.
+        environment_seed: SeedSequence used to sample the environment.
+
+    Returns:
+        Tuple with the index and the value of the best arm of the sampled environment.
+    """
+    seed_global_generators(environment_seed)
+    environment.set_rng(environment_seed)
+    environment.reset()
+    return environment.get_optimal(), environment.get_optimal_value()
+
+def run_work_unit(agent, environment, n_epochs, environment_seed, agent_seed, noise_seed, use_kernels = False, profile = False):
+    """
+    Runs a (repeat, agent) work unit in isolation: samples the environment of
+    the repeat and simulates the agent on it. Results only depend on the seeds,
+    so units may run in any order and in any process.
+
+    Args:
+        agent: agent to run, or Spec of it, which is then built in this process.
+        environment: Environment object.
+        n_epochs: Nº of iterations.
+        environment_seed: SeedSequence used to sample the environment. Shared by
+            every agent of the same repeat.
+        agent_seed: SeedSequence used by the agent.
+        noise_seed: SeedSequence used by the environment while simulating the agent.
+        use_kernels: whether compiled kernels may be used (see simulate).
+        profile: whether to time each component of the simulation (see simulate_profiled).
+
+    Returns:
+        Tuple with the Metrics object with the results of the single repeat and, if profiling,
+        the Profiler object with its timings (None otherwise).
+    """
+    if isinstance(agent, Spec):
+        agent = agent.build()
+    optimal_arm, optimal_value = sample_environment(environment, environment_seed)
+    agent.set_rng(agent_seed)
+    environment.set_rng(noise_seed)
+    metrics = mm(n_epochs, deferred=True)
+    profiler = Profiler() if profile else None
+    simulate(agent, environment, metrics, n_epochs, optimal_arm, optimal_value, use_kernels, profiler)
+    return metrics, profiler
+
+def execute_work_units(units, workers):
+    """
+    Runs work units, yielding their results as soon as they are finished.
+    Units are started in the given order, so they should be sorted largest first.
+
+    Args:
+        units: list of (key, args) tuples, where args are the arguments of run_work_unit.
+        workers: Nº of worker processes. If 1, units are run in this process.
+
+    Yields:
+        (key, metrics, profiler) tuples, where profiler is None unless the unit is profiled.
+    """
+    if workers == 1:
+        for key, args in units:
+            yield (key,) + run_work_unit(*args)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(run_work_unit, *args): key for key, args in units}
+        for future in as_completed(futures):
+            yield (futures[future],) + future.result()
+
+class Experiment(ExperimentResults):
     """
     Class that encapsulates all the data needed for a single experiment.
     Here, a "single experiment" means a fixed set of agents against a
@@ -18,169 +247,529 @@ class Experiment():
     repeated more than one time with distinct seeds for averaging.
     """
 
-    def __init__(self, name, agents, environment, n_epochs, n_repeats=1, plot_position = None):
+    def __init__(self, name, agents, environment, n_epochs, n_repeats=1, plot_position = None, batched = False, seed = None, use_kernels = False, profile = False,
+                 target_error = None, error_metric = 'copeland_regret', min_repeats = 10):
             """
             Initializes the experiment.
 
             Args:
                 Name: identifier for the experiment. Must be unique.
-                Agents: list of agents to simulate
+                Agents: list of agents to simulate, or Specs of them (see Spec). Specs are only built
+                    when their agent is run, in the process that runs it.
                 Environment: Environment object with the arms
                 n_epochs: Nº of iterations per agent on a given environment
-                n_repeats: Nº of environments per agent for robustness
+                n_repeats: Nº of environments per agent for robustness. With a target error, the maximum.
                 plot_position: If this experiment can be parameterized within the simulation by a cardinal value 
                     (for example, the number of arms), it should be indicated here for consistent plots.
+                batched: If set to true, all the repeats are simulated at once for the agents that support
+                    it (see run_batched).
+                seed: Seed from which every random stream of the experiment is derived (see get_seed_sequence).
+                    If not given, a random one is drawn and stored when first needed, so that the run can be reproduced.
+                use_kernels: If set to true and numba is available, repeats of supported agent and environment
+                    pairs are run by compiled kernels (see kernels.py). Results are statistically equivalent,
+                    but follow other random streams than the pure Python run, so they are opt-in: seeded
+                    experiments give the same results whether numba is installed or not.
+                profile: If set to true, the wall time and calls of each component (agent step and reward,
+                    environment, metrics) are accumulated per agent name in a Profiler (see get_profiler).
+                target_error: If given, each agent is run until the standard error of error_metric at the
+                    last epoch is not larger than this value, with at least min_repeats and at most n_repeats
+                    repeats (see is_precise). Repeat counts are reported per agent (see get_repeat_report and get_agent_repeats).
+                    Not supported by batched experiments.
+                error_metric: Name of the metric whose standard error is checked (check module "Metrics" or readme).
+                min_repeats: Minimum Nº of repeats of each agent with a target error.
             """
+            if target_error is not None and batched:
+                raise ValueError("Batched experiments run every repeat at once, so they cannot have a target error")
             self.name = name
             self.agents = agents
             self.environment = environment
             self.n_epochs = n_epochs
-            self.metrics = [mm(n_epochs) for i in range(len(agents))]
+            self.metrics = [mm(n_epochs, deferred=True) for i in range(len(agents))]
             self.n_repeats = n_repeats
             self.ran = False
             self.plot_position = plot_position
-
-    def run(self):
+            self.batched = batched
+            self.seed = seed
+            self.use_kernels = use_kernels
+            self.profiler = Profiler() if profile else None
+            # Hash of the configuration of the experiment, if it was expanded from a Sweep.
+            self.key = None
+            self.target_error = target_error
+            self.error_metric = error_metric
+            self.min_repeats = min_repeats
+
+    def run(self, workers = None, checkpoint = None, cache = None):
         """
         Runs the experiment and stores the metrics.
+
+        Args:
+            workers: If given, the experiment is run with run_parallel using that many processes.
+            checkpoint: If given, CheckpointStore object or folder where the results are stored
+                as they are produced, and from which a previous interrupted run is resumed (see run_units).
+            cache: If given, ResultCache object or folder. Work units found in it are not run,
+                and the results of the others are added to it (see run_units).
         """
+        if checkpoint is not None or cache is not None:
+            store = checkpoint if checkpoint is None or isinstance(checkpoint, CheckpointStore) else CheckpointStore(checkpoint)
+            cache = cache if cache is None or isinstance(cache, ResultCache) else ResultCache(cache)
+            self.run_units(workers if workers is not None else 1, store, cache)
+        elif workers is not None:
+            self.run_parallel(workers)
+        elif self.batched:
+            self.run_batched()
+        else:
+            self.run_serial()
+
+        if self.target_error is not None:
+            print(f"Experiment {self.name}: target standard error {self.target_error} of {self.error_metric}, {self.min_repeats} to {self.n_repeats} repeats.")
+            print(self.get_repeat_report(self.error_metric))
+
+    def run_serial(self):
+        """
+        Runs every repeat of every agent in this process. With a target error, agents
+        that are precise enough (see is_precise) are not run in the remaining repeats.
+        """
+        active = list(range(len(self.agents)))
         # Loops through the several environments
-        for _ in tqdm(range(self.n_repeats)):
+        for repeat in tqdm(range(self.n_repeats)):
+            active = [agent_id for agent_id in active if not self.is_precise(self.metrics[agent_id])]
+            if not active:
+                break
 
-            optimal_arm = self.environment.get_optimal()
-            optimal_value = self.environment.get_optimal_value()
-            self.environment.reset()
+            optimal_arm, optimal_value = sample_environment(self.environment, self.get_environment_seed(repeat))
 
             # Loops through the several agents
-            for agent_id, agent in enumerate(self.agents):
-
-                agent.reset()
-
-                # Carry one experiment
-                for i in range(self.n_epochs):
-                    # MAB's case:
-                    if not agent.is_dueling:
-                        # Ask the agent for an action
-                        arm = agent.step()
-                        # Get reward
-                        reward = self.environment.step(arm)
-                        # Feed agent
-                        agent.reward(arm, reward)
-                        # Update metrics
-                        self.metrics[agent_id].update(i, self.environment, arm, reward, optimal_arm, optimal_value)
-                    # DB's case:
-                    else:
-                        # Ask the agent for an action
-                        arm1, arm2 = agent.step()
-                        # Get rewards in order to compare
-                        reward1, reward2 = self.environment.dueling_step(arm1, arm2)
-                        # Feed agent with the result of the comparison only. Ties are broken randomly
-                        agent.reward(arm1, arm2, reward1 > reward2 if reward1 != reward2 else random.choice([True, False]))
-                        # Update metrics
-                        self.metrics[agent_id].update_dueling(i, self.environment, arm1, arm2, reward1, reward2, optimal_arm, optimal_value)
-                
-                self.environment.soft_reset()
-                self.metrics[agent_id].new_iteration()
+            for agent_id in active:
+                self.run_agent(agent_id, repeat, optimal_arm, optimal_value)
         
         self.ran = True
 
-    def plot_metrics(self, metric_name, scale="linear", xlabel = None, ylabel = None, title = None, labelsize = 10, titlesize = 10, legendsize = 10, epoch_cutoff = None):
+    def run_agent(self, agent_id, repeat, optimal_arm, optimal_value, agent = None):
         """
-        Plots and shows given metric for the experiment.
+        Runs a single repeat of an agent against the current environment, with
+        the random streams of the repeat.
 
         Args:
-            metric_name: Name of the desired metric within the available ones (check module "Metrics" or readme).
-            scale: pyplot scale format for both axes.
+            agent_id: index of the agent to run.
+            repeat: index of the repeat.
+            optimal_arm: index of the best arm of the environment.
+            optimal_value: value of the best arm of the environment.
+            agent: agent object to run. If not given, it is obtained with get_agent.
+        """
+        if agent is None:
+            agent = self.get_agent(agent_id)
+        agent_seed, noise_seed = self.get_agent_seeds(agent_id, repeat)
+        agent.set_rng(agent_seed)
+        self.environment.set_rng(noise_seed)
+        simulate(agent, self.environment, self.metrics[agent_id], self.n_epochs, optimal_arm, optimal_value, self.use_kernels, self.profiler)
+
+    def get_seed(self):
         """
-        colormap = plt.cm.nipy_spectral
-        colors = [colormap(i) for i in np.linspace(0, 1, len(self.agents))]
-        mpl.rcParams['axes.prop_cycle'] = mpl.cycler(color=colors)
+        Returns the experiment seed, drawing a random one the first time if none was given.
 
-        plots = []
-        for i in range(len(self.agents)):
-            plt.xlabel('Epoch')
-            plt.ylabel(metric_name)
-            if epoch_cutoff:
-                plots += plt.plot(self.metrics[i].get_metrics()[metric_name][:epoch_cutoff], label=self.agents[i].get_name())
-            else:
-                plots += plt.plot(self.metrics[i].get_metrics()[metric_name], label=self.agents[i].get_name())
-        plt.xlabel('Epoch', fontsize = labelsize)
-        plt.ylabel(metric_name, fontsize = labelsize)
-        if xlabel:
-            plt.xlabel(xlabel, fontsize = labelsize)
-        if ylabel:
-            plt.ylabel(ylabel, fontsize = labelsize)
-        plt.xscale(scale)
-        plt.title(f"{self.agents[0].n_arms} arms, {self.n_repeats} simulations with {self.n_epochs} epochs each. Environment: {self.environment.get_name()}")
-        if title:
-            plt.title(title, fontsize = titlesize)
-        plt.legend(plots, [self.agents[i].get_name() for i in range(len(self.agents))],prop={'size': legendsize})
-        plt.xscale(scale)
-        plt.show()
-
-    def save_metrics(self, metric_name, scale="linear", xlabel = None, ylabel = None, title = None, labelsize = 10, titlesize = 10, legendsize = 10, epoch_cutoff = None):
-        """
-        Plots and stores to png given metric for the experiment.
-
-        Args:
-            metric_name: Name of the desired metric within the available ones (check module "Metrics" or readme).
-            scale: pyplot scale format for both axes.
-        """
-        plt.rcParams["figure.figsize"] = (11, 6)
-        colormap = plt.cm.nipy_spectral
-        colors = [colormap(i) for i in np.linspace(0, 1, len(self.agents))]
-        mpl.rcParams['axes.prop_cycle'] = mpl.cycler(color=colors)
-
-        plots = []
-        for i in range(len(self.agents)):
-            plt.xlabel('Epoch')
-            plt.ylabel(metric_name)
-            if epoch_cutoff:
-                plots += plt.plot(self.metrics[i].get_metrics()[metric_name][:epoch_cutoff], label=self.agents[i].get_name())
-            else:
-                plots += plt.plot(self.metrics[i].get_metrics()[metric_name], label=self.agents[i].get_name())
-        plt.xlabel('Epoch', fontsize = labelsize)
-        plt.ylabel(metric_name, fontsize = labelsize)
-        if xlabel:
-            plt.xlabel(xlabel, fontsize = labelsize)
-        if ylabel:
-            plt.ylabel(ylabel, fontsize = labelsize)
-        plt.xscale(scale)
-        plt.title(f"{self.agents[0].n_arms} arms, {self.n_repeats} simulations with {self.n_epochs} epochs each. Environment: {self.environment.get_name()}")
-        if title:
-            plt.title(title, fontsize = titlesize)
-        plt.legend(plots, [self.agents[i].get_name() for i in range(len(self.agents))],prop={'size': legendsize})
-        plt.xscale(scale)
-        plt.savefig(self.name + "_" + metric_name + '.png', dpi=200)
-        plt.clf()
+        Returns:
+            experiment seed.
+        """
+        if self.seed is None:
+            self.seed = np.random.SeedSequence().entropy
+        return self.seed
 
-    def get_name(self):
+    def get_environment_seed(self, repeat):
         """
-        Returns the name of the experiment.
+        Returns the random stream used to sample the environment of a repeat.
+
+        Args:
+            repeat: index of the repeat.
+
+        Returns:
+            numpy SeedSequence.
+        """
+        return get_seed_sequence(self.get_seed(), ENVIRONMENT_STREAM, repeat)
+
+    def get_agent_key(self, agent_id):
+        """
+        Returns the integers identifying the random streams of an agent: its configuration
+        (see Spec.get_canonical) and the number of earlier agents of the experiment with the
+        same one, so that duplicated agents get independent streams. Agents that cannot be
+        identified (e.g. with a lambda as argument) are identified by their index instead.
+
+        Args:
+            agent_id: index of the agent.
+
+        Returns:
+            tuple with the first 64 bits of the hash of the configuration and the number of
+            earlier duplicates, or with the index of the agent.
+        """
+        config_hash = get_config_hash(self.agents[agent_id])
+        if config_hash is None:
+            return (agent_id,)
+        duplicates = sum(get_config_hash(agent) == config_hash for agent in self.agents[:agent_id])
+        return (int(config_hash[:16], 16), duplicates)
+
+    def get_agent_seeds(self, agent_id, repeat = None):
+        """
+        Returns the random streams of the agent and of the environment noise while
+        simulating one repeat of an agent. They depend on the configuration of the agent
+        and not on its index, so equal agents get equal streams (and cache keys, see
+        ResultCache) in any position of any experiment with the same seed, unless they
+        are repeated within the experiment (see get_agent_key).
+
+        Args:
+            agent_id: index of the agent.
+            repeat: index of the repeat. If not given, the streams of batched runs,
+                which simulate every repeat at once, are returned.
+
+        Returns:
+            Tuple of numpy SeedSequences (agent stream, noise stream).
+        """
+        agent_key = self.get_agent_key(agent_id)
+        key = agent_key if repeat is None else (repeat,) + agent_key
+        return (get_seed_sequence(self.get_seed(), AGENT_STREAM, *key),
+                get_seed_sequence(self.get_seed(), NOISE_STREAM, *key))
+
+    def get_work_units(self):
+        """
+        Splits the experiment in independent (repeat, agent) work units, each with
+        the same deterministic seed streams a serial run uses.
+
+        Returns:
+            list of ((experiment name, repeat, agent index), args) tuples, where args are the arguments of run_work_unit.
+        """
+        return [self.get_work_unit(repeat, agent_id) for repeat in range(self.n_repeats) for agent_id in range(len(self.agents))]
+
+    def get_work_unit(self, repeat, agent_id):
+        """
+        Returns a single (repeat, agent) work unit (see get_work_units).
+
+        Args:
+            repeat: index of the repeat.
+            agent_id: index of the agent.
 
         Returns:
-            the name of the experiment.
+            ((experiment name, repeat, agent index), args) tuple, where args are the arguments of run_work_unit.
         """
-        return self.name
+        agent_seed, noise_seed = self.get_agent_seeds(agent_id, repeat)
+        return ((self.name, repeat, agent_id), (self.agents[agent_id], self.environment, self.n_epochs, self.get_environment_seed(repeat), agent_seed, noise_seed,
+                                                self.use_kernels, self.profiler is not None))
 
-    def was_run(self):
-        return self.ran
+    def get_work_unit_cost(self):
+        """
+        Returns a rough estimate of the cost of one work unit, used to schedule
+        the largest ones first. Most agents do O(n_arms²) work per epoch.
 
-    def get_final_values(self, metric_name):
+        Returns:
+            estimated cost of a work unit.
         """
-        Returns dictionary "agent_index: value" where the value is the final value for metric_name.
+        return self.n_epochs * self.environment.n_arms**2
+
+    def merge_work_units(self, results, profilers = None):
+        """
+        Stores the results of every work unit of the experiment. They are merged in
+        repeat order, so the final metrics do not depend on how the units were run.
+        With a target error, the repeats of each agent after the one that reached it are ignored.
 
         Args:
-            metric_name: Name of the desired metric within the available ones (check module "Metrics" or readme).
+            results: dictionary {(repeat, agent index): metrics} with the result of each unit.
+            profilers: optional list of Profiler objects of the units, added to the one of the experiment.
+        """
+        self.metrics = [self.merge_agent_units(agent_id, results)[0] for agent_id in range(len(self.agents))]
+        if self.profiler is not None:
+            for profiler in profilers or []:
+                self.profiler.merge(profiler)
+        self.ran = True
+
+    def merge_agent_units(self, agent_id, results):
+        """
+        Merges the results of the work units of an agent in repeat order, until a unit is
+        missing or, with a target error, until the agent is precise enough (see is_precise).
+
+        Args:
+            agent_id: index of the agent.
+            results: dictionary {(repeat, agent index): metrics} with the result of each unit.
 
         Returns:
-            dictionary "agent_index: value" where the value is the final value for metric_name.
+            Tuple with the merged Metrics object and the index of the next repeat to run,
+            or None if the agent is finished.
         """
-        return {i: self.metrics[i].get_metric_result(metric_name) for i in range(len(self.agents))}
+        metrics = mm(self.n_epochs, deferred=True)
+        for repeat in range(self.n_repeats):
+            if self.is_precise(metrics):
+                return metrics, None
+            if (repeat, agent_id) not in results:
+                return metrics, repeat
+            metrics.merge(results[(repeat, agent_id)])
+        return metrics, None
+
+    def is_precise(self, metrics):
+        """
+        Checks whether an agent can stop, when running with a target error: it has
+        at least min_repeats repeats and the standard error of error_metric at the
+        last epoch is not larger than target_error.
+
+        Args:
+            metrics: Metrics object with the repeats of the agent run so far.
+
+        Returns:
+            True if the agent reached the target, False otherwise or without target error.
+        """
+        if self.target_error is None or metrics.value_counts[self.n_epochs-1] < max(self.min_repeats, 2):
+            return False
+        return metrics.get_standard_error_result(self.error_metric) <= self.target_error
+
+    def get_repeat_chunk(self, metrics, next_repeat):
+        """
+        Returns how many repeats of an agent to run in the next round of run_units. Without
+        target error, every remaining repeat. Otherwise, the ones expected to reach the target,
+        since the standard error decreases as the inverse square root of the repeats.
+
+        Args:
+            metrics: Metrics object with the repeats of the agent run so far.
+            next_repeat: index of the next repeat to run.
+
+        Returns:
+            Nº of repeats, between 1 and the remaining ones.
+        """
+        remaining = self.n_repeats - next_repeat
+        if self.target_error is None:
+            return remaining
+        if next_repeat < max(self.min_repeats, 2):
+            return min(max(self.min_repeats, 2) - next_repeat, remaining)
+        error = metrics.get_standard_error_result(self.error_metric)
+        needed = int(np.ceil(next_repeat * (error / self.target_error)**2)) if self.target_error > 0 else self.n_repeats
+        return min(max(needed - next_repeat, 1), remaining)
+
+    def get_pending_units(self, results):
+        """
+        Returns the work units to run in the next round of run_units.
+
+        Args:
+            results: dictionary {(repeat, agent index): metrics} with the units already run.
+
+        Returns:
+            list of (repeat, agent index) pairs.
+        """
+        pending = []
+        for agent_id in range(len(self.agents)):
+            metrics, next_repeat = self.merge_agent_units(agent_id, results)
+            if next_repeat is None:
+                continue
+            chunk = range(next_repeat, next_repeat + self.get_repeat_chunk(metrics, next_repeat))
+            pending += [(repeat, agent_id) for repeat in chunk if (repeat, agent_id) not in results]
+        return pending
+
+    def run_parallel(self, workers):
+        """
+        Runs the experiment spreading its (repeat, agent) work units across a pool
+        of processes. Results only depend on the experiment seed, so they match a serial run.
+
+        Args:
+            workers: Nº of worker processes.
+        """
+        if self.target_error is not None:
+            self.run_units(workers)
+            return
+
+        results, profilers = {}, []
+        for (_, repeat, agent_id), metrics, profiler in tqdm(execute_work_units(self.get_work_units(), workers), total=self.n_repeats*len(self.agents)):
+            results[(repeat, agent_id)] = metrics
+            if profiler is not None:
+                profilers.append(profiler)
+        self.merge_work_units(results, profilers)
+
+    def run_units(self, workers = 1, store = None, cache = None):
+        """
+        Runs the experiment unit by unit, reusing the (repeat, agent) work units that are
+        already stored. Every unit is merged in repeat order, so the results are the ones
+        of an uninterrupted, uncached run (see run_parallel). Batched experiments are
+        stored and cached once per agent instead.
+
+        With a target error, units are run in rounds (see get_repeat_chunk) until every agent
+        is precise enough or reaches n_repeats. Whether an agent stops after a repeat only
+        depends on the repeats before it, so results do not depend on the rounds either.
+
+        Args:
+            workers: Nº of worker processes. If 1, units are run in this process.
+            store: optional CheckpointStore object where the result of each unit is stored as
+                soon as it is finished. Units stored by a previous interrupted run are not run again.
+            cache: optional ResultCache object. Units found in it are not run, and the results
+                of the others are added to it.
+        """
+        if store is not None:
+            store.open_experiment(self)
+        if self.batched:
+            self.run_batched(store, cache)
+            return
+
+        results = store.load_shards(self) if store is not None else {}
+        profilers = []
+        looked_up = set() # Units already searched in the cache
+        pending = self.get_pending_units(results)
+        while pending:
+            if cache is not None and not looked_up.issuperset(pending):
+                lookups = [unit for unit in pending if unit not in looked_up]
+                looked_up.update(lookups)
+                found = {(repeat, agent_id): cache.get(cache.get_key(self, agent_id, repeat), self.n_epochs) for repeat, agent_id in lookups}
+                found = {unit: metrics for unit, metrics in found.items() if metrics is not None}
+                if found:
+                    # Cached units may finish some agents, so the round is planned again
+                    results.update(found)
+                    pending = self.get_pending_units(results)
+                    continue
+            units = [self.get_work_unit(repeat, agent_id) for repeat, agent_id in pending]
+            for (_, repeat, agent_id), metrics, profiler in tqdm(execute_work_units(units, workers), total=len(units)):
+                if store is not None:
+                    store.add_shard(self, repeat, agent_id, metrics)
+                if cache is not None:
+                    cache.add(cache.get_key(self, agent_id, repeat), metrics)
+                results[(repeat, agent_id)] = metrics
+                if profiler is not None:
+                    profilers.append(profiler)
+            pending = self.get_pending_units(results)
+        self.merge_work_units(results, profilers)
+
+    def get_cached_units(self, cache, done = None):
+        """
+        Looks up the (repeat, agent) work units of the experiment in a cache.
+
+        Args:
+            cache: ResultCache object.
+            done: optional collection of (repeat, agent index) pairs that need not be looked up.
+
+        Returns:
+            dictionary {(repeat, agent index): Metrics object} with the units found.
+        """
+        found = {}
+        for repeat in range(self.n_repeats):
+            for agent_id in range(len(self.agents)):
+                if done is not None and (repeat, agent_id) in done:
+                    continue
+                metrics = cache.get(cache.get_key(self, agent_id, repeat), self.n_epochs)
+                if metrics is not None:
+                    found[(repeat, agent_id)] = metrics
+        return found
+
+    def run_batched(self, store = None, cache = None):
+        """
+        Runs the experiment simulating all the repeats at once. Every repeat gets its
+        own environment (a "replicate"), and agents that support it (see DBAgent.supports_replicates)
+        advance every replicate with a single vectorized step per epoch. The remaining agents
+        are run repeat by repeat against the same sampled environments, which
+        are the ones a serial run would sample.
+
+        Args:
+            store: optional CheckpointStore object where the results of each agent are stored
+                once it is finished. Agents already stored are not run again.
+            cache: optional ResultCache object. Agents found in it are not run, and the results
+                of the others are added to it.
+        """
+        done = store.load_shards(self) if store is not None else {}
+        self.environment.reset_replicates(self.n_repeats, [self.get_environment_seed(repeat) for repeat in range(self.n_repeats)])
+
+        for agent_id in tqdm(range(len(self.agents))):
+            if (ALL_REPEATS, agent_id) in done:
+                self.metrics[agent_id] = done[(ALL_REPEATS, agent_id)]
+                continue
+            cached = cache.get(cache.get_key(self, agent_id), self.n_epochs) if cache is not None else None
+            if cached is not None:
+                self.metrics[agent_id] = cached
+                if store is not None:
+                    store.add_shard(self, ALL_REPEATS, agent_id, cached)
+                continue
+            agent = self.get_agent(agent_id)
+            if agent.supports_replicates():
+                self.run_agent_replicates(agent_id, agent)
+            else:
+                for replicate in range(self.n_repeats):
+                    self.environment.load_replicate(replicate)
+                    self.run_agent(agent_id, replicate, self.environment.replicate_optimal[replicate], 
+                                   self.environment.replicate_optimal_values[replicate], agent)
+            if store is not None:
+                store.add_shard(self, ALL_REPEATS, agent_id, self.metrics[agent_id])
+            if cache is not None:
+                cache.add(cache.get_key(self, agent_id), self.metrics[agent_id])
+
+        self.ran = True
+
+    def run_agent_replicates(self, agent_id, agent = None):
+        """
+        Runs every repeat of an agent at once, against the replicates of the environment.
+
+        Args:
+            agent_id: index of the agent to run.
+            agent: agent object to run. If not given, it is obtained with get_agent.
+        """
+        if agent is None:
+            agent = self.get_agent(agent_id)
+        agent_seed, noise_seed = self.get_agent_seeds(agent_id)
+        # Steps are vectorized, so timing them when profiling costs little.
+        clock = time.perf_counter_ns if self.profiler is not None else lambda: 0
+        step_time, reward_time, environment_time, metrics_time = 0, 0, 0, 0
+
+        start = clock()
+        agent.set_rng(agent_seed)
+        self.environment.set_rng(noise_seed)
+        agent.reset_replicates(self.n_repeats)
+        reset_time = clock() - start
+
+        for i in range(self.n_epochs):
+            start = clock()
+            # MAB's case:
+            if not agent.is_dueling:
+                arms = agent.step_replicates()
+                step_end = clock()
+                rewards = self.environment.replicate_step(arms)
+                environment_end = clock()
+                agent.reward_replicates(arms, rewards)
+                reward_end = clock()
+                self.metrics[agent_id].update_replicates(i, self.environment, arms, rewards)
+            # DB's case:
+            else:
+                arms1, arms2 = agent.step_replicates()
+                step_end = clock()
+                rewards1, rewards2 = self.environment.replicate_dueling_step(arms1, arms2)
+                # Ties are broken randomly
+                one_wins = np.where(rewards1 != rewards2, rewards1 > rewards2, self.environment.rng.random(self.n_repeats) < 1/2)
+                environment_end = clock()
+                agent.reward_replicates(arms1, arms2, one_wins)
+                reward_end = clock()
+                self.metrics[agent_id].update_dueling_replicates(i, self.environment, arms1, arms2, rewards1, rewards2)
+            end = clock()
+            step_time += step_end - start
+            environment_time += environment_end - step_end
+            reward_time += reward_end - environment_end
+            metrics_time += end - reward_end
+
+        start = clock()
+        self.metrics[agent_id].new_iteration()
+        metrics_time += clock() - start
+
+        if self.profiler is not None:
+            # One call per epoch, covering every replicate
+            name = agent.get_name()
+            self.profiler.add(name, 'reset', reset_time)
+            for component, nanoseconds in [('step', step_time), ('environment', environment_time), ('reward', reward_time), ('metrics', metrics_time)]:
+                self.profiler.add(name, component, nanoseconds, self.n_epochs)
+
+    def get_profiler(self):
+        """
+        Returns the Profiler object with the timings of the experiment.
+
+        Returns:
+            Profiler object, or None if the experiment is not profiled.
+        """
+        return self.profiler
+
+    def enable_profiling(self):
+        """
+        Starts accumulating the timings of each component in a Profiler, if not done yet
+        (see the profile argument of the constructor).
+        """
+        if self.profiler is None:
+            self.profiler = Profiler()
 
     def get_agent_count(self):
         """
-        Returns number of agents.
+        (Override) Returns number of agents.
 
         Returns:
             number of agents.
@@ -195,55 +784,61 @@ class Experiment():
             index: index of the desired agent.
 
         Returns:
-            agent object.
+            agent object, or its Spec if the agent is given by one.
         """
         return self.agents[index]
 
-    def get_plot_position(self):
+    def get_agent(self, index):
         """
-        Returns this object "plot position" value.
-        
+        Returns the agent object to run. Agents given by a Spec are built anew on each call.
+
+        Args:
+            index: index of the desired agent.
+
         Returns:
-            this object "plot position" value.
-        """
-        return self.plot_position
-
-    def plot_metric_grid(self, metric_name, rows = 1, columns = 1, scale='linear', xlabel = None, ylabel = None, title = None, labelsize = 10, titlesize = 10, xlabels = None, ylabels = None, store = False, storesize = (11,6)):
-        """
-        Plots grid, intended for gridsearch results (view gridsearch.py for sample usage).
-
-        Args:
-            xlabels: horizontal labels left to right.
-            ylabels: vertical labels bottom to top.
-        """
-        if store:
-            plt.rcParams["figure.figsize"] = storesize
-        # Collect values for each experiment.
-        vals = np.array(list(self.get_final_values(metric_name).values()))
-
-        arr = np.zeros((rows, columns))
-        for row in range(rows):
-            for column in range(columns):
-                arr[row, column] = vals[row*columns + column]
-
-        plt.imshow(arr, cmap = plt.cm.turbo, origin="lower")
-        plt.xlabel("Experiment", fontsize = labelsize)
-        plt.ylabel(metric_name, fontsize = labelsize)
-        if xlabel:
-            plt.xlabel(xlabel, fontsize = labelsize)
-        if ylabel:
-            plt.ylabel(ylabel, fontsize = labelsize)
-        plt.xscale(scale)
-        plt.title(f"Heatmap of experiment {self.name}", fontsize = titlesize)
-        if title:
-            plt.title(title, fontsize = titlesize)
-        if xlabels:
-            plt.xticks(range(columns), xlabels)
-        if ylabels:
-            plt.yticks(range(rows), ylabels)
-        plt.colorbar()
-        if not store:
-            plt.show()
-        else:
-            plt.savefig(self.name + "_" + metric_name + '.png', dpi=200)
-            plt.clf()
\ No newline at end of file
+            agent object.
+        """
+        agent = self.agents[index]
+        return agent.build() if isinstance(agent, Spec) else agent
+
+    def get_agent_name(self, index):
+        """
+        (Override) Returns the name of an agent.
+
+        Args:
+            index: index of the desired agent.
+
+        Returns:
+            name of the agent.
+        """
+        return self.agents[index].get_name()
+
+    def get_agent_metrics(self, index):
+        """
+        (Override) Returns the results of an agent.
+
+        Args:
+            index: index of the desired agent.
+
+        Returns:
+            Metrics object of the agent.
+        """
+        return self.metrics[index]
+
+    def get_environment_name(self):
+        """
+        (Override) Returns the name of the environment of the experiment.
+
+        Returns:
+            name of the environment.
+        """
+        return self.environment.get_name()
+
+    def get_arm_count(self):
+        """
+        (Override) Returns the number of arms of the experiment.
+
+        Returns:
+            number of arms.
+        """
+        return self.environment.n_arms
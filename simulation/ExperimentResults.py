@@ -0,0 +1,271 @@
+"""
+Read-only view of the results of a MAB/DB experiment.
+Overriding this class allows for plotting results from other sources.
+"""
+
+import matplotlib.pyplot as plt
+import matplotlib as mpl
+import numpy as np
+
+class ExperimentResults():
+    """
+    Abstract class for the results of an experiment. Plots and final values
+    only use the accessors below, so they do not need the agent objects.
+    Subclasses must set the name, n_epochs, n_repeats, plot_position, seed, batched, key
+    and ran attributes.
+    """
+
+    def get_agent_count(self):
+        """
+        Returns number of agents.
+
+        Returns:
+            number of agents.
+        """
+        raise NotImplementedError
+
+    def get_agent_name(self, index):
+        """
+        Returns the name of an agent.
+
+        Args:
+            index: index of the desired agent.
+
+        Returns:
+            name of the agent.
+        """
+        raise NotImplementedError
+
+    def get_agent_names(self):
+        """
+        Returns the names of every agent, in insertion order.
+
+        Returns:
+            list of agent names.
+        """
+        return [self.get_agent_name(i) for i in range(self.get_agent_count())]
+
+    def get_agent_metrics(self, index):
+        """
+        Returns the results of an agent.
+
+        Args:
+            index: index of the desired agent.
+
+        Returns:
+            Metrics object of the agent.
+        """
+        raise NotImplementedError
+
+    def get_environment_name(self):
+        """
+        Returns the name of the environment of the experiment.
+
+        Returns:
+            name of the environment.
+        """
+        raise NotImplementedError
+
+    def get_arm_count(self):
+        """
+        Returns the number of arms of the experiment.
+
+        Returns:
+            number of arms.
+        """
+        raise NotImplementedError
+
+    def plot_metrics(self, metric_name, scale="linear", xlabel = None, ylabel = None, title = None, labelsize = 10, titlesize = 10, legendsize = 10, epoch_cutoff = None, error_bars = False, level = 0.95):
+        """
+        Plots and shows given metric for the experiment.
+
+        Args:
+            metric_name: Name of the desired metric within the available ones (check module "Metrics" or readme).
+            scale: pyplot scale format for both axes.
+            error_bars: If set to true, a confidence band is drawn around each curve.
+            level: Confidence level of the bands.
+        """
+        colormap = plt.cm.nipy_spectral
+        colors = [colormap(i) for i in np.linspace(0, 1, self.get_agent_count())]
+        mpl.rcParams['axes.prop_cycle'] = mpl.cycler(color=colors)
+
+        plots = []
+        for i in range(self.get_agent_count()):
+            plt.xlabel('Epoch')
+            plt.ylabel(metric_name)
+            if epoch_cutoff:
+                plots += plt.plot(self.get_agent_metrics(i).get_metrics()[metric_name][:epoch_cutoff], label=self.get_agent_name(i))
+            else:
+                plots += plt.plot(self.get_agent_metrics(i).get_metrics()[metric_name], label=self.get_agent_name(i))
+            if error_bars:
+                lower, upper = self.get_agent_metrics(i).get_confidence_interval(metric_name, level)
+                plt.fill_between(range(len(lower[:epoch_cutoff])), lower[:epoch_cutoff], upper[:epoch_cutoff], color=plots[-1].get_color(), alpha=0.2)
+        plt.xlabel('Epoch', fontsize = labelsize)
+        plt.ylabel(metric_name, fontsize = labelsize)
+        if xlabel:
+            plt.xlabel(xlabel, fontsize = labelsize)
+        if ylabel:
+            plt.ylabel(ylabel, fontsize = labelsize)
+        plt.xscale(scale)
+        plt.title(f"{self.get_arm_count()} arms, {self.n_repeats} simulations with {self.n_epochs} epochs each. Environment: {self.get_environment_name()}")
+        if title:
+            plt.title(title, fontsize = titlesize)
+        plt.legend(plots, self.get_agent_names(),prop={'size': legendsize})
+        plt.xscale(scale)
+        plt.show()
+
+    def save_metrics(self, metric_name, scale="linear", xlabel = None, ylabel = None, title = None, labelsize = 10, titlesize = 10, legendsize = 10, epoch_cutoff = None, error_bars = False, level = 0.95):
+        """
+        Plots and stores to png given metric for the experiment.
+
+        Args:
+            metric_name: Name of the desired metric within the available ones (check module "Metrics" or readme).
+            scale: pyplot scale format for both axes.
+            error_bars: If set to true, a confidence band is drawn around each curve.
+            level: Confidence level of the bands.
+        """
+        plt.rcParams["figure.figsize"] = (11, 6)
+        colormap = plt.cm.nipy_spectral
+        colors = [colormap(i) for i in np.linspace(0, 1, self.get_agent_count())]
+        mpl.rcParams['axes.prop_cycle'] = mpl.cycler(color=colors)
+
+        plots = []
+        for i in range(self.get_agent_count()):
+            plt.xlabel('Epoch')
+            plt.ylabel(metric_name)
+            if epoch_cutoff:
+                plots += plt.plot(self.get_agent_metrics(i).get_metrics()[metric_name][:epoch_cutoff], label=self.get_agent_name(i))
+            else:
+                plots += plt.plot(self.get_agent_metrics(i).get_metrics()[metric_name], label=self.get_agent_name(i))
+            if error_bars:
+                lower, upper = self.get_agent_metrics(i).get_confidence_interval(metric_name, level)
+                plt.fill_between(range(len(lower[:epoch_cutoff])), lower[:epoch_cutoff], upper[:epoch_cutoff], color=plots[-1].get_color(), alpha=0.2)
+        plt.xlabel('Epoch', fontsize = labelsize)
+        plt.ylabel(metric_name, fontsize = labelsize)
+        if xlabel:
+            plt.xlabel(xlabel, fontsize = labelsize)
+        if ylabel:
+            plt.ylabel(ylabel, fontsize = labelsize)
+        plt.xscale(scale)
+        plt.title(f"{self.get_arm_count()} arms, {self.n_repeats} simulations with {self.n_epochs} epochs each. Environment: {self.get_environment_name()}")
+        if title:
+            plt.title(title, fontsize = titlesize)
+        plt.legend(plots, self.get_agent_names(),prop={'size': legendsize})
+        plt.xscale(scale)
+        plt.savefig(self.name + "_" + metric_name + '.png', dpi=200)
+        plt.clf()
+
+    def get_name(self):
+        """
+        Returns the name of the experiment.
+
+        Returns:
+            the name of the experiment.
+        """
+        return self.name
+
+    def was_run(self):
+        return self.ran
+
+    def get_final_values(self, metric_name):
+        """
+        Returns dictionary "agent_index: value" where the value is the final value for metric_name.
+
+        Args:
+            metric_name: Name of the desired metric within the available ones (check module "Metrics" or readme).
+
+        Returns:
+            dictionary "agent_index: value" where the value is the final value for metric_name.
+        """
+        return {i: self.get_agent_metrics(i).get_metric_result(metric_name) for i in range(self.get_agent_count())}
+
+    def get_final_errors(self, metric_name):
+        """
+        Returns dictionary "agent_index: value" where the value is the standard error of the final value for metric_name.
+
+        Args:
+            metric_name: Name of the desired metric within the available ones (check module "Metrics" or readme).
+
+        Returns:
+            dictionary "agent_index: value" where the value is the standard error of the final value for metric_name.
+        """
+        return {i: self.get_agent_metrics(i).get_standard_error_result(metric_name) for i in range(self.get_agent_count())}
+
+    def get_agent_repeats(self, index):
+        """
+        Returns the number of repeats run by an agent, which may be lower than n_repeats
+        when running with a target error.
+
+        Args:
+            index: index of the desired agent.
+
+        Returns:
+            number of repeats of the agent.
+        """
+        return int(self.get_agent_metrics(index).value_counts[self.n_epochs-1])
+
+    def get_repeat_report(self, metric_name):
+        """
+        Returns a table with the repeats run by each agent, and the final value of a metric with its standard error.
+
+        Args:
+            metric_name: Name of the desired metric within the available ones (check module "Metrics" or readme).
+
+        Returns:
+            string with the table.
+        """
+        values = self.get_final_values(metric_name)
+        errors = self.get_final_errors(metric_name)
+        lines = [f"{'agent':<60}{'repeats':>9}{metric_name:>25}{'std. error':>12}"]
+        for i in range(self.get_agent_count()):
+            lines.append(f"{self.get_agent_name(i)[:59]:<60}{self.get_agent_repeats(i):>9}{values[i]:>25.4f}{errors[i]:>12.4f}")
+        return "\n".join(lines)
+
+    def get_plot_position(self):
+        """
+        Returns this object "plot position" value.
+        
+        Returns:
+            this object "plot position" value.
+        """
+        return self.plot_position
+
+    def plot_metric_grid(self, metric_name, rows = 1, columns = 1, scale='linear', xlabel = None, ylabel = None, title = None, labelsize = 10, titlesize = 10, xlabels = None, ylabels = None, store = False, storesize = (11,6)):
+        """
+        Plots grid, intended for gridsearch results (view gridsearch.py for sample usage).
+
+        Args:
+            xlabels: horizontal labels left to right.
+            ylabels: vertical labels bottom to top.
+        """
+        if store:
+            plt.rcParams["figure.figsize"] = storesize
+        # Collect values for each experiment.
+        vals = np.array(list(self.get_final_values(metric_name).values()))
+
+        arr = np.zeros((rows, columns))
+        for row in range(rows):
+            for column in range(columns):
+                arr[row, column] = vals[row*columns + column]
+
+        plt.imshow(arr, cmap = plt.cm.turbo, origin="lower")
+        plt.xlabel("Experiment", fontsize = labelsize)
+        plt.ylabel(metric_name, fontsize = labelsize)
+        if xlabel:
+            plt.xlabel(xlabel, fontsize = labelsize)
+        if ylabel:
+            plt.ylabel(ylabel, fontsize = labelsize)
+        plt.xscale(scale)
+        plt.title(f"Heatmap of experiment {self.name}", fontsize = titlesize)
+        if title:
+            plt.title(title, fontsize = titlesize)
+        if xlabels:
+            plt.xticks(range(columns), xlabels)
+        if ylabels:
+            plt.yticks(range(rows), ylabels)
+        plt.colorbar()
+        if not store:
+            plt.show()
+        else:
+            plt.savefig(self.name + "_" + metric_name + '.png', dpi=200)
+            plt.clf()
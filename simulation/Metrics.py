@@ -9,14 +9,27 @@ Supported metric names:
     'copeland_regret': same as dueling_regret.
     'dueling_regret_non_cumulative': non cumulative version of dueling_regret.
     'copeland_regret_non_cumulative': same as copeland_regret.
-    'weak_regret': cumulative weak copeland regret, that is, only the minimum regret of the pair is stored instead 
+    'weak_regret': cumulative weak copeland regret, that is, only the minimum regret of the pair is stored instead
         of the average.
-    'strong_regret': cumulative strong copeland regret, that is, only the maximum regret of the pair is stored instead 
+    'strong_regret': cumulative strong copeland regret, that is, only the maximum regret of the pair is stored instead
         of the average.
     'optimal_percent': percentage of runs that chose the optimal arm in a given epoch.
+
+For every metric and epoch, the number of values, their mean and their sum of squared
+differences to the mean (M2) are stored, so that standard errors and confidence intervals
+can be obtained and partial results (for example, from parallel runs) can be merged.
 """
 
 import numpy as np
+from scipy.stats import norm
+
+# Metrics stored by the accumulator, in storage order.
+METRIC_NAMES = ['reward', 'regret', 'copeland_regret', 'copeland_regret_non_cumulative',
+                'weak_regret', 'strong_regret', 'optimal_percent']
+
+# Alternative names for stored metrics.
+METRIC_ALIASES = {'dueling_regret': 'copeland_regret',
+                  'dueling_regret_non_cumulative': 'copeland_regret_non_cumulative'}
 
 def new_average(old_average, new_value, value_count):
     """
@@ -32,44 +45,108 @@ def new_average(old_average, new_value, value_count):
     """
     return 1/(value_count) * ((value_count-1)*old_average + new_value)
 
+def combine_moments(count_a, mean_a, m2_a, count_b, mean_b, m2_b):
+    """
+    Helper function to combine the count, mean and M2 (sum of squared differences
+    to the mean) of two disjoint groups of values (Chan et al. parallel algorithm).
+    Works element-wise on arrays.
+
+    Args:
+        count_a, mean_a, m2_a: moments of the first group.
+        count_b, mean_b, m2_b: moments of the second group.
+
+    Returns:
+        (count, mean, m2) of the union of both groups.
+    """
+    count = count_a + count_b
+    # Avoid dividing by zero where both groups are empty, their moments stay zero.
+    weight_b = np.divide(count_b, count, out=np.zeros_like(mean_a, dtype=float), where=count > 0)
+    delta = mean_b - mean_a
+    mean = mean_a + delta * weight_b
+    m2 = m2_a + m2_b + delta**2 * count_a * weight_b
+    return count, mean, m2
+
 class Metrics():
     """
     Stores metrics for an experiment.
     """
 
-    def __init__(self, n_epochs):
+    def __init__(self, n_epochs, deferred=False):
         """
         Initializes the metrics object.
 
         Args:
             n_epochs: number of epochs to store.
+            deferred: if set to true, updates only record the pulled arms and rewards of
+                the current iteration, and every metric is computed at once in new_iteration.
         """
         self.n_epochs = n_epochs
+        self.deferred = deferred
 
-        # Average reward obtained, only used for MABs
-        self.rewards = np.zeros(n_epochs)
-
-        # In the case of dueling bandits, strong regret measures
-        # the worst "classical" regret out of the two dueling bandits,
-        # and weak regret measures the best "classical" regret.
-        # In the case of MABs they will match to the actual regret.
-        self.regrets = np.zeros(n_epochs)
-        self.strong_regrets = np.zeros(n_epochs) 
-        self.weak_regrets = np.zeros(n_epochs)
-
-        # Copeland regret for non-condorcet situations
-        self.copeland_regrets = np.zeros(n_epochs)
-        self.copeland_regrets_non_cumulative = np.zeros(n_epochs)
+        # Number of values recorded for each epoch (the same for every metric)
+        self.value_counts = np.zeros(n_epochs)
 
-        # Times that the strategy chose the optimal reward
-        self.chose_optimal = np.zeros(n_epochs)
+        # Mean and M2 of each metric (rows, in METRIC_NAMES order) for each epoch (columns).
+        # In the case of dueling bandits, strong regret measures the worst "classical"
+        # regret out of the two dueling bandits, and weak regret measures the best
+        # "classical" regret. In the case of MABs they will match to the actual regret.
+        self.means = np.zeros((len(METRIC_NAMES), n_epochs))
+        self.m2 = np.zeros((len(METRIC_NAMES), n_epochs))
 
-        self.value_counts = np.zeros(n_epochs)
         self.sum_rewards = 0
-        self.sum_weak_rewards = 0 
-        self.sum_strong_rewards = 0 
+        self.sum_weak_rewards = 0
+        self.sum_strong_rewards = 0
         self.sum_copeland_rewards = 0
 
+        # Trajectory of the current iteration, only used in deferred mode.
+        if deferred:
+            self.trajectory_arms = np.zeros((2, n_epochs), dtype=int)
+            self.trajectory_rewards = np.zeros((2, n_epochs))
+            self.trajectory_length = 0
+            self.regret_table = None
+
+    def add_values(self, epoch, values):
+        """
+        Records one new value of every metric for the given epoch (Welford's algorithm).
+
+        Args:
+            epoch: epoch number.
+            values: array with one value per metric, in METRIC_NAMES order.
+        """
+        self.value_counts[epoch] += 1
+        delta = values - self.means[:, epoch]
+        self.means[:, epoch] += delta / self.value_counts[epoch]
+        self.m2[:, epoch] += delta * (values - self.means[:, epoch])
+
+    def add_batch_values(self, epoch, values):
+        """
+        Records several new values of every metric for the given epoch.
+
+        Args:
+            epoch: epoch number.
+            values: array of shape (number of metrics, number of values), rows in METRIC_NAMES order.
+        """
+        batch_count = values.shape[1]
+        batch_mean = np.mean(values, axis=1)
+        batch_m2 = np.sum((values - batch_mean[:, np.newaxis])**2, axis=1)
+        count, self.means[:, epoch], self.m2[:, epoch] = combine_moments(self.value_counts[epoch], self.means[:, epoch], self.m2[:, epoch],
+                                                                         batch_count, batch_mean, batch_m2)
+        self.value_counts[epoch] = count
+
+    def add_iteration(self, values):
+        """
+        Records the values of every metric for every epoch of a full iteration.
+
+        Args:
+            values: array of shape (number of metrics, number of epochs), rows in METRIC_NAMES order.
+                If it has less epochs than the object, only the first ones are updated.
+        """
+        n_epochs = values.shape[1]
+        self.value_counts[:n_epochs] += 1
+        delta = values - self.means[:, :n_epochs]
+        self.means[:, :n_epochs] += delta / self.value_counts[:n_epochs]
+        self.m2[:, :n_epochs] += delta * (values - self.means[:, :n_epochs])
+
     def update_dueling(self, epoch, environment, arm1, arm2, reward1, reward2, optimal_arm, optimal_reward):
         """
         Updates the data after a dueling bandits pull, that is, after
@@ -85,22 +162,29 @@ class Metrics():
             optimal_arm: index of the best possible arm.
             optimal_reward: value of the best possible arm.
         """
-        # Get how many data we have for that given epoch
-        self.value_counts[epoch] += 1
-        n_values = self.value_counts[epoch]
-        
+        if self.deferred:
+            # Only record the trajectory, metrics are computed in new_iteration.
+            self.trajectory_arms[0, epoch] = arm1
+            self.trajectory_arms[1, epoch] = arm2
+            self.trajectory_rewards[0, epoch] = reward1
+            self.trajectory_rewards[1, epoch] = reward2
+            self.trajectory_length = epoch + 1
+            self.regret_table = environment.get_regret_table()
+            self.optimal_arm = optimal_arm
+            self.optimal_reward = optimal_reward
+            return
+
+        table = environment.get_regret_table()
+        arm_values = table.arm_value_list
+
         # Get the worst arm in position 1
-        if environment.arms[arm1] > environment.arms[arm2]:
+        if arm_values[arm1] > arm_values[arm2]:
             reward1, reward2 = reward2, reward1
             arm1, arm2 = arm2, arm1
 
-        # We consider the reward the average of the rewards of each individual choice.
-        # This will punish bad user experiences due to presenting poor results.
-        self.rewards[epoch] = new_average(self.rewards[epoch], (reward1 + reward2) / 2, n_values)
-
         # Get the copeland individual regret (similar to before, but compare against copeland winners)
-        cop_score1 = environment.get_copeland_regret(arm1)
-        cop_score2 = environment.get_copeland_regret(arm2)
+        cop_score1 = table.copeland_regret_list[arm1]
+        cop_score2 = table.copeland_regret_list[arm2]
 
         # Update regrets
         self.sum_rewards += (reward1 + reward2) / 2
@@ -109,23 +193,45 @@ class Metrics():
         copeland_regret = (cop_score1 + cop_score2) / 2
         self.sum_copeland_rewards += copeland_regret if copeland_regret > 0 else 0
 
-        # Standard MAB regret
-        new_regret = (epoch+1)*optimal_reward - self.sum_rewards
-        self.regrets[epoch] = new_average(self.regrets[epoch], new_regret, n_values) 
-
-        # Weak DB regret
-        self.weak_regrets[epoch] = new_average(self.weak_regrets[epoch], self.sum_weak_rewards, n_values) 
-
-        # Strong DB regret
-        self.strong_regrets[epoch] = new_average(self.strong_regrets[epoch], self.sum_strong_rewards, n_values) 
-
-        # Copeland DB regret
-        self.copeland_regrets[epoch] = new_average(self.copeland_regrets[epoch], self.sum_copeland_rewards, n_values) 
-        self.copeland_regrets_non_cumulative[epoch] = new_average(self.copeland_regrets_non_cumulative[epoch], copeland_regret, n_values)
+        # We consider the reward the average of the rewards of each individual choice.
+        # This will punish bad user experiences due to presenting poor results.
+        # Regret is the standard MAB regret.
+        self.add_values(epoch, np.array([(reward1 + reward2) / 2,
+                                         (epoch+1)*optimal_reward - self.sum_rewards,
+                                         self.sum_copeland_rewards,
+                                         copeland_regret,
+                                         self.sum_weak_rewards,
+                                         self.sum_strong_rewards,
+                                         int(arm2 == optimal_arm)]))
+
+    def compute_trajectory_metrics(self):
+        """
+        Computes every metric of every epoch of the recorded trajectory in one vectorized pass
+        (deferred mode), with the same definitions as update_dueling.
 
-        # Optimal reward
-        self.chose_optimal[epoch] = new_average(self.chose_optimal[epoch], int(arm2 == optimal_arm), n_values)
-        
+        Returns:
+            array of shape (number of metrics, trajectory length), rows in METRIC_NAMES order.
+        """
+        length = self.trajectory_length
+        table = self.regret_table
+        arms1, arms2 = self.trajectory_arms[:, :length]
+        rewards1, rewards2 = self.trajectory_rewards[:, :length]
+
+        # Get the best arm of each pair
+        best_arms = np.where(table.arm_values[arms1] > table.arm_values[arms2], arms1, arms2)
+
+        cop_scores1 = table.copeland_regrets[arms1]
+        cop_scores2 = table.copeland_regrets[arms2]
+        copeland_regret = (cop_scores1 + cop_scores2) / 2
+        pair_rewards = (rewards1 + rewards2) / 2
+
+        return np.stack([pair_rewards,
+                         np.arange(1, length+1)*self.optimal_reward - np.cumsum(pair_rewards),
+                         np.cumsum(np.maximum(copeland_regret, 0)),
+                         copeland_regret,
+                         np.cumsum(np.minimum(cop_scores1, cop_scores2)),
+                         np.cumsum(np.maximum(cop_scores1, cop_scores2)),
+                         best_arms == self.optimal_arm])
 
     def update(self, epoch, environment, arm, reward, optimal_arm, optimal_reward):
         """
@@ -141,16 +247,126 @@ class Metrics():
         """
 
         self.update_dueling(epoch, environment, arm, arm, reward, reward, optimal_arm, optimal_reward)
-        
+
+    def update_trajectory(self, environment, arms, rewards, optimal_arm, optimal_reward):
+        """
+        Records every epoch of an iteration at once, e.g. from the trajectory of a
+        compiled kernel (see kernels.py). Equivalent to calling update_dueling on each epoch.
+
+        Args:
+            environment: Environment object where the experiment is run.
+            arms: array of shape (2, number of epochs) with the pulled pair of each epoch.
+                For MABs, both rows are the pulled arm.
+            rewards: array of shape (2, number of epochs) with the rewards of each pair.
+            optimal_arm: index of the best possible arm.
+            optimal_reward: value of the best possible arm.
+        """
+        if self.deferred:
+            length = arms.shape[1]
+            self.trajectory_arms[:, :length] = arms
+            self.trajectory_rewards[:, :length] = rewards
+            self.trajectory_length = length
+            self.regret_table = environment.get_regret_table()
+            self.optimal_arm = optimal_arm
+            self.optimal_reward = optimal_reward
+            return
+
+        for epoch in range(arms.shape[1]):
+            self.update_dueling(epoch, environment, arms[0, epoch], arms[1, epoch], rewards[0, epoch], rewards[1, epoch], optimal_arm, optimal_reward)
+
+    def update_dueling_replicates(self, epoch, environment, arms1, arms2, rewards1, rewards2):
+        """
+        Batched version of "update_dueling": updates the data after a comparison
+        has been carried out on every replicate of a batched experiment. The
+        running sums become arrays with one value per replicate.
+
+        Args:
+            epoch: epoch number.
+            environment: Environment object where the replicates were sampled (see Environment.reset_replicates).
+            arms1: array with the first pulled arm on each replicate.
+            arms2: array with the second pulled arm on each replicate.
+            rewards1: array with the first reward obtained on each replicate.
+            rewards2: array with the second reward obtained on each replicate.
+        """
+        indices = environment.replicate_indices
+
+        # Get the best arm of each pair
+        arm_values = environment.replicates['arms']
+        best_arms = np.where(arm_values[indices, arms1] > arm_values[indices, arms2], arms1, arms2)
+
+        # Get the copeland individual regrets
+        copeland_regrets = environment.replicates['copeland_regrets']
+        cop_scores1 = copeland_regrets[indices, arms1]
+        cop_scores2 = copeland_regrets[indices, arms2]
+
+        # Update regrets
+        pair_rewards = (rewards1 + rewards2) / 2
+        self.sum_rewards = self.sum_rewards + pair_rewards
+        self.sum_weak_rewards = self.sum_weak_rewards + np.minimum(cop_scores1, cop_scores2)
+        self.sum_strong_rewards = self.sum_strong_rewards + np.maximum(cop_scores1, cop_scores2)
+        copeland_regret = (cop_scores1 + cop_scores2) / 2
+        self.sum_copeland_rewards = self.sum_copeland_rewards + np.maximum(copeland_regret, 0)
+
+        self.add_batch_values(epoch, np.stack([pair_rewards,
+                                               (epoch+1)*environment.replicate_optimal_values - self.sum_rewards,
+                                               self.sum_copeland_rewards,
+                                               copeland_regret,
+                                               self.sum_weak_rewards,
+                                               self.sum_strong_rewards,
+                                               best_arms == environment.replicate_optimal]))
+
+    def update_replicates(self, epoch, environment, arms, rewards):
+        """
+        Batched version of "update" (that is, for the case of MABs).
+
+        Args:
+            epoch: epoch number.
+            environment: Environment object where the replicates were sampled (see Environment.reset_replicates).
+            arms: array with the pulled arm on each replicate.
+            rewards: array with the reward obtained on each replicate.
+        """
+        self.update_dueling_replicates(epoch, environment, arms, arms, rewards, rewards)
+
     def new_iteration(self):
         """
         Call if a new iteration (that is, different environment) has begun.
+        In deferred mode, this computes and stores the metrics of the finished iteration.
         """
+        if self.deferred and self.trajectory_length > 0:
+            self.add_iteration(self.compute_trajectory_metrics())
+            self.trajectory_length = 0
+            self.regret_table = None
+
         self.sum_rewards = 0
         self.sum_weak_rewards = 0
         self.sum_strong_rewards = 0
         self.sum_copeland_rewards = 0
 
+    def merge(self, other):
+        """
+        Merges the data of another Metrics object into this one, as if the
+        iterations stored in "other" had been run through this object. The
+        operation is associative, so shards of a run can be merged in any grouping.
+
+        Args:
+            other: Metrics object with the same number of epochs.
+        """
+        self.value_counts, self.means, self.m2 = combine_moments(self.value_counts, self.means, self.m2,
+                                                                 other.value_counts, other.means, other.m2)
+
+    def set_moments(self, value_counts, means, m2):
+        """
+        Replaces the stored values, e.g. with the ones of a stored checkpoint.
+
+        Args:
+            value_counts: array with the number of values of each epoch.
+            means: array of shape (number of metrics, number of epochs) with the mean of each metric and epoch.
+            m2: array with the same shape with the M2 of each metric and epoch.
+        """
+        self.value_counts = np.array(value_counts, dtype=float)
+        self.means = np.array(means, dtype=float)
+        self.m2 = np.array(m2, dtype=float)
+
     def get_metrics(self):
         """
         Gets all metrics in form of dictionary.
@@ -158,15 +374,10 @@ class Metrics():
         Returns:
             dictionary {metric_name: list} where the list has each epoch metric.
         """
-        return {'reward': self.rewards,
-                'regret': self.regrets,
-                'dueling_regret': self.copeland_regrets,
-                'copeland_regret': self.copeland_regrets,
-                'dueling_regret_non_cumulative': self.copeland_regrets_non_cumulative,
-                'copeland_regret_non_cumulative': self.copeland_regrets_non_cumulative,
-                'weak_regret': self.weak_regrets,
-                'strong_regret': self.strong_regrets,
-                'optimal_percent': self.chose_optimal}
+        metrics = {name: self.means[i] for i, name in enumerate(METRIC_NAMES)}
+        for alias, name in METRIC_ALIASES.items():
+            metrics[alias] = metrics[name]
+        return metrics
 
     def get_metric(self, name):
         """
@@ -185,3 +396,64 @@ class Metrics():
             the last epoch value for a given metric.
         """
         return self.get_metric(name)[self.n_epochs-1]
+
+    def get_standard_errors(self):
+        """
+        Gets the standard error of the mean of every metric in form of dictionary.
+        Epochs with less than two values have zero standard error.
+
+        Returns:
+            dictionary {metric_name: list} where the list has each epoch standard error.
+        """
+        counts = self.value_counts
+        variances = np.divide(self.m2, counts - 1, out=np.zeros_like(self.m2), where=counts > 1)
+        errors = np.sqrt(np.divide(variances, counts, out=np.zeros_like(self.m2), where=counts > 0))
+        standard_errors = {name: errors[i] for i, name in enumerate(METRIC_NAMES)}
+        for alias, name in METRIC_ALIASES.items():
+            standard_errors[alias] = standard_errors[name]
+        return standard_errors
+
+    def get_standard_error(self, name):
+        """
+        Returns the standard error of every epoch for a given metric.
+
+        Returns:
+            standard error of every epoch for a given metric.
+        """
+        return self.get_standard_errors()[name]
+
+    def get_standard_error_result(self, name):
+        """
+        Returns the standard error of the last epoch for a given metric.
+
+        Returns:
+            the standard error of the last epoch for a given metric.
+        """
+        return self.get_standard_error(name)[self.n_epochs-1]
+
+    def get_confidence_interval(self, name, level=0.95):
+        """
+        Returns a normal approximation confidence interval for the mean of every epoch of a given metric.
+
+        Args:
+            name: name of the metric.
+            level: confidence level of the interval.
+
+        Returns:
+            pair of arrays (lower, upper) with the bounds of the interval for each epoch.
+        """
+        mean = self.get_metric(name)
+        half_width = norm.ppf(1/2 + level/2) * self.get_standard_error(name)
+        return mean - half_width, mean + half_width
+
+    def get_confidence_intervals(self, level=0.95):
+        """
+        Gets the confidence intervals of every metric in form of dictionary.
+
+        Args:
+            level: confidence level of the intervals.
+
+        Returns:
+            dictionary {metric_name: (lower, upper)} with the bounds for each epoch.
+        """
+        return {name: self.get_confidence_interval(name, level) for name in self.get_metrics()}
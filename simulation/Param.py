@@ -0,0 +1,21 @@
+"""
+Placeholder for a parameter of a sweep.
+"""
+
+class Param():
+    """
+    Stands for the value of a named parameter inside a Spec, until it is
+    resolved with the parameters of a sweep point (see Spec.resolve).
+    """
+
+    def __init__(self, name):
+        """
+        Initializes the placeholder.
+
+        Args:
+            name: name of the parameter.
+        """
+        self.name = name
+
+    def __repr__(self):
+        return f"Param({self.name!r})"
@@ -0,0 +1,104 @@
+"""
+Accumulates the wall time spent in each component of a simulation.
+"""
+
+import json
+
+# Components timed by the profiled simulation loops, in report order.
+COMPONENTS = ['step', 'reward', 'environment', 'metrics', 'reset', 'kernel']
+
+class Profiler():
+    """
+    Stores the total wall time (in nanoseconds, as given by time.perf_counter_ns) and
+    the number of calls of each component, separately for each agent name.
+    Profilers of different runs (for example, of parallel work units) can be merged.
+    """
+
+    def __init__(self):
+        """
+        Initializes an empty profiler.
+        """
+        # {(agent name, component): [total nanoseconds, number of calls]}
+        self.timings = {}
+
+    def add(self, agent_name, component, nanoseconds, calls=1):
+        """
+        Records the time spent in a component.
+
+        Args:
+            agent_name: name of the simulated agent.
+            component: name of the component (see COMPONENTS).
+            nanoseconds: elapsed time.
+            calls: number of calls covered by the elapsed time.
+        """
+        timing = self.timings.setdefault((agent_name, component), [0, 0])
+        timing[0] += nanoseconds
+        timing[1] += calls
+
+    def merge(self, other):
+        """
+        Adds the timings of other profiler to this one.
+
+        Args:
+            other: Profiler object.
+        """
+        for (agent_name, component), (nanoseconds, calls) in other.timings.items():
+            self.add(agent_name, component, nanoseconds, calls)
+
+    def get_total_seconds(self):
+        """
+        Returns the total time recorded.
+
+        Returns:
+            seconds recorded across every agent and component.
+        """
+        return sum(nanoseconds for nanoseconds, _ in self.timings.values()) / 1e9
+
+    def get_report(self):
+        """
+        Returns the timings in a JSON serializable form.
+
+        Returns:
+            dictionary with the total seconds and a list of rows with the agent, component,
+            calls, seconds and microseconds per call of each timed component.
+        """
+        order = {component: i for i, component in enumerate(COMPONENTS)}
+        rows = []
+        for (agent_name, component), (nanoseconds, calls) in sorted(self.timings.items(), key=lambda item: (item[0][0], order.get(item[0][1], len(order)))):
+            rows.append({'agent': agent_name,
+                         'component': component,
+                         'calls': calls,
+                         'seconds': nanoseconds / 1e9,
+                         'microseconds_per_call': nanoseconds / 1e3 / calls if calls else 0})
+        return {'total_seconds': self.get_total_seconds(), 'components': rows}
+
+    def get_summary(self):
+        """
+        Returns a table with the timings of every agent and component, and their share of the total time.
+
+        Returns:
+            string with the table.
+        """
+        report = self.get_report()
+        total = report['total_seconds']
+        lines = [f"{'agent':<45}{'component':<13}{'calls':>11}{'total (s)':>11}{'per call (us)':>15}{'share':>8}"]
+        for row in report['components']:
+            share = row['seconds'] / total if total > 0 else 0
+            lines.append(f"{row['agent'][:44]:<45}{row['component']:<13}{row['calls']:>11}{row['seconds']:>11.3f}"
+                         f"{row['microseconds_per_call']:>15.2f}{share:>8.1%}")
+        lines.append(f"{'total':<58}{'':>11}{total:>11.3f}")
+        return "\n".join(lines)
+
+    def save_report(self, path, extra=None):
+        """
+        Stores the report (see get_report) as JSON.
+
+        Args:
+            path: destination file.
+            extra: optional dictionary with additional entries of the report.
+        """
+        report = self.get_report()
+        if extra is not None:
+            report.update(extra)
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
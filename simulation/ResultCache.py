@@ -0,0 +1,197 @@
+"""
+Content-addressed cache of the results of work units, shared across experiments and simulations.
+"""
+
+import os
+import numpy as np
+
+from .Metrics import Metrics as mm, METRIC_NAMES
+from .Spec import get_canonical, get_hash
+from . import kernels
+
+# Default bound of the total size of a cache, in bytes.
+DEFAULT_MAX_SIZE = 2**30
+
+class ResultCache():
+    """
+    Stores the metrics of finished work units under a hash of everything that determines
+    them: the configuration of the agent and of the environment, given by their class
+    and constructor arguments (see Spec.get_config and Configurable.get_config), the
+    number of epochs, and the seed streams of the unit, given by the experiment seed,
+    the repeat, the configuration of the agent and the number of earlier agents of its
+    experiment with the same one (see Experiment.get_agent_key), but not by the
+    position of the agent in its experiment.
+    Whether compiled kernels may be used is also part of the key, since they follow
+    other random streams. Units with the same key, even from other experiments or
+    simulations, are not run again. Units whose agent or environment cannot be
+    identified (see Spec.get_canonical, e.g. with a lambda as argument) are not cached.
+
+    Each entry is a .npy file with the counts, means and M2 of the unit (O(n_epochs) space).
+    When the total size exceeds max_size, the least recently used entries (by file
+    modification time, which is refreshed on every hit) are removed.
+    """
+
+    def __init__(self, directory, max_size = DEFAULT_MAX_SIZE):
+        """
+        Initializes the cache.
+
+        Args:
+            directory: folder of the cache. It is created if needed.
+            max_size: bound of the total size of the entries, in bytes. None for no bound.
+        """
+        self.directory = directory
+        self.max_size = max_size
+        os.makedirs(directory, exist_ok=True)
+        # {key: [last use time, size in bytes]}, read from the folder when first needed.
+        self.entries = None
+        self.size = 0 # Total size of the entries
+        self.hits = 0
+        self.misses = 0
+
+    def get_key(self, experiment, agent_id, repeat = None):
+        """
+        Returns the key of a work unit of an experiment.
+
+        Args:
+            experiment: Experiment object. Its seed is drawn if it has none.
+            agent_id: index of the agent.
+            repeat: index of the repeat. If not given, the key of the batched run of the
+                agent, which simulates every repeat at once, is returned.
+
+        Returns:
+            hexadecimal digest (see get_hash), or None if the unit cannot be cached.
+        """
+        try:
+            agent, environment = get_canonical(experiment.agents[agent_id]), get_canonical(experiment.environment)
+        except TypeError:
+            return None
+        config = {'agent': agent,
+                  'environment': environment,
+                  'n_epochs': experiment.n_epochs,
+                  'seed': get_canonical(experiment.get_seed()),
+                  'repeat': repeat,
+                  'duplicates': experiment.get_agent_key(agent_id)[1],
+                  'n_repeats': experiment.n_repeats if repeat is None else None,
+                  'kernels': bool(experiment.use_kernels and kernels.NUMBA_AVAILABLE)}
+        return get_hash(config)
+
+    def get_path(self, key):
+        """
+        Returns the path of an entry.
+
+        Args:
+            key: key of the entry.
+
+        Returns:
+            path of the file, inside a subfolder named after the first characters of the key.
+        """
+        return os.path.join(self.directory, key[:2], key + ".npy")
+
+    def load_entries(self):
+        """
+        Reads the last use time and size of every entry from the folder, the first time it is needed.
+        """
+        if self.entries is not None:
+            return
+        self.entries = {}
+        self.size = 0
+        for subfolder in os.scandir(self.directory):
+            if not subfolder.is_dir():
+                continue
+            for entry in os.scandir(subfolder.path):
+                if entry.name.endswith(".npy"):
+                    stat = entry.stat()
+                    self.entries[entry.name[:-4]] = [stat.st_mtime, stat.st_size]
+                    self.size += stat.st_size
+
+    def get(self, key, n_epochs):
+        """
+        Returns the stored metrics of a work unit, marking the entry as recently used.
+
+        Args:
+            key: key of the unit (see get_key). Units without key are never stored.
+            n_epochs: Nº of epochs of the unit.
+
+        Returns:
+            Metrics object, or None if the unit is not stored.
+        """
+        if key is None:
+            return None
+        path = self.get_path(key)
+        try:
+            values = np.load(path)
+        except (OSError, ValueError, EOFError):
+            self.misses += 1
+            return None
+        if values.shape != (1 + 2 * len(METRIC_NAMES), n_epochs):
+            self.misses += 1
+            return None
+        os.utime(path)
+        if self.entries is not None and key in self.entries:
+            self.entries[key][0] = os.path.getmtime(path)
+        self.hits += 1
+        metrics = mm(n_epochs, deferred=True)
+        metrics.set_moments(values[0], values[1:1 + len(METRIC_NAMES)], values[1 + len(METRIC_NAMES):])
+        return metrics
+
+    def add(self, key, metrics):
+        """
+        Stores the metrics of a finished work unit, evicting old entries if needed.
+
+        Args:
+            key: key of the unit (see get_key). Units without key are not stored.
+            metrics: Metrics object with the results of the unit.
+        """
+        if key is None:
+            return
+        values = np.vstack([np.asarray(metrics.value_counts, dtype=np.float64)[np.newaxis], metrics.means, metrics.m2]).astype(np.float64)
+        path = self.get_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + ".tmp", "wb") as f:
+            np.save(f, values)
+        os.replace(path + ".tmp", path)
+        self.load_entries()
+        if key in self.entries:
+            self.size -= self.entries[key][1]
+        self.entries[key] = [os.path.getmtime(path), os.path.getsize(path)]
+        self.size += self.entries[key][1]
+        self.evict()
+
+    def get_size(self):
+        """
+        Returns the total size of the entries.
+
+        Returns:
+            size in bytes.
+        """
+        self.load_entries()
+        return self.size
+
+    def evict(self):
+        """
+        Removes the least recently used entries until the total size is within max_size.
+        """
+        if self.max_size is None or self.get_size() <= self.max_size:
+            return
+        for key, (_, entry_size) in sorted(self.entries.items(), key=lambda item: item[1][0]):
+            if self.size <= self.max_size:
+                break
+            try:
+                os.remove(self.get_path(key))
+            except FileNotFoundError:
+                pass
+            del self.entries[key]
+            self.size -= entry_size
+
+    def clear(self):
+        """
+        Removes every entry of the cache.
+        """
+        self.load_entries()
+        for key in list(self.entries):
+            try:
+                os.remove(self.get_path(key))
+            except FileNotFoundError:
+                pass
+        self.entries = {}
+        self.size = 0
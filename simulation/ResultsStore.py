@@ -0,0 +1,139 @@
+"""
+Columnar storage of the results of simulations, readable without the agent objects.
+"""
+
+import json
+import os
+import numpy as np
+
+from .CheckpointStore import get_file_name
+from .StoredExperiment import StoredExperiment
+from .Metrics import METRIC_NAMES
+
+# Name of the JSON file describing the stored experiments.
+MANIFEST_NAME = "manifest.json"
+# Version of the layout of the store, increased on incompatible changes.
+FORMAT_VERSION = 1
+# Arrays stored for each experiment, in Metrics attribute order.
+ARRAY_NAMES = ['value_counts', 'means', 'm2']
+
+class ResultsStore():
+    """
+    Stores the metric curves of the experiments of a simulation in a folder, as
+    contiguous float64 .npy files that can be memory-mapped, plus a small JSON manifest
+    with the experiment and agent names, plot positions and sizes.
+
+    Each experiment has one file per array of its Metrics objects, stacked by agent:
+    value_counts with shape (n_agents, n_epochs), and means and m2 with shape
+    (n_agents, n_metrics, n_epochs), so the curves of an agent are contiguous.
+    Loading a store (see load) only reads the manifest; arrays are mapped when needed.
+    """
+
+    def __init__(self, directory):
+        """
+        Initializes the store.
+
+        Args:
+            directory: folder where the results are stored. It is created if needed.
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def get_path(self, entry, array_name):
+        """
+        Returns the path of an array of an experiment.
+
+        Args:
+            entry: dictionary with the description of the experiment in the manifest.
+            array_name: name of the array (see ARRAY_NAMES).
+
+        Returns:
+            path of the file.
+        """
+        return os.path.join(self.directory, f"{entry['file']}_{array_name}.npy")
+
+    def save(self, simulation):
+        """
+        Stores the results of every experiment of a simulation that was run, replacing
+        the previous contents. The manifest is written last and atomically, so an
+        interrupted save leaves the previous manifest valid.
+
+        Args:
+            simulation: Simulation object.
+        """
+        entries = [self.save_experiment(exp) for exp in simulation.experiments.values() if exp.was_run()]
+        manifest = {'format_version': FORMAT_VERSION,
+                    'simulation': simulation.name,
+                    'metrics': METRIC_NAMES,
+                    'experiments': entries}
+        path = os.path.join(self.directory, MANIFEST_NAME)
+        with open(path + ".tmp", "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(path + ".tmp", path)
+
+    def save_experiment(self, experiment):
+        """
+        Stores the arrays of an experiment.
+
+        Args:
+            experiment: ExperimentResults object.
+
+        Returns:
+            dictionary with the description of the experiment for the manifest.
+        """
+        entry = {'name': str(experiment.get_name()),
+                 'file': get_file_name(experiment.get_name()),
+                 'agents': experiment.get_agent_names(),
+                 'plot_position': experiment.get_plot_position(),
+                 'n_epochs': experiment.n_epochs,
+                 'n_repeats': experiment.n_repeats,
+                 'n_arms': int(experiment.get_arm_count()),
+                 'environment': experiment.get_environment_name(),
+                 'seed': experiment.seed,
+                 'batched': experiment.batched,
+                 'key': experiment.key}
+        metrics = [experiment.get_agent_metrics(i) for i in range(experiment.get_agent_count())]
+        for array_name in ARRAY_NAMES:
+            array = np.stack([np.asarray(getattr(m, array_name), dtype=np.float64) for m in metrics])
+            path = self.get_path(entry, array_name)
+            # Stored experiments may be memory-mapping the previous file, so it is replaced instead of overwritten
+            with open(path + ".tmp", "wb") as f:
+                np.save(f, array)
+            os.replace(path + ".tmp", path)
+        return entry
+
+    def load_manifest(self):
+        """
+        Reads the manifest of the store.
+
+        Returns:
+            dictionary with the manifest (see save).
+        """
+        with open(os.path.join(self.directory, MANIFEST_NAME)) as f:
+            manifest = json.load(f)
+        if manifest['format_version'] != FORMAT_VERSION or manifest['metrics'] != METRIC_NAMES:
+            raise ValueError(f"Results in {self.directory} were stored with an incompatible format")
+        return manifest
+
+    def load(self):
+        """
+        Returns the stored experiments, without reading their arrays.
+
+        Returns:
+            Tuple (simulation name, list of StoredExperiment objects in insertion order).
+        """
+        manifest = self.load_manifest()
+        return manifest['simulation'], [StoredExperiment(self, entry) for entry in manifest['experiments']]
+
+    def load_array(self, entry, array_name):
+        """
+        Memory-maps an array of an experiment.
+
+        Args:
+            entry: dictionary with the description of the experiment in the manifest.
+            array_name: name of the array (see ARRAY_NAMES).
+
+        Returns:
+            read-only memory-mapped array.
+        """
+        return np.load(self.get_path(entry, array_name), mmap_mode='r')
@@ -3,31 +3,62 @@ Carries out multi-experiment simulations.
 """
 
 from collections import OrderedDict
+from .Experiment import execute_work_units
+from .CheckpointStore import CheckpointStore
+from .ResultCache import ResultCache
+from .ResultsStore import ResultsStore, MANIFEST_NAME
+from .Profiler import Profiler
+from tqdm import tqdm
 import matplotlib as mpl
 import matplotlib.pyplot as plt
 import numpy as np
 
+import json
+import os
 import pickle
+import zlib
 
 class Simulation():
     """
     Class that carries out MAB and DB experiments.
     """ 
 
-    def __init__(self, name, experiments=[]):
+    def __init__(self, name, experiments=[], seed=None, profile=False):
         """
         Initializes class.
 
         Args:
             Name: name for the global simulation.
             Experiments: list of experiments that will be carried out.
+            seed: If given, experiments without a seed of their own get one derived
+                from this seed and their name, so the whole simulation can be reproduced.
+            profile: If set to true, every experiment times each of its components (see
+                Experiment), a summary table is printed after run_all and a JSON report
+                is stored next to the saved state (see save_profile_report).
         """
         self.name = name
         self.experiments = OrderedDict()
+        self.seed = seed
+        self.profile = profile
 
         # Insert in order
         for e in experiments:
             self.experiments[e.get_name()] = e
+            self.seed_experiment(e)
+            if profile:
+                e.enable_profiling()
+
+    def seed_experiment(self, experiment):
+        """
+        Derives the seed of an experiment from the simulation seed, unless the
+        experiment already has one. Seeds depend on the experiment name, not on
+        the order in which experiments are added.
+
+        Args:
+            experiment: experiment to be seeded.
+        """
+        if self.seed is not None and experiment.seed is None:
+            experiment.seed = [self.seed, zlib.crc32(str(experiment.get_name()).encode())]
 
     def add_experiment(self, experiment, override = False):
         """
@@ -42,6 +73,56 @@ class Simulation():
         id = experiment.get_name() 
         if id not in self.experiments or override:
             self.experiments[id] = experiment
+            self.seed_experiment(experiment)
+            if self.profile:
+                experiment.enable_profiling()
+
+    def add_sweep(self, sweep, override = False):
+        """
+        Adds the experiment of every point of a sweep to the simulation queue. Experiments
+        are expanded one at a time, and points whose experiment is already in the
+        simulation with the same configuration (the same key, see Sweep.get_key)
+        are skipped without expanding them.
+
+        Args:
+            sweep: Sweep object.
+            override: If an experiment with the same name but another configuration exists,
+                it is replaced only if set to true (see add_experiment).
+        """
+        for point in sweep.get_points():
+            existing = self.experiments.get(sweep.get_name(point))
+            if existing is not None and existing.key == sweep.get_key(point):
+                continue
+            self.add_experiment(sweep.get_experiment(point), override)
+
+    def reuse_results(self, directory = None):
+        """
+        Replaces the experiments that were not run yet by the stored results of an
+        experiment with the same name and configuration (see save_results), so that
+        run_all skips them. Only experiments with a key (i.e. expanded from a Sweep)
+        are reused, and only if their seed, when given, matches the stored one.
+
+        Args:
+            directory: folder of the results. Defaults to name + "_results".
+
+        Returns:
+            number of reused experiments.
+        """
+        directory = directory if directory is not None else self.name + "_results"
+        if not os.path.exists(os.path.join(directory, MANIFEST_NAME)):
+            return 0
+        store = ResultsStore(directory)
+        reused = 0
+        for stored in store.load()[1]:
+            exp = self.experiments.get(stored.get_name())
+            if exp is None or exp.was_run() or stored.key is None or exp.key != stored.key:
+                continue
+            if exp.seed is not None and json.loads(json.dumps(exp.seed)) != stored.seed:
+                continue
+            print(f"Experiment {stored.get_name()} was already computed, reusing stored results.")
+            self.experiments[stored.get_name()] = stored
+            reused += 1
+        return reused
 
     def get_experiment_count(self):
         """
@@ -85,12 +166,43 @@ class Simulation():
         """
         return self.experiments.values()[index]
 
-    def run_all(self, save = False):
+    def run_all(self, save = False, workers = None, checkpoint = None, cache = None):
         """
         Runs every (remaining) experiment.
 
         Args:
             save: if set to true, simulation state is saved to disk after each experiment.
+            workers: if given, the (experiment, repeat, agent) work units of every remaining
+                experiment are spread across that many processes (see run_parallel).
+            checkpoint: if given, CheckpointStore object or folder where the result of each
+                work unit is stored as soon as it is finished. Units stored by a previous
+                interrupted run are not run again (see Experiment.run_units).
+            cache: if given, ResultCache object or folder shared across simulations. Work units
+                found in it are not run, and the results of the others are added to it.
+        """
+        if checkpoint is not None and not isinstance(checkpoint, CheckpointStore):
+            checkpoint = CheckpointStore(checkpoint)
+        if cache is not None and not isinstance(cache, ResultCache):
+            cache = ResultCache(cache)
+
+        if workers is not None:
+            self.run_parallel(workers, save, checkpoint, cache)
+        else:
+            self.run_serial(save, checkpoint, cache)
+        if cache is not None:
+            print(f"Result cache: {cache.hits} work units reused, {cache.misses} run.")
+
+        if self.profile:
+            print(self.get_profiler().get_summary())
+
+    def run_serial(self, save = False, checkpoint = None, cache = None):
+        """
+        Runs every (remaining) experiment in this process, one after the other.
+
+        Args:
+            save: if set to true, simulation state is saved to disk after each experiment.
+            checkpoint: optional CheckpointStore object (see run_all).
+            cache: optional ResultCache object (see run_all).
         """
         counter = 1
         for id, exp in self.experiments.items():
@@ -98,13 +210,80 @@ class Simulation():
                 print(f"[{counter}/{self.get_experiment_count()}] Experiment {id} was already executed, skipping.")
             else:
                 print(f"[{counter}/{self.get_experiment_count()}] Running experiment {id}...")
-                exp.run()
+                exp.run(checkpoint=checkpoint, cache=cache)
                 if save:
                     self.save_state()
                     print(f"Saving state...")
 
             counter += 1
 
+    def run_parallel(self, workers, save = False, checkpoint = None, cache = None):
+        """
+        Runs every (remaining) experiment spreading their (experiment, repeat, agent)
+        work units across a pool of processes, largest units first. Each unit has its
+        own seed stream, so results do not depend on the number of workers.
+        Batched experiments are run in this process, and experiments with a target error,
+        which plan their units in rounds (see Experiment.run_units), are run one at a time.
+
+        Args:
+            workers: Nº of worker processes.
+            save: if set to true, simulation state is saved to disk after each experiment.
+            checkpoint: optional CheckpointStore object (see run_all).
+            cache: optional ResultCache object (see run_all).
+        """
+        pending = [exp for exp in self.experiments.values() if not exp.was_run()]
+
+        for exp in [exp for exp in pending if exp.batched]:
+            print(f"Running batched experiment {exp.get_name()}...")
+            exp.run(checkpoint=checkpoint, cache=cache)
+            if save:
+                self.save_state()
+
+        for exp in [exp for exp in pending if exp.target_error is not None]:
+            print(f"Running experiment {exp.get_name()} with target error {exp.target_error}...")
+            exp.run(workers=workers, checkpoint=checkpoint, cache=cache)
+            if save:
+                self.save_state()
+
+        pending = [exp for exp in pending if not exp.batched and exp.target_error is None]
+        results = {exp.get_name(): {} for exp in pending}
+        if checkpoint is not None:
+            for exp in pending:
+                checkpoint.open_experiment(exp)
+                results[exp.get_name()] = checkpoint.load_shards(exp)
+        if cache is not None:
+            for exp in pending:
+                results[exp.get_name()].update(exp.get_cached_units(cache, results[exp.get_name()]))
+
+        units = []
+        for exp in pending:
+            done = results[exp.get_name()]
+            units += [(exp.get_work_unit_cost(), unit) for unit in exp.get_work_units() if unit[0][1:] not in done]
+        # Largest first, so that expensive units do not end up running alone.
+        units = [unit for _, unit in sorted(units, key=lambda unit: -unit[0])]
+
+        profilers = {exp.get_name(): [] for exp in pending}
+        remaining = {exp.get_name(): exp.n_repeats * exp.get_agent_count() - len(results[exp.get_name()]) for exp in pending}
+        for id in [id for id, count in remaining.items() if count == 0]:
+            # Every unit was stored by a previous run
+            self.experiments[id].merge_work_units(results.pop(id))
+        print(f"Running {len(units)} work units from {len(pending)} experiments with {workers} workers...")
+        for (id, repeat, agent_id), metrics, profiler in tqdm(execute_work_units(units, workers), total=len(units)):
+            if checkpoint is not None:
+                checkpoint.add_shard(self.experiments[id], repeat, agent_id, metrics)
+            if cache is not None:
+                cache.add(cache.get_key(self.experiments[id], agent_id, repeat), metrics)
+            results[id][(repeat, agent_id)] = metrics
+            if profiler is not None:
+                profilers[id].append(profiler)
+            remaining[id] -= 1
+            if remaining[id] == 0:
+                self.experiments[id].merge_work_units(results.pop(id), profilers.pop(id))
+                print(f"Experiment {id} finished.")
+                if save:
+                    self.save_state()
+                    print(f"Saving state...")
+
     def save_all_metrics(self, metric_name, scale="linear"):
         """
         For each ran experiment, saves a png with the metric "metric_name" plotted.
@@ -139,10 +318,63 @@ class Simulation():
 
     def save_state(self):
         """
-        Stores the state of the simulation as pickle.
+        Stores the state of the simulation as pickle, and the results of the finished
+        experiments in a ResultsStore (see save_results). When profiling, the profiling
+        report is stored as well.
         """
         with open(self.name + ".pkl", "wb") as f:
             pickle.dump(self, f)
+        self.save_results()
+        if self.profile:
+            self.save_profile_report()
+
+    def save_results(self, directory = None):
+        """
+        Stores the metric curves of every finished experiment as memory-mappable arrays
+        with a JSON manifest (see ResultsStore), which load_results reads back without
+        the agent objects.
+
+        Args:
+            directory: destination folder. Defaults to name + "_results".
+        """
+        ResultsStore(directory if directory is not None else self.name + "_results").save(self)
+
+    def load_results(self, directory = None):
+        """
+        Loads the results stored by save_results and returns them as a simulation of
+        StoredExperiment objects, which can be plotted and queried for final values
+        but not run. Metric arrays are only read when needed.
+
+        Args:
+            directory: folder of the results. Defaults to name + "_results".
+
+        Returns:
+            loaded simulation object.
+        """
+        name, experiments = ResultsStore(directory if directory is not None else self.name + "_results").load()
+        return Simulation(name, experiments)
+
+    def get_profiler(self):
+        """
+        Returns the timings of every profiled experiment, merged.
+
+        Returns:
+            Profiler object.
+        """
+        profiler = Profiler()
+        for exp in self.experiments.values():
+            if exp.get_profiler() is not None:
+                profiler.merge(exp.get_profiler())
+        return profiler
+
+    def save_profile_report(self):
+        """
+        Stores the profiling report of the simulation as JSON, in the file
+        name + "_profile.json". It contains the merged timings of every experiment
+        (see Profiler.get_report) and, under "experiments", the report of each one.
+        """
+        experiments = {str(id): exp.get_profiler().get_report() for id, exp in self.experiments.items() if exp.get_profiler() is not None}
+        self.get_profiler().save_report(self.name + "_profile.json", {'simulation': self.name, 'experiments': experiments})
 
     def load_state(self):
         """
@@ -196,7 +428,7 @@ class Simulation():
                 plots += plt.plot(x_values, [v[i] for v in vals], "o--", label=names[name_counter])
                 name_counter += 1
             else:
-                plots += plt.plot(x_values, [v[i] for v in vals], "o--", label=exp.get_agent_by_index(i).get_name())
+                plots += plt.plot(x_values, [v[i] for v in vals], "o--", label=exp.get_agent_name(i))
 
         plt.xlabel("Experiment", fontsize = labelsize)
         plt.ylabel(metric_name, fontsize = labelsize)
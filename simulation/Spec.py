@@ -0,0 +1,211 @@
+"""
+Declarative recipes of agents and environments, built only where they are used.
+"""
+
+import hashlib
+import itertools
+import json
+import types
+import numpy as np
+
+from utils.Configurable import get_arguments
+from .Param import Param
+
+def resolve_value(value, params):
+    """
+    Replaces the Params of a value (recursively, within lists, tuples, dictionaries
+    and Specs) with their values. Params missing from params are kept.
+
+    Args:
+        value: value to resolve.
+        params: dictionary {parameter name: value}.
+
+    Returns:
+        resolved value.
+    """
+    if isinstance(value, Param):
+        return params.get(value.name, value)
+    if isinstance(value, Spec):
+        return value.resolve(params)
+    if isinstance(value, (list, tuple)):
+        return type(value)(resolve_value(v, params) for v in value)
+    if isinstance(value, dict):
+        return {k: resolve_value(v, params) for k, v in value.items()}
+    return value
+
+def build_value(value):
+    """
+    Builds the Specs of a value (recursively, within lists, tuples and dictionaries).
+
+    Args:
+        value: value to build.
+
+    Returns:
+        built value.
+    """
+    if isinstance(value, Param):
+        raise ValueError(f"Parameter {value.name} was not given")
+    if isinstance(value, Spec):
+        return value.build()
+    if isinstance(value, (list, tuple)):
+        return type(value)(build_value(v) for v in value)
+    if isinstance(value, dict):
+        return {k: build_value(v) for k, v in value.items()}
+    return value
+
+def get_canonical(value):
+    """
+    Returns a JSON serializable form of a value that only depends on its contents,
+    so that equal configurations get equal hashes (see get_hash). Classes and
+    functions are represented by their full name, and objects by their configuration.
+    Callables that cannot be told apart by their name (lambdas, nested functions,
+    functools.partial objects, bound methods...) raise a TypeError instead.
+
+    Args:
+        value: constructor argument, Spec or object with a get_config method.
+
+    Returns:
+        canonical form of the value.
+    """
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return get_canonical(value.tolist())
+    if isinstance(value, (list, tuple)):
+        return [get_canonical(v) for v in value]
+    if isinstance(value, dict):
+        return {str(k): get_canonical(v) for k, v in sorted(value.items(), key=lambda item: str(item[0]))}
+    if isinstance(value, Param):
+        return {'param': value.name}
+    if isinstance(value, (type, types.FunctionType, types.BuiltinFunctionType)):
+        name = f"{value.__module__}.{value.__qualname__}"
+        owner = getattr(value, '__self__', None)
+        # Every lambda of a module gets the same name, as do nested functions, and
+        # bound methods also depend on their object.
+        if '<' in value.__qualname__ or not (owner is None or isinstance(owner, types.ModuleType)):
+            raise TypeError(f"Callable {name} cannot be identified by its name, define it at module level")
+        return {'class': name}
+    if hasattr(value, 'get_config'):
+        return get_canonical(value.get_config())
+    if callable(value):
+        raise TypeError(f"Callable {value!r} has no canonical form, use a function defined at module level")
+    raise TypeError(f"Value {value!r} has no canonical form")
+
+def get_hash(config):
+    """
+    Returns the hash of a canonical configuration.
+
+    Args:
+        config: canonical form of a configuration (see get_canonical).
+
+    Returns:
+        hexadecimal SHA-256 digest.
+    """
+    return hashlib.sha256(json.dumps(config, sort_keys=True, separators=(',', ':')).encode()).hexdigest()
+
+def get_config_hash(value):
+    """
+    Returns the hash of the canonical form of a value, if it has one.
+
+    Args:
+        value: constructor argument, Spec or object with a get_config method.
+
+    Returns:
+        hexadecimal digest (see get_hash), or None if the value has no canonical form.
+    """
+    try:
+        return get_hash(get_canonical(value))
+    except TypeError:
+        return None
+
+class Spec():
+    """
+    Picklable recipe of an object, usually an agent or an environment: its class and
+    the arguments of its constructor. Arguments may be Params, filled in by resolve,
+    and other Specs (e.g. the MABs of a Sparring agent), built along with the object.
+    Holding Specs instead of agents keeps experiments light, and lets every agent be
+    built in the process that runs it.
+    """
+
+    def __init__(self, object_class, *args, **kwargs):
+        """
+        Initializes the recipe.
+
+        Args:
+            object_class: class (or any callable) that builds the object.
+            args: positional arguments of the constructor.
+            kwargs: keyword arguments of the constructor.
+        """
+        self.object_class = object_class
+        self.args = args
+        self.kwargs = kwargs
+        # Name of the built object, cached by get_name.
+        self.name = None
+
+    def resolve(self, params):
+        """
+        Returns a copy of the recipe with its Params replaced by their values.
+
+        Args:
+            params: dictionary {parameter name: value}. Params missing from it are kept.
+
+        Returns:
+            Spec object.
+        """
+        return Spec(self.object_class, *resolve_value(self.args, params), **resolve_value(self.kwargs, params))
+
+    def expand(self, **grid):
+        """
+        Returns a recipe for each combination of parameter values. The first parameter
+        varies slowest.
+
+        Args:
+            grid: lists of values of each parameter, e.g. alpha=[0.1, 1], beta=[0.1, 1].
+
+        Returns:
+            list of Spec objects.
+        """
+        names = list(grid.keys())
+        return [self.resolve(dict(zip(names, values))) for values in itertools.product(*grid.values())]
+
+    def build(self):
+        """
+        Builds the object. Every Param must have been resolved.
+
+        Returns:
+            new object.
+        """
+        return self.object_class(*build_value(self.args), **build_value(self.kwargs))
+
+    def get_config(self):
+        """
+        Returns the canonical form of the recipe (see get_canonical). It matches the one
+        of the built object (see Configurable.get_config), however its arguments are passed.
+
+        Returns:
+            dictionary with the class and arguments.
+        """
+        return {'class': get_canonical(self.object_class)['class'],
+                'arguments': get_canonical(get_arguments(self.object_class, self.args, self.kwargs))}
+
+    def get_key(self):
+        """
+        Returns the hash of the recipe.
+
+        Returns:
+            hexadecimal digest (see get_hash).
+        """
+        return get_hash(self.get_config())
+
+    def get_name(self):
+        """
+        Returns the name of the built object. It is built once for this and discarded.
+
+        Returns:
+            name given by the get_name method of the object.
+        """
+        if self.name is None:
+            self.name = self.build().get_name()
+        return self.name
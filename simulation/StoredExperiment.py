@@ -0,0 +1,144 @@
+"""
+Class representing the stored results of a MAB/DB experiment.
+"""
+
+from .ExperimentResults import ExperimentResults
+from .Metrics import Metrics as mm, METRIC_NAMES, METRIC_ALIASES
+
+class StoredExperiment(ExperimentResults):
+    """
+    Results of an experiment read from a ResultsStore. The metric arrays are
+    memory-mapped the first time they are needed, so opening a store only reads its
+    manifest, and final values only read the last epoch of each curve.
+    Agent and environment objects are not needed (nor available).
+    """
+
+    def __init__(self, store, entry):
+        """
+        Initializes the experiment.
+
+        Args:
+            store: ResultsStore object the experiment belongs to.
+            entry: dictionary with the description of the experiment in the manifest of the store.
+        """
+        self.store = store
+        self.entry = entry
+        self.name = entry['name']
+        self.n_epochs = entry['n_epochs']
+        self.n_repeats = entry['n_repeats']
+        self.plot_position = entry['plot_position']
+        self.seed = entry['seed']
+        self.batched = entry['batched']
+        self.key = entry['key']
+        self.ran = True
+        # Memory-mapped arrays, {array name: array}, loaded on first use.
+        self.arrays = {}
+
+    def __getstate__(self):
+        # Memory-mapped arrays are not pickled, they are mapped again when needed
+        state = self.__dict__.copy()
+        state['arrays'] = {}
+        return state
+
+    def get_array(self, array_name):
+        """
+        Returns a stored array of the experiment, memory-mapping it the first time.
+
+        Args:
+            array_name: name of the array (see ResultsStore).
+
+        Returns:
+            read-only array whose first axis is the agent index.
+        """
+        if array_name not in self.arrays:
+            self.arrays[array_name] = self.store.load_array(self.entry, array_name)
+        return self.arrays[array_name]
+
+    def get_agent_count(self):
+        """
+        (Override) Returns number of agents.
+
+        Returns:
+            number of agents.
+        """
+        return len(self.entry['agents'])
+
+    def get_agent_name(self, index):
+        """
+        (Override) Returns the name of an agent.
+
+        Args:
+            index: index of the desired agent.
+
+        Returns:
+            name of the agent.
+        """
+        return self.entry['agents'][index]
+
+    def get_agent_metrics(self, index):
+        """
+        (Override) Returns the results of an agent. Only the curves of that agent are read.
+
+        Args:
+            index: index of the desired agent.
+
+        Returns:
+            Metrics object of the agent.
+        """
+        metrics = mm(self.n_epochs)
+        metrics.set_moments(self.get_array('value_counts')[index], self.get_array('means')[index], self.get_array('m2')[index])
+        return metrics
+
+    def get_environment_name(self):
+        """
+        (Override) Returns the name of the environment of the experiment.
+
+        Returns:
+            name of the environment.
+        """
+        return self.entry['environment']
+
+    def get_arm_count(self):
+        """
+        (Override) Returns the number of arms of the experiment.
+
+        Returns:
+            number of arms.
+        """
+        return self.entry['n_arms']
+
+    def get_final_values(self, metric_name):
+        """
+        (Override) Returns dictionary "agent_index: value" where the value is the final value for metric_name.
+        Only the last epoch of the metric is read.
+
+        Args:
+            metric_name: Name of the desired metric within the available ones (check module "Metrics" or readme).
+
+        Returns:
+            dictionary "agent_index: value" where the value is the final value for metric_name.
+        """
+        row = METRIC_NAMES.index(METRIC_ALIASES.get(metric_name, metric_name))
+        values = self.get_array('means')[:, row, self.n_epochs-1]
+        return {i: float(values[i]) for i in range(self.get_agent_count())}
+
+    def get_agent_repeats(self, index):
+        """
+        (Override) Returns the number of repeats run by an agent. Only the last epoch count is read.
+
+        Args:
+            index: index of the desired agent.
+
+        Returns:
+            number of repeats of the agent.
+        """
+        return int(self.get_array('value_counts')[index, self.n_epochs-1])
+
+    def get_profiler(self):
+        """
+        Returns the Profiler object with the timings of the experiment. Timings are not stored.
+
+        Returns:
+            None.
+        """
+        return None
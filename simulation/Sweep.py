@@ -0,0 +1,138 @@
+"""
+Declarative description of a family of experiments.
+"""
+
+import itertools
+
+from .Experiment import Experiment
+from .Spec import Spec, resolve_value, get_canonical, get_hash
+
+class Sweep():
+    """
+    Describes one experiment per point of a parameter grid: the Specs of its agents and
+    environment, its epochs, repeats and plot position, any of which may depend on
+    the parameters of the point through Params. Experiments are expanded one at a
+    time (see get_experiments) and only hold Specs of their agents, which are built by
+    the process that runs them. Each point hashes to a key, so that points that
+    were already computed can be skipped (see Simulation.add_sweep).
+    """
+
+    def __init__(self, name, points, agents, environment, n_epochs, n_repeats = 1, plot_position = None, batched = False,
+                 target_error = None, error_metric = 'copeland_regret', min_repeats = 10):
+        """
+        Initializes the sweep.
+
+        Args:
+            name: format string of the experiment names, filled with the parameters of each point
+                (e.g. "N = {n_arms}"). Names must be unique.
+            points: dictionary {parameter name: list of values}, swept as a grid (first parameter
+                varies slowest), or list of dictionaries {parameter name: value}, one per point.
+            agents: list of Specs of the agents (see Spec.expand for grids of agents).
+            environment: Spec of the environment.
+            n_epochs: Nº of iterations per agent, or Param.
+            n_repeats: Nº of repeats (the maximum, with a target error), or Param.
+            plot_position: plot position of the experiments (see Experiment), or Param.
+            batched: whether the experiments are batched (see Experiment).
+            target_error: target standard error of the experiments (see Experiment), or Param.
+            error_metric: metric whose standard error is checked (see Experiment).
+            min_repeats: minimum Nº of repeats with a target error, or Param.
+        """
+        self.name = name
+        self.points = points
+        self.agents = agents
+        self.environment = environment
+        self.n_epochs = n_epochs
+        self.n_repeats = n_repeats
+        self.plot_position = plot_position
+        self.batched = batched
+        self.target_error = target_error
+        self.error_metric = error_metric
+        self.min_repeats = min_repeats
+
+    def get_points(self):
+        """
+        Returns the parameters of every point of the sweep.
+
+        Returns:
+            list of dictionaries {parameter name: value}.
+        """
+        if isinstance(self.points, dict):
+            names = list(self.points.keys())
+            return [dict(zip(names, values)) for values in itertools.product(*self.points.values())]
+        return list(self.points)
+
+    def get_name(self, point):
+        """
+        Returns the name of the experiment of a point.
+
+        Args:
+            point: dictionary {parameter name: value}.
+
+        Returns:
+            name of the experiment.
+        """
+        return self.name.format(**point)
+
+    def get_configuration(self, point):
+        """
+        Returns the canonical configuration of the experiment of a point (see get_canonical).
+
+        Args:
+            point: dictionary {parameter name: value}.
+
+        Returns:
+            JSON serializable dictionary.
+        """
+        configuration = {'name': self.get_name(point),
+                         'agents': [agent.resolve(point).get_config() for agent in self.agents],
+                         'environment': self.environment.resolve(point).get_config(),
+                         'n_epochs': get_canonical(resolve_value(self.n_epochs, point)),
+                         'n_repeats': get_canonical(resolve_value(self.n_repeats, point)),
+                         'batched': self.batched}
+        target_error = resolve_value(self.target_error, point)
+        if target_error is not None:
+            configuration['target_error'] = get_canonical(target_error)
+            configuration['error_metric'] = self.error_metric
+            configuration['min_repeats'] = get_canonical(resolve_value(self.min_repeats, point))
+        return configuration
+
+    def get_key(self, point):
+        """
+        Returns the key of the experiment of a point, which only changes if its
+        configuration does.
+
+        Args:
+            point: dictionary {parameter name: value}.
+
+        Returns:
+            hexadecimal digest (see get_hash).
+        """
+        return get_hash(self.get_configuration(point))
+
+    def get_experiment(self, point):
+        """
+        Expands the experiment of a point. Its environment is built, but its agents are kept as Specs.
+
+        Args:
+            point: dictionary {parameter name: value}.
+
+        Returns:
+            Experiment object, with the key of the point.
+        """
+        experiment = Experiment(self.get_name(point), [agent.resolve(point) for agent in self.agents], self.environment.resolve(point).build(),
+                                resolve_value(self.n_epochs, point), resolve_value(self.n_repeats, point),
+                                plot_position=resolve_value(self.plot_position, point), batched=self.batched,
+                                target_error=resolve_value(self.target_error, point), error_metric=self.error_metric,
+                                min_repeats=resolve_value(self.min_repeats, point))
+        experiment.key = self.get_key(point)
+        return experiment
+
+    def get_experiments(self):
+        """
+        Expands the experiment of every point, one at a time.
+
+        Yields:
+            Experiment objects, in point order.
+        """
+        for point in self.get_points():
+            yield self.get_experiment(point)
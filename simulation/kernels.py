@@ -0,0 +1,543 @@
+"""
+Optional compiled backend for simulate.
+
+If kernels are enabled (use_kernels in Experiment, off by default) and numba can be
+imported, the whole loop of a repeat (agent step, environment reward and agent update)
+is run by a JIT-compiled kernel for the supported agent and environment pairs, and only
+the trajectory (pulled arms and rewards) is handed back to the metrics. Otherwise, or
+for any other pair, simulate runs the agent objects in pure Python.
+
+Kernels follow the same policies as the agent classes, but draw their random
+numbers from numba's generator (seeded from the agent and environment streams),
+so results are reproducible and statistically equivalent to the Python path,
+not identical to it. See benchmarks/numba_kernels.py for the parity checks.
+
+Supported agents: UCBAgent, EpsilonGreedyAgent, ThompsonBetaAgent, RandomAgent, RUCBAgent,
+BTMAgent and IFAgent.
+Supported environments: GaussianEnvironment, NoisyGaussianEnvironment,
+BernoulliEnvironment and CyclicRPSEnvironment.
+"""
+
+import numpy as np
+
+from agents.UCBAgent import UCBAgent
+from agents.EpsilonGreedyAgent import EpsilonGreedyAgent
+from agents.ThompsonBetaAgent import ThompsonBetaAgent
+from agents.RandomAgent import RandomAgent
+from agents.RUCBAgent import RUCBAgent
+from agents.BTMAgent import BTMAgent
+from agents.IFAgent import IFAgent
+from environments.GaussianEnvironment import GaussianEnvironment
+from environments.NoisyGaussianEnvironment import NoisyGaussianEnvironment
+from environments.BernoulliEnvironment import BernoulliEnvironment
+from environments.CyclicRPSEnvironment import CyclicRPSEnvironment
+
+try:
+    import numba
+    NUMBA_AVAILABLE = True
+except ImportError:
+    numba = None
+    NUMBA_AVAILABLE = False
+
+def jit(function):
+    """
+    Helper decorator compiling a kernel with numba when it is available. Otherwise the
+    function is returned as is, and it is never dispatched to (see supports_kernel).
+    """
+    if NUMBA_AVAILABLE:
+        return numba.njit(cache=True)(function)
+    return function
+
+# Reward models of the environments, see ENVIRONMENT_MODELS.
+GAUSSIAN = 0 # value + standard normal noise
+NOISY_GAUSSIAN = 1 # gaussian, with an extra epsilon[arm1, arm2] added to the first arm of a duel
+BERNOULLI = 2 # 1 with probability value, 0 otherwise
+CYCLIC = 3 # duels won by the first arm with probability matrix[arm1, arm2], single pulls return the value
+
+# ---------------------------------------------------------------------------
+# Environment kernels
+# ---------------------------------------------------------------------------
+
+@jit
+def seed_kernels(seed):
+    """
+    Seeds the random generator used by every kernel.
+    """
+    np.random.seed(seed)
+
+@jit
+def pull(model, values, matrix, arm):
+    """
+    Reward of a single pull, as in Environment.step.
+    """
+    if model == BERNOULLI:
+        return 1.0 if np.random.random() < values[arm] else 0.0
+    if model == CYCLIC:
+        return values[arm]
+    return values[arm] + np.random.standard_normal()
+
+@jit
+def duel(model, values, matrix, arm1, arm2):
+    """
+    Rewards of a duel, as in Environment.dueling_step.
+    """
+    if model == CYCLIC:
+        if np.random.random() < matrix[arm1, arm2]:
+            return 1.0, 0.0
+        return 0.0, 1.0
+    if model == NOISY_GAUSSIAN:
+        reward1 = values[arm1] + np.random.standard_normal() + matrix[arm1, arm2]
+        return reward1, values[arm2] + np.random.standard_normal()
+    reward1 = pull(model, values, matrix, arm1)
+    return reward1, pull(model, values, matrix, arm2)
+
+@jit
+def first_wins(reward1, reward2):
+    """
+    Result of a duel seen by the agent. Ties are broken randomly.
+    """
+    if reward1 != reward2:
+        return reward1 > reward2
+    return np.random.random() < 1/2
+
+@jit
+def random_max(values):
+    """
+    Index of one of the maxima of an array, chosen uniformly at random.
+    """
+    best = values.max()
+    n_best = 0
+    for value in values:
+        if value == best:
+            n_best += 1
+    chosen = np.random.randint(0, n_best)
+    for arm in range(values.size):
+        if values[arm] == best:
+            if chosen == 0:
+                return arm
+            chosen -= 1
+    return values.size - 1
+
+@jit
+def update_average(averages, times_explored, arm, reward):
+    """
+    MABAgent.reward: the first observation replaces the starting value.
+    """
+    if times_explored[arm] == 0:
+        averages[arm] = reward
+    else:
+        averages[arm] += (reward - averages[arm]) / (times_explored[arm] + 1)
+    times_explored[arm] += 1
+
+# ---------------------------------------------------------------------------
+# Agent kernels. Each one runs a full repeat from a reset agent and writes the pulled
+# arms and rewards of every epoch in arms and rewards, arrays of shape (2, n_epochs).
+# MABs write the same arm and reward in both rows.
+# ---------------------------------------------------------------------------
+
+@jit
+def ucb_kernel(model, values, matrix, arms, rewards, exploration_rate, optimism):
+    """
+    UCBAgent.
+    """
+    n_arms = values.size
+    averages = np.full(n_arms, optimism)
+    times_explored = np.zeros(n_arms, dtype=np.int64)
+    scores = np.empty(n_arms)
+    for epoch in range(arms.shape[1]):
+        # Unexplored arms first, lowest index first
+        arm = -1
+        for candidate in range(n_arms):
+            if times_explored[candidate] == 0:
+                arm = candidate
+                break
+        if arm < 0:
+            log_time = np.log(epoch + 1)
+            for candidate in range(n_arms):
+                scores[candidate] = averages[candidate] + exploration_rate * np.sqrt(log_time / times_explored[candidate])
+            arm = np.argmax(scores)
+        reward = pull(model, values, matrix, arm)
+        update_average(averages, times_explored, arm, reward)
+        arms[0, epoch] = arms[1, epoch] = arm
+        rewards[0, epoch] = rewards[1, epoch] = reward
+
+@jit
+def epsilon_greedy_kernel(model, values, matrix, arms, rewards, epsilon, optimism):
+    """
+    EpsilonGreedyAgent.
+    """
+    n_arms = values.size
+    averages = np.full(n_arms, optimism)
+    times_explored = np.zeros(n_arms, dtype=np.int64)
+    for epoch in range(arms.shape[1]):
+        if np.random.random() < epsilon:
+            arm = np.random.randint(0, n_arms)
+        else:
+            arm = random_max(averages)
+        reward = pull(model, values, matrix, arm)
+        update_average(averages, times_explored, arm, reward)
+        arms[0, epoch] = arms[1, epoch] = arm
+        rewards[0, epoch] = rewards[1, epoch] = reward
+
+@jit
+def thompson_beta_kernel(model, values, matrix, arms, rewards, alpha, beta, failure_thres):
+    """
+    ThompsonBetaAgent.
+    """
+    n_arms = values.size
+    successes = np.zeros(n_arms)
+    failures = np.zeros(n_arms)
+    estimated_params = np.empty(n_arms)
+    for epoch in range(arms.shape[1]):
+        for candidate in range(n_arms):
+            estimated_params[candidate] = np.random.beta(successes[candidate] + alpha, failures[candidate] + beta)
+        arm = np.argmax(estimated_params)
+        reward = pull(model, values, matrix, arm)
+        if reward < failure_thres:
+            failures[arm] += 1
+        else:
+            successes[arm] += 1
+        arms[0, epoch] = arms[1, epoch] = arm
+        rewards[0, epoch] = rewards[1, epoch] = reward
+
+@jit
+def random_kernel(model, values, matrix, arms, rewards):
+    """
+    RandomAgent.
+    """
+    n_arms = values.size
+    for epoch in range(arms.shape[1]):
+        arm1 = np.random.randint(0, n_arms)
+        arm2 = np.random.randint(0, n_arms)
+        arms[0, epoch], arms[1, epoch] = arm1, arm2
+        rewards[0, epoch], rewards[1, epoch] = duel(model, values, matrix, arm1, arm2)
+
+@jit
+def rucb_kernel(model, values, matrix, arms, rewards, alpha):
+    """
+    RUCBAgent, computing the upper bounds of the whole matrix on every step.
+    """
+    n_arms = values.size
+    wins = np.zeros((n_arms, n_arms))
+    upper = np.empty((n_arms, n_arms))
+    unknown_bound = 1 + np.sqrt(alpha) # Pairs never compared
+    best = -1 # No best candidate
+    for epoch in range(arms.shape[1]):
+        log_time = np.log(epoch + 1)
+        n_cond_winners = 0
+        cond_winner = -1
+        for i in range(n_arms):
+            is_winner = True
+            for j in range(n_arms):
+                matches = wins[i, j] + wins[j, i]
+                if i == j:
+                    upper[i, j] = 1/2
+                elif matches == 0:
+                    upper[i, j] = unknown_bound
+                else:
+                    upper[i, j] = wins[i, j] / matches + np.sqrt(alpha * log_time / matches)
+                if upper[i, j] < 1/2:
+                    is_winner = False
+            if is_winner:
+                n_cond_winners += 1
+                cond_winner = i
+
+        # Select benchmarking arm
+        if n_cond_winners == 0:
+            a_c = np.random.randint(0, n_arms)
+            if best != a_c:
+                best = -1
+        elif n_cond_winners == 1:
+            a_c = cond_winner
+            best = a_c
+        elif best >= 0:
+            # The best one with probability 1/2, otherwise uniformly among the rest
+            if np.random.random() < 1/2:
+                a_c = best
+            else:
+                a_c = np.random.randint(0, n_arms-1)
+                if a_c >= best:
+                    a_c += 1
+        else:
+            a_c = np.random.randint(0, n_arms)
+
+        # Select opponent as the tightest one with a_c, removing a_c if there are more candidates
+        column = upper[:, a_c]
+        top = column.max()
+        n_candidates = 0
+        for j in range(n_arms):
+            if column[j] == top:
+                n_candidates += 1
+        if n_candidates == 1:
+            a_d = np.argmax(column)
+        else:
+            if column[a_c] == top:
+                n_candidates -= 1
+            chosen = np.random.randint(0, n_candidates)
+            a_d = -1
+            for j in range(n_arms):
+                if column[j] == top and j != a_c:
+                    if chosen == 0:
+                        a_d = j
+                        break
+                    chosen -= 1
+
+        reward1, reward2 = duel(model, values, matrix, a_c, a_d)
+        if first_wins(reward1, reward2):
+            wins[a_c, a_d] += 1
+        else:
+            wins[a_d, a_c] += 1
+        arms[0, epoch], arms[1, epoch] = a_c, a_d
+        rewards[0, epoch], rewards[1, epoch] = reward1, reward2
+
+@jit
+def btm_kernel(model, values, matrix, arms, rewards, horizon, gamma, delta):
+    """
+    BTMAgent, scanning the working set on every step instead of keeping heaps.
+    """
+    n_arms = values.size
+    wins = np.zeros((n_arms, n_arms))
+    comparisons = np.zeros((n_arms, n_arms))
+    wins_per_arm = np.zeros(n_arms)
+    comps_per_arm = np.zeros(n_arms)
+    probs = np.full(n_arms, 1/2)
+    in_working_set = np.ones(n_arms, dtype=np.bool_)
+    working_set_size = n_arms
+    steps = 0
+    for epoch in range(arms.shape[1]):
+        if working_set_size == 1 or steps >= horizon:
+            # Leader found: the best estimation (np.argmax, which picks the first NaN if any)
+            best = 0
+            for arm in range(n_arms):
+                if np.isnan(probs[arm]):
+                    best = arm
+                    break
+                if probs[arm] > probs[best]:
+                    best = arm
+            reward1, reward2 = duel(model, values, matrix, best, best)
+            arms[0, epoch], arms[1, epoch] = best, best
+            rewards[0, epoch], rewards[1, epoch] = reward1, reward2
+            continue
+
+        # Least compared arm of the working set and any arm of the working set, uniformly
+        min_comps = np.inf
+        n_least = 0
+        for arm in range(n_arms):
+            if in_working_set[arm]:
+                if comps_per_arm[arm] < min_comps:
+                    min_comps = comps_per_arm[arm]
+                    n_least = 1
+                elif comps_per_arm[arm] == min_comps:
+                    n_least += 1
+        chosen = np.random.randint(0, n_least)
+        arm1 = -1
+        for arm in range(n_arms):
+            if in_working_set[arm] and comps_per_arm[arm] == min_comps:
+                if chosen == 0:
+                    arm1 = arm
+                    break
+                chosen -= 1
+        chosen = np.random.randint(0, working_set_size)
+        arm2 = -1
+        for arm in range(n_arms):
+            if in_working_set[arm]:
+                if chosen == 0:
+                    arm2 = arm
+                    break
+                chosen -= 1
+
+        reward1, reward2 = duel(model, values, matrix, arm1, arm2)
+        arms[0, epoch], arms[1, epoch] = arm1, arm2
+        rewards[0, epoch], rewards[1, epoch] = reward1, reward2
+
+        # Update wins and comparisons of the first arm against "the mean"
+        if first_wins(reward1, reward2):
+            wins[arm1, arm2] += 1
+            wins_per_arm[arm1] += 1
+        comparisons[arm1, arm2] += 1
+        comps_per_arm[arm1] += 1
+        probs[arm1] = wins_per_arm[arm1] / comps_per_arm[arm1]
+        steps += 1
+
+        # Working set update, once every arm of it has been compared
+        comp_min = np.inf
+        worst_prob = np.inf
+        best_prob = -np.inf
+        for arm in range(n_arms):
+            if in_working_set[arm]:
+                comp_min = min(comp_min, comps_per_arm[arm])
+                if not np.isnan(probs[arm]):
+                    worst_prob = min(worst_prob, probs[arm])
+                    best_prob = max(best_prob, probs[arm])
+        if comp_min == 0:
+            continue
+        conf = gamma**2 * np.sqrt((1/comp_min) * np.log(1/delta))
+        if gamma > 1:
+            conf *= 3
+        if worst_prob + conf <= best_prob - conf:
+            n_losers = 0
+            for arm in range(n_arms):
+                if in_working_set[arm] and probs[arm] == worst_prob:
+                    n_losers += 1
+            chosen = np.random.randint(0, n_losers)
+            loser = -1
+            for arm in range(n_arms):
+                if in_working_set[arm] and probs[arm] == worst_prob:
+                    if chosen == 0:
+                        loser = arm
+                        break
+                    chosen -= 1
+
+            # Remove every comparison and win towards the loser (i.e, raise the mean)
+            for arm in range(n_arms):
+                wins_per_arm[arm] -= wins[arm, loser]
+                comps_per_arm[arm] -= comparisons[arm, loser]
+                wins[arm, loser] = 0
+                comparisons[arm, loser] = 0
+            in_working_set[loser] = False
+            working_set_size -= 1
+            for arm in range(n_arms):
+                if not in_working_set[arm]:
+                    probs[arm] = 0
+                elif comps_per_arm[arm] > 0:
+                    probs[arm] = wins_per_arm[arm] / comps_per_arm[arm]
+                else:
+                    probs[arm] = np.nan
+
+@jit
+def if_kernel(model, values, matrix, arms, rewards, delta):
+    """
+    IFAgent. Every recorded duel is between the leader and a candidate, so only the
+    wins of each candidate against the leader and of the leader against it are kept.
+    """
+    n_arms = values.size
+    candidate_wins = np.zeros(n_arms)
+    leader_wins = np.zeros(n_arms)
+    candidates = np.arange(1, n_arms)
+    n_candidates = n_arms - 1
+    leader = 0
+    turn = 0
+    log_delta = np.log(1/delta)
+    for epoch in range(arms.shape[1]):
+        if n_candidates == 0:
+            reward1, reward2 = duel(model, values, matrix, leader, leader)
+            arms[0, epoch], arms[1, epoch] = leader, leader
+            rewards[0, epoch], rewards[1, epoch] = reward1, reward2
+            continue
+
+        candidate = candidates[turn]
+        reward1, reward2 = duel(model, values, matrix, leader, candidate)
+        arms[0, epoch], arms[1, epoch] = leader, candidate
+        rewards[0, epoch], rewards[1, epoch] = reward1, reward2
+        if first_wins(reward1, reward2):
+            leader_wins[candidate] += 1
+        else:
+            candidate_wins[candidate] += 1
+
+        turn += 1
+        if turn < n_candidates:
+            continue
+
+        # End of the round: the winner is the first candidate with the highest win rate among
+        # the ones that confidently beat the leader
+        winner = -1
+        winner_prob = -1.0
+        for index in range(n_candidates):
+            candidate = candidates[index]
+            matches = candidate_wins[candidate] + leader_wins[candidate]
+            if matches > 0:
+                prob = candidate_wins[candidate] / matches
+                if prob - np.sqrt(log_delta / matches) > 1/2 and prob > winner_prob:
+                    winner = index
+                    winner_prob = prob
+
+        new_leader = candidates[winner] if winner >= 0 else leader
+
+        # Remove confident losers and, if there is a winner, every loser and the winner
+        kept = 0
+        for index in range(n_candidates):
+            candidate = candidates[index]
+            matches = candidate_wins[candidate] + leader_wins[candidate]
+            prob = candidate_wins[candidate] / matches if matches > 0 else 1/2
+            hard_loser = matches > 0 and prob + np.sqrt(log_delta / matches) < 1/2
+            keep = not hard_loser
+            if winner >= 0 and (prob < 1/2 or index == winner):
+                keep = False
+            if keep:
+                candidates[kept] = candidate
+                kept += 1
+        if winner >= 0:
+            # The previous duels were all against the leader, so they are forgotten
+            leader = new_leader
+            candidate_wins[:] = 0
+            leader_wins[:] = 0
+        n_candidates = kept
+        turn = 0
+
+# ---------------------------------------------------------------------------
+# Dispatch
+# ---------------------------------------------------------------------------
+
+def get_starting_value(agent):
+    """
+    Starting estimation of the arms of a MAB, as in MABAgent.reset.
+    """
+    return float(agent.optimism) if agent.optimism else -np.inf
+
+# For each supported agent class, its kernel and a function returning its parameters.
+AGENT_KERNELS = {
+    UCBAgent: (ucb_kernel, lambda agent: (float(agent.exprate), get_starting_value(agent))),
+    EpsilonGreedyAgent: (epsilon_greedy_kernel, lambda agent: (float(agent.epsilon), get_starting_value(agent))),
+    ThompsonBetaAgent: (thompson_beta_kernel, lambda agent: (float(agent.alpha), float(agent.beta), float(agent.failure_thres))),
+    RandomAgent: (random_kernel, lambda agent: ()),
+    RUCBAgent: (rucb_kernel, lambda agent: (float(agent.alpha),)),
+    BTMAgent: (btm_kernel, lambda agent: (float(agent.horizon), float(agent.gamma), float(agent.delta))),
+    IFAgent: (if_kernel, lambda agent: (float(agent.delta),)),
+}
+
+# For each supported environment class, its reward model and the matrix it needs.
+ENVIRONMENT_MODELS = {
+    GaussianEnvironment: (GAUSSIAN, lambda environment: np.zeros((1, 1))),
+    NoisyGaussianEnvironment: (NOISY_GAUSSIAN, lambda environment: np.asarray(environment.epsilons, dtype=float)),
+    BernoulliEnvironment: (BERNOULLI, lambda environment: np.zeros((1, 1))),
+    CyclicRPSEnvironment: (CYCLIC, lambda environment: np.asarray(environment.probabilities, dtype=float)),
+}
+
+def supports_kernel(agent, environment):
+    """
+    Returns whether a compiled kernel can simulate the agent on the environment.
+    Only the exact supported classes are dispatched to, since subclasses may change the policy.
+
+    Args:
+        agent: agent to run.
+        environment: Environment object.
+
+    Returns:
+        True if numba is available and the pair is supported.
+    """
+    return NUMBA_AVAILABLE and type(agent) in AGENT_KERNELS and type(environment) in ENVIRONMENT_MODELS
+
+def run_kernel(agent, environment, n_epochs):
+    """
+    Runs a full repeat of the agent against the current state of the environment with
+    its compiled kernel (see supports_kernel). The kernel seed is drawn from the random
+    streams of both the agent and the environment, so the run is reproducible.
+
+    Args:
+        agent: agent to run.
+        environment: Environment object, already reset.
+        n_epochs: Nº of iterations.
+
+    Returns:
+        Tuple (arms, rewards) of arrays of shape (2, n_epochs) with the pulled pair and the
+        rewards of each epoch. For MABs, both rows are equal.
+    """
+    kernel, get_parameters = AGENT_KERNELS[type(agent)]
+    model, get_matrix = ENVIRONMENT_MODELS[type(environment)]
+    seed = np.random.SeedSequence([agent.rng.integers(2**32), environment.rng.integers(2**32)]).generate_state(1)[0]
+    seed_kernels(seed)
+
+    arms = np.zeros((2, n_epochs), dtype=np.int64)
+    rewards = np.zeros((2, n_epochs))
+    kernel(model, np.asarray(environment.arms, dtype=float), get_matrix(environment), arms, rewards, *get_parameters(agent))
+    return arms, rewards
@@ -2,9 +2,10 @@
 Simulation for epoch impact in DB.
 """
 
-from typing import OrderedDict
 from simulation.Simulation import Simulation
-from simulation.Experiment import Experiment
+from simulation.Sweep import Sweep
+from simulation.Spec import Spec
+from simulation.Param import Param
 from agents.MultiSBMAgent import MultiSBMAgent
 from agents.ThompsonBetaAgent import ThompsonBetaAgent
 from agents.IFAgent import IFAgent
@@ -15,7 +16,7 @@ from agents.DTSAgent import DTSAgent
 from agents.RUCBAgent import RUCBAgent
 from agents.CCBAgent import CCBAgent
 from agents.RandomAgent import RandomAgent
-from environments import NoisyGaussianEnvironment
+from environments.NoisyGaussianEnvironment import NoisyGaussianEnvironment
 
 n_arms = 10
 n_repeats = 200
@@ -25,21 +26,20 @@ TRANSITIVITY_VALUES = [0, 0.5, 1, 1.5, 2, 2.5, 3, 3.5, 4, 4.5, 5]
 
 sim = Simulation(f"change transitivity, {n_arms} arms, {n_epochs} epochs")
 
-for transitivity in TRANSITIVITY_VALUES:
-    agents = []
-    agents.append(RandomAgent(n_arms))
-    agents.append(IFAgent(n_arms, n_epochs))
-    agents.append(BTMAgent(n_arms, n_epochs))
-    agents.append(DoublerAgent(n_arms, ThompsonBetaAgent(n_arms)))
-    agents.append(MultiSBMAgent(n_arms, ThompsonBetaAgent, [n_arms]))
-    agents.append(SparringAgent(n_arms, ThompsonBetaAgent(n_arms), ThompsonBetaAgent(n_arms)))
-    agents.append(DTSAgent(n_arms))
-    agents.append(RUCBAgent(n_arms))
-    agents.append(CCBAgent(n_arms))
-
-    environ = NoisyGaussianEnvironment.NoisyGaussianEnvironment(n_arms, d = transitivity)
-
-    sim.add_experiment(Experiment(f"d = {transitivity}", agents, environ, n_epochs, n_repeats, plot_position=transitivity))
+agents = [Spec(RandomAgent, n_arms),
+          Spec(IFAgent, n_arms, n_epochs),
+          Spec(BTMAgent, n_arms, n_epochs),
+          Spec(DoublerAgent, n_arms, Spec(ThompsonBetaAgent, n_arms)),
+          Spec(MultiSBMAgent, n_arms, ThompsonBetaAgent, [n_arms], compact=True),
+          Spec(SparringAgent, n_arms, Spec(ThompsonBetaAgent, n_arms), Spec(ThompsonBetaAgent, n_arms)),
+          Spec(DTSAgent, n_arms),
+          Spec(RUCBAgent, n_arms),
+          Spec(CCBAgent, n_arms)]
+
+transitivity = Param('transitivity')
+sim.add_sweep(Sweep("d = {transitivity}", {'transitivity': TRANSITIVITY_VALUES}, agents, Spec(NoisyGaussianEnvironment, n_arms, d = transitivity),
+                    n_epochs, n_repeats, plot_position=transitivity))
+sim.reuse_results()
 
 sim.run_all(save = True)
 
@@ -50,4 +50,4 @@ for i in range(len(TRANSITIVITY_VALUES)):
 sim.plot_aggregated_metrics('copeland_regret', [0.2, 0.2], xlabel="Varianza/nivel del ruido", ylabel = "Regret", title = "10 brazos gaussianos ruidosos, 4000 épocas", labelsize=20, titlesize=22, legendsize=12, store = True, names = names, storesize = (12,6))
 #sim.plot_aggregated_metrics('copeland_regret', padding=[0.2, 0.2])
 #sim.plot_aggregated_metrics('weak_regret', padding=[0.2, 0.2])
-#sim.plot_aggregated_metrics('strong_regret', padding=[0.2, 0.2])
\ No newline at end of file
+#sim.plot_aggregated_metrics('strong_regret', padding=[0.2, 0.2])
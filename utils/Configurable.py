@@ -0,0 +1,72 @@
+"""
+Base class of objects described by the arguments they were constructed with.
+"""
+
+import inspect
+
+# Constructor parameters that do not affect the results of an object. Random
+# generators are replaced with a stream of each repeat before every run.
+IGNORED_ARGUMENTS = ('rng',)
+
+def get_arguments(object_class, args, kwargs):
+    """
+    Returns the arguments of a call to a constructor by parameter name, with the
+    defaults of the parameters that were not given, so that equal configurations
+    are described alike however their arguments were passed.
+
+    Args:
+        object_class: class (or any callable) that builds the object.
+        args: positional arguments of the call.
+        kwargs: keyword arguments of the call.
+
+    Returns:
+        dictionary {parameter name: value}, without IGNORED_ARGUMENTS.
+    """
+    try:
+        bound = inspect.signature(object_class).bind_partial(*args, **kwargs)
+    except (TypeError, ValueError):
+        # Signature not available or not matching: the arguments are kept as given
+        return {'args': list(args), 'kwargs': dict(kwargs)}
+    bound.apply_defaults()
+    arguments = {}
+    for name, value in bound.arguments.items():
+        kind = bound.signature.parameters[name].kind
+        if name in IGNORED_ARGUMENTS:
+            continue
+        if kind == inspect.Parameter.VAR_KEYWORD:
+            arguments.update(value)
+        elif kind == inspect.Parameter.VAR_POSITIONAL:
+            arguments[name] = list(value)
+        else:
+            arguments[name] = value
+    return arguments
+
+class Configurable():
+    """
+    Records the arguments every object is constructed with (see get_arguments), before
+    its __init__ runs, so that its configuration is given by its actual parameters
+    (e.g. every hyperparameter of an agent, or the fixed arm values of an environment)
+    and not by its name, which may leave some out.
+
+    The arguments are only recorded once, so objects must not be reconfigured after
+    their construction (e.g. by assigning another alpha to an agent): their configuration,
+    and with it their cached results and random streams, would still be the original one.
+    Build a new object (or Spec) with the new arguments instead.
+    """
+
+    def __new__(cls, *args, **kwargs):
+        obj = super(Configurable, cls).__new__(cls)
+        # Unpickled objects get no arguments here, they are restored with the other attributes
+        obj.arguments = get_arguments(cls, args, kwargs)
+        return obj
+
+    def get_config(self):
+        """
+        Description of the object that identifies its behaviour, used as part of the
+        key of cached results (see simulation.Spec.get_canonical).
+
+        Returns:
+            dictionary with the full name of the class and the constructor arguments.
+        """
+        return {'class': f"{type(self).__module__}.{type(self).__qualname__}",
+                'arguments': self.arguments}
@@ -0,0 +1,67 @@
+"""
+Pool of pre-drawn random numbers for scalar draws in hot loops.
+"""
+
+import numpy as np
+
+class RandomPool():
+    """
+    Hands out uniform and standard normal numbers one at a time from blocks drawn
+    in advance from a numpy Generator. Drawing a block costs about as much as a
+    single scalar draw, so per-step draws only advance an iterator. The numbers are
+    the same the generator would produce for a block draw, so distributions are
+    unchanged; blocks are drawn lazily, so unused kinds cost no memory.
+    """
+
+    def __init__(self, rng=None, block_size=512):
+        """
+        Initializes the pool.
+
+        Args:
+            rng: Seed or numpy Generator the blocks are drawn from.
+            block_size: amount of numbers drawn at once for each kind.
+        """
+        self.block_size = block_size
+        self.set_rng(rng)
+
+    def set_rng(self, rng):
+        """
+        Replaces the generator the blocks are drawn from, discarding the numbers left.
+
+        Args:
+            rng: Seed, SeedSequence or numpy Generator.
+        """
+        self.rng = np.random.default_rng(rng)
+        # Iterators over the numbers left, since advancing them is much faster than indexing arrays.
+        self.uniforms = iter(())
+        self.normals = iter(())
+
+    def random(self):
+        """
+        Returns a uniform number in [0, 1).
+        """
+        try:
+            return next(self.uniforms)
+        except StopIteration:
+            self.uniforms = iter(self.rng.random(self.block_size).tolist())
+            return next(self.uniforms)
+
+    def standard_normal(self):
+        """
+        Returns a number from the standard normal distribution.
+        """
+        try:
+            return next(self.normals)
+        except StopIteration:
+            self.normals = iter(self.rng.standard_normal(self.block_size).tolist())
+            return next(self.normals)
+
+    def normal(self, loc=0, scale=1):
+        """
+        Returns a number from a normal distribution.
+
+        Args:
+            loc: mean of the distribution.
+            scale: standard deviation of the distribution.
+        """
+        return loc + scale * self.standard_normal()